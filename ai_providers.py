@@ -0,0 +1,143 @@
+import time
+import threading
+
+# Modelle und Parameter der KI-Anbieter (gehen auch in den Schlüssel des Antwort-Caches ein)
+GEMINI_MODEL = "gemini-2.0-flash"
+GEMINI_PARAMS = {"temperature": 1, "top_p": 0.95, "top_k": 40, "max_output_tokens": 8192}
+OPENAI_MODEL = "gpt-4o-mini"
+OPENAI_SYSTEM_PROMPT = "Du bist ein hilfreicher Assistent."
+OPENAI_PARAMS = {"temperature": 1, "max_tokens": 2048, "top_p": 1, "frequency_penalty": 0, "presence_penalty": 0}
+
+
+class OpenAIProvider:
+    """Chat-Completions über das OpenAI-SDK; ein Client pro API-Schlüssel (Verbindungen bleiben offen)."""
+
+    name = 'openai'
+    label = 'OpenAI'
+    model = OPENAI_MODEL
+    params = dict(OPENAI_PARAMS, system=OPENAI_SYSTEM_PROMPT)
+
+    def __init__(self, api_key):
+        from openai import OpenAI
+        self.client = OpenAI(api_key=api_key)
+
+    def _create(self, message, stream=False):
+        return self.client.chat.completions.create(
+            model=OPENAI_MODEL,
+            messages=[
+                {"role": "system", "content": OPENAI_SYSTEM_PROMPT},
+                {"role": "user", "content": message}
+            ],
+            response_format={"type": "text"},
+            stream=stream,
+            **OPENAI_PARAMS
+        )
+
+    def complete(self, message):
+        return self._create(message).choices[0].message.content
+
+    def stream(self, message):
+        """Liefert die Antwort stückweise, sobald die Tokens eintreffen."""
+        for chunk in self._create(message, stream=True):
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+
+class GeminiProvider:
+    """Gemini über google-genai; der Client wird einmal pro API-Schlüssel erzeugt."""
+
+    name = 'gemini'
+    label = 'Gemini'
+    model = GEMINI_MODEL
+    params = GEMINI_PARAMS
+
+    def __init__(self, api_key):
+        from google import genai
+        from google.genai import types
+        self.types = types
+        self.client = genai.Client(api_key=api_key)
+
+    def _request(self, message):
+        contents = [
+            self.types.Content(
+                role="user",
+                parts=[self.types.Part.from_text(text=message)],
+            ),
+        ]
+        config = self.types.GenerateContentConfig(**GEMINI_PARAMS, response_mime_type="text/plain")
+        return {'model': GEMINI_MODEL, 'contents': contents, 'config': config}
+
+    def complete(self, message):
+        return self.client.models.generate_content(**self._request(message)).text
+
+    def stream(self, message):
+        for chunk in self.client.models.generate_content_stream(**self._request(message)):
+            if chunk.text:
+                yield chunk.text
+
+
+class FakeProvider:
+    """
+    Lokaler Anbieter ohne Netzwerk für Tests und Entwicklung ("ai_provider": "fake").
+    Gibt 'answer' zurück (Standard: ein Echo der Nachricht) und streamt sie wortweise,
+    optional mit 'delay' Sekunden Pause pro Stück.
+    """
+
+    name = 'fake'
+    label = 'Fake'
+    model = 'fake'
+    params = {}
+
+    def __init__(self, api_key=None, answer=None, delay=0):
+        self.answer = answer
+        self.delay = delay
+
+    def complete(self, message):
+        return self.answer if self.answer is not None else f"Echo: {message}"
+
+    def stream(self, message):
+        words = self.complete(message).split(' ')
+        for i, word in enumerate(words):
+            if self.delay:
+                time.sleep(self.delay)
+            yield word if i == len(words) - 1 else word + ' '
+
+
+PROVIDERS = {
+    'openai': OpenAIProvider,
+    'gemini': GeminiProvider,
+    'fake': FakeProvider
+}
+
+
+class AiClientPool:
+    """
+    Hält einen langlebigen Anbieter-Client pro (Anbieter, API-Schlüssel), statt für
+    jede Anfrage einen neuen Client (und damit neue Verbindungen) aufzubauen.
+    Ein geänderter Schlüssel in den Einstellungen erzeugt beim nächsten Aufruf einen neuen Client.
+    """
+
+    def __init__(self, providers=None):
+        self.providers = dict(PROVIDERS if providers is None else providers)
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def get(self, provider, api_key):
+        key = (provider, api_key)
+        client = self._clients.get(key)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(key)
+                if client is None:
+                    # Alte Clients desselben Anbieters (z.B. nach Schlüsselwechsel) verwerfen
+                    for old_key in [k for k in self._clients if k[0] == provider]:
+                        del self._clients[old_key]
+                    client = self._clients[key] = self.providers[provider](api_key)
+        return client
+
+    def register(self, name, factory):
+        """Registriert einen weiteren Anbieter (z.B. eine Fake-Variante in Tests)."""
+        with self._lock:
+            self.providers[name] = factory
+            for old_key in [k for k in self._clients if k[0] == name]:
+                del self._clients[old_key]
@@ -0,0 +1,228 @@
+import os
+import json
+import time
+import heapq
+import atexit
+import threading
+from collections import OrderedDict
+
+# Formatversion der Cache-Dateien. Dateien ohne "format" stammen aus der alten
+# Version, in der Zeitstempel als "{key}_timestamp" neben den Daten lagen.
+CACHE_FORMAT = 2
+
+
+class ApiCache:
+    """
+    Persistenter Cache für API-Antworten.
+
+    Jeder Eintrag hat ein eigenes Ablaufdatum ('expires_at'). Lookups sind O(1)
+    über ein OrderedDict, das gleichzeitig die LRU-Reihenfolge hält; wird
+    'max_entries' überschritten, fliegt der am längsten nicht benutzte Eintrag
+    raus. Ein Heap nach Ablaufzeit erlaubt es, abgelaufene Einträge periodisch
+    zu entfernen, ohne den ganzen Cache zu durchsuchen.
+
+    Die Datei wird nicht mehr bei jedem Fehlschlag neu geschrieben, sondern von
+    einem Hintergrund-Thread gesammelt alle 'flush_interval' Sekunden (und beim Beenden).
+
+    Mit 'migrate_untimed' werden Einträge einer alten Datei ohne Zeitstempel
+    (z.B. die Spotify-Caches, die nie abliefen) als frisch übernommen statt verworfen.
+    """
+
+    def __init__(self, path, ttl=604800, max_entries=5000, flush_interval=30, sweep_interval=300,
+                 migrate_untimed=False):
+        self.path = path
+        self.ttl = ttl
+        self.migrate_untimed = migrate_untimed
+        self.max_entries = max_entries
+        self.flush_interval = flush_interval
+        self.sweep_interval = sweep_interval
+
+        self._lock = threading.RLock()
+        self._entries = None  # OrderedDict key -> {'value', 'expires_at'}; wird beim ersten Zugriff geladen
+        self._expiry_heap = []
+        self._dirty = False
+        self._thread = None
+        self._stats = {'hits': 0, 'misses': 0, 'expired': 0, 'evictions': 0}
+        self._version = 0  # Steigt bei jeder Änderung des Inhalts (für abgeleitete Daten)
+
+    def _ensure_loaded(self):
+        if self._entries is not None:
+            return
+        with self._lock:
+            if self._entries is not None:
+                return
+            entries, migrated = self._read_file()
+            self._entries = entries
+            self._expiry_heap = [(record['expires_at'], key) for key, record in entries.items()]
+            heapq.heapify(self._expiry_heap)
+            self._enforce_size()
+            if migrated:
+                self._dirty = True
+                self.flush()
+
+            self._thread = threading.Thread(target=self._maintenance_loop, daemon=True)
+            self._thread.start()
+            atexit.register(self.flush)
+
+    def _read_file(self):
+        """Liest die Cache-Datei und migriert bei Bedarf das alte Format. Gibt (entries, migrated) zurück."""
+        entries = OrderedDict()
+        if not os.path.exists(self.path):
+            return entries, False
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Cache-Datei {os.path.basename(self.path)} konnte nicht gelesen werden: {str(e)}")
+            return entries, False
+
+        if isinstance(data, dict) and data.get('format') == CACHE_FORMAT:
+            for key, record in data.get('entries', {}).items():
+                entries[key] = record
+            return entries, False
+
+        # Altes Format: {"titel_DE": {...}, "titel_DE_timestamp": 1700000000.0, ...}
+        # Gültige Einträge werden mit ihrer Restlaufzeit übernommen, damit keine API-Aufrufe verloren gehen.
+        now = time.time()
+        migrated = []
+        for key, value in data.items():
+            if key.endswith('_timestamp') and key[:-len('_timestamp')] in data:
+                continue
+            timestamp = data.get(f"{key}_timestamp")
+            if not isinstance(timestamp, (int, float)):
+                timestamp = now if self.migrate_untimed else 0
+            expires_at = timestamp + self.ttl
+            if expires_at > now:
+                migrated.append((timestamp, key, {'value': value, 'expires_at': expires_at}))
+
+        # Älteste zuerst, damit die LRU-Reihenfolge ungefähr dem Alter entspricht
+        for _, key, record in sorted(migrated, key=lambda entry: entry[0]):
+            entries[key] = record
+        print(f"{len(entries)} Einträge aus {os.path.basename(self.path)} in das neue Cache-Format übernommen")
+        return entries, True
+
+    def get(self, key):
+        """Gibt den gecachten Wert zurück oder None, wenn er fehlt oder abgelaufen ist."""
+        self._ensure_loaded()
+        with self._lock:
+            record = self._entries.get(key)
+            if record is None:
+                self._stats['misses'] += 1
+                return None
+            if record['expires_at'] <= time.time():
+                del self._entries[key]
+                self._dirty = True
+                self._version += 1
+                self._stats['expired'] += 1
+                self._stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            return record['value']
+
+    def peek(self, key):
+        """Wie get(), aber ohne Statistik und ohne die LRU-Reihenfolge zu ändern."""
+        self._ensure_loaded()
+        with self._lock:
+            record = self._entries.get(key)
+            if record is None or record['expires_at'] <= time.time():
+                return None
+            return record['value']
+
+    def set(self, key, value, ttl=None):
+        """Speichert einen Wert mit eigener Ablaufzeit."""
+        self._ensure_loaded()
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = {'value': value, 'expires_at': expires_at}
+            self._entries.move_to_end(key)
+            heapq.heappush(self._expiry_heap, (expires_at, key))
+            self._enforce_size()
+            self._dirty = True
+            self._version += 1
+
+    def delete(self, key):
+        self._ensure_loaded()
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self._dirty = True
+                self._version += 1
+
+    def version(self):
+        """Zähler, der sich bei jeder Änderung des Inhalts erhöht (z.B. um daraus abgeleitete Daten zu cachen)."""
+        self._ensure_loaded()
+        return self._version
+
+    def items(self):
+        """Gibt eine Kopie aller gültigen (key, value)-Paare zurück."""
+        self._ensure_loaded()
+        now = time.time()
+        with self._lock:
+            return [(key, record['value']) for key, record in self._entries.items() if record['expires_at'] > now]
+
+    def _enforce_size(self):
+        while self.max_entries and len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats['evictions'] += 1
+            self._version += 1
+
+    def sweep(self):
+        """Entfernt alle abgelaufenen Einträge (über den Ablauf-Heap, ohne den ganzen Cache zu durchsuchen)."""
+        self._ensure_loaded()
+        now = time.time()
+        removed = 0
+        with self._lock:
+            while self._expiry_heap and self._expiry_heap[0][0] <= now:
+                expires_at, key = heapq.heappop(self._expiry_heap)
+                record = self._entries.get(key)
+                # Veraltete Heap-Einträge (Wert wurde inzwischen erneuert oder verdrängt) überspringen
+                if record is not None and record['expires_at'] == expires_at:
+                    del self._entries[key]
+                    removed += 1
+            # Der Heap kann durch erneuerte Einträge wachsen; gelegentlich neu aufbauen
+            if len(self._expiry_heap) > 2 * len(self._entries) + 100:
+                self._expiry_heap = [(record['expires_at'], key) for key, record in self._entries.items()]
+                heapq.heapify(self._expiry_heap)
+            if removed:
+                self._stats['expired'] += removed
+                self._dirty = True
+                self._version += 1
+        return removed
+
+    def flush(self):
+        """Schreibt den Cache auf die Platte, falls sich etwas geändert hat."""
+        with self._lock:
+            if not self._dirty or self._entries is None:
+                return
+            data = {'format': CACHE_FORMAT, 'entries': dict(self._entries)}
+            self._dirty = False
+        try:
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Fehler beim Speichern von {os.path.basename(self.path)}: {str(e)}")
+            with self._lock:
+                self._dirty = True
+
+    def _maintenance_loop(self):
+        last_sweep = time.time()
+        while True:
+            time.sleep(self.flush_interval)
+            if time.time() - last_sweep >= self.sweep_interval:
+                self.sweep()
+                last_sweep = time.time()
+            self.flush()
+
+    def stats(self):
+        """Treffer, Fehlschläge, Verdrängungen und Größe des Caches."""
+        self._ensure_loaded()
+        with self._lock:
+            total = self._stats['hits'] + self._stats['misses']
+            return dict(
+                self._stats,
+                size=len(self._entries),
+                max_entries=self.max_entries,
+                hit_rate=round(self._stats['hits'] / total, 3) if total else 0
+            )
@@ -0,0 +1,206 @@
+import os
+import json
+import time
+import atexit
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    try:
+        import msvcrt
+    except ImportError:
+        msvcrt = None
+
+
+@contextmanager
+def _file_lock(path):
+    """Exklusive Sperre über eine Lock-Datei, damit mehrere Prozesse den Zähler nicht gleichzeitig schreiben."""
+    with open(path, 'a+') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        elif msvcrt is not None:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            elif msvcrt is not None:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _current_month():
+    return datetime.now().strftime("%Y-%m")
+
+
+class ApiUsageCounter:
+    """
+    Monatlicher Zähler für externe API-Aufrufe.
+
+    Vor einem Aufruf wird mit reserve() Budget reserviert, danach mit commit()
+    verbucht oder mit release() wieder freigegeben. So können parallele Threads
+    das Limit nicht gemeinsam überschreiten. Verbuchte Aufrufe werden im
+    Speicher gesammelt und in Paketen (alle 'flush_every' Aufrufe bzw.
+    'flush_interval' Sekunden) unter einer Dateisperre auf den Wert in der
+    Datei aufaddiert, sodass auch mehrere Prozesse keine Zählungen verlieren.
+    """
+
+    def __init__(self, path, limit=1000, flush_every=10, flush_interval=5, initial=None):
+        self.path = path
+        self.lock_path = path + '.lock'
+        self.limit = limit
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # Immer nur ein Schreibvorgang gleichzeitig
+        self._month = _current_month()
+        self._persisted = 0   # Stand der Datei beim letzten Lesen/Schreiben
+        self._pending = 0     # Verbuchte, aber noch nicht geschriebene Aufrufe
+        self._flushing = 0    # Verbuchte Aufrufe, die gerade in die Datei geschrieben werden
+        self._reserved = 0    # Laufende Aufrufe
+        self._last_flush = time.time()
+
+        with _file_lock(self.lock_path):
+            state = self._read_state()
+            if state is None and initial:
+                # Erster Start: Stand aus settings.json übernehmen
+                state = {'month': initial.get('last_reset_month', ''), 'count': initial.get('api_usage_count', 0)}
+                self._write_state(state)
+        if state and state.get('month') == self._month:
+            self._persisted = state.get('count', 0)
+
+        self._thread = threading.Thread(target=self._flush_loop, daemon=True)
+        self._thread.start()
+        atexit.register(self.flush)
+
+    def _read_state(self):
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def _write_state(self, state):
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.path)
+
+    def _check_month(self):
+        """Setzt den Zähler zu Beginn eines neuen Monats zurück (muss unter self._lock aufgerufen werden)."""
+        month = _current_month()
+        if month != self._month:
+            self._month = month
+            self._persisted = 0
+            self._pending = 0
+            self._flushing = 0
+
+    def _used(self):
+        """Verbuchte Aufrufe inklusive der gerade geschriebenen (unter self._lock aufrufen)."""
+        return self._persisted + self._flushing + self._pending
+
+    def count(self):
+        """Aktuelle Anzahl verbuchter Aufrufe in diesem Monat."""
+        with self._lock:
+            self._check_month()
+            return self._used()
+
+    def remaining(self):
+        """Noch verfügbares Budget (abzüglich laufender Reservierungen)."""
+        with self._lock:
+            self._check_month()
+            return max(0, self.limit - self._used() - self._reserved)
+
+    def reserve(self, calls=1):
+        """Reserviert Budget für 'calls' Aufrufe. Gibt False zurück, wenn das Limit erreicht ist."""
+        with self._lock:
+            self._check_month()
+            if self._used() + self._reserved + calls > self.limit:
+                return False
+            self._reserved += calls
+            return True
+
+    def commit(self, calls=1):
+        """Verbucht zuvor reservierte Aufrufe."""
+        with self._lock:
+            self._reserved = max(0, self._reserved - calls)
+            self._pending += calls
+            should_flush = self._pending >= self.flush_every
+        if should_flush:
+            self.flush()
+
+    def release(self, calls=1):
+        """Gibt reserviertes Budget wieder frei (z.B. wenn der Aufruf fehlgeschlagen ist)."""
+        with self._lock:
+            self._reserved = max(0, self._reserved - calls)
+
+    def increment(self, calls=1):
+        """Verbucht Aufrufe ohne vorherige Reservierung."""
+        with self._lock:
+            self._reserved += calls
+        self.commit(calls)
+
+    def flush(self):
+        """
+        Addiert die gesammelten Aufrufe unter Dateisperre auf den Stand in der Datei.
+        Bis der neue Stand übernommen ist, zählen sie als '_flushing' weiter mit,
+        damit reserve() das Limit auch währenddessen nicht überschreiten kann.
+        """
+        with self._flush_lock:
+            with self._lock:
+                self._check_month()
+                pending = self._pending
+                month = self._month
+                self._pending = 0
+                self._flushing = pending
+                self._last_flush = time.time()
+
+            try:
+                with _file_lock(self.lock_path):
+                    state = self._read_state() or {}
+                    count = state.get('count', 0) if state.get('month') == month else 0
+                    count += pending
+                    if pending:
+                        self._write_state({'month': month, 'count': count})
+            except OSError as e:
+                print(f"Fehler beim Speichern der API-Nutzung: {str(e)}")
+                with self._lock:
+                    if self._month == month:
+                        self._pending += self._flushing
+                        self._flushing = 0
+                return
+
+            with self._lock:
+                if self._month == month:
+                    # Der Dateistand enthält auch Aufrufe anderer Prozesse
+                    self._persisted = count
+                    self._flushing = 0
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            with self._lock:
+                due = self._pending > 0 or time.time() - self._last_flush >= 60
+            if due:
+                self.flush()
+
+    def stats(self):
+        with self._lock:
+            self._check_month()
+            count = self._used()
+            return {
+                'usage_count': count,
+                'reserved': self._reserved,
+                'pending_flush': self._pending + self._flushing,
+                'limit': self.limit,
+                'month': self._month
+            }
@@ -1,21 +1,33 @@
 import os
 import json
 import csv
-import requests
 import time
-from flask import Flask, render_template, request, jsonify, redirect, url_for
+from flask import Flask, render_template, request, jsonify, redirect, url_for, Response, stream_with_context
 from werkzeug.utils import secure_filename
 from datetime import datetime
-import pandas as pd
 import re
-from collections import defaultdict
 import base64
-from openai import OpenAI
-from google import genai
-from google.genai import types
+import hashlib
 import subprocess
 import sys
-from threading import Thread
+import uuid
+from threading import Thread, Lock
+import storage
+import collection_query
+from api_cache import ApiCache
+from api_usage import ApiUsageCounter
+from enrichment import TokenBucket, SingleFlight, map_in_order
+from http_client import HttpClient
+from spotify_client import SpotifyClient, track_document
+from jobs import JobManager
+from netflix_history import analyze_netflix_history
+from title_index import TitleIndex, title_key, item_keys
+from ai_providers import AiClientPool
+from taste_profile import TasteProfile, top_genres
+from collection_stats import CollectionStats
+from search_index import SearchIndex
+from suggestion_prompt import estimate_tokens, fit_to_budget
+import recommender
 app = Flask(__name__)
 
 # Konstanten für Dateipfade
@@ -25,6 +37,10 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 MOVIES_FILE = os.path.join(BASE_DIR, 'movies.json')
 MOVIE_API_CACHE_FILE = os.path.join(BASE_DIR, 'movie_api_cache.json')
 SETTINGS_FILE = os.path.join(BASE_DIR, 'settings.json')
+API_USAGE_FILE = os.path.join(BASE_DIR, 'api_usage.json')
+MUSIC_TRACKS_FILE = os.path.join(BASE_DIR, 'music_tracks.json')
+STORAGE_DB_FILE = os.path.join(BASE_DIR, 'omnibase.db')
+AI_RESPONSE_CACHE_FILE = os.path.join(BASE_DIR, 'ai_response_cache.json')
 
 # API-Konfiguration
 API_KEY = ""
@@ -49,42 +65,204 @@ def install_update():
         return jsonify({'success': True, 'message': 'Update started'})
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
+_storage_backend = None
+_storage_lock = Lock()
+
+def get_storage():
+    """
+    Gibt das Speicher-Backend für Filme, Spiele und Musik-Tracks zurück.
+    Wird über "storage_backend" in settings.json gewählt ('json' oder 'sqlite');
+    eine Änderung wird beim nächsten Start der App wirksam.
+    """
+    global _storage_backend
+    if _storage_backend is None:
+        with _storage_lock:
+            if _storage_backend is None:
+                settings = load_settings()
+                backend = storage.create_backend(
+                    settings.get("storage_backend", "json"),
+                    {
+                        'movies': MOVIES_FILE,
+                        'games': GAMES_FILE,
+                        'music_tracks': MUSIC_TRACKS_FILE
+                    },
+                    STORAGE_DB_FILE,
+                    compact_ops=settings.get("journal_compact_ops", 500),
+                    compact_seconds=settings.get("journal_compact_seconds", 30)
+                )
+                # Geparste Sammlungen im Speicher halten, neu laden nur bei geänderter Datei
+                cached_storage = storage.CachedStorage(backend)
+                # Titel-Index für die Duplikaterkennung, Geschmacksprofil für Vorschläge,
+                # Kennzahlen für die Statistik-Seiten und Volltext-Index für die Bibliothekssuche,
+                # alle werden bei Änderungen nachgeführt
+                cached_storage.register_view('titles', TitleIndex)
+                cached_storage.register_view('taste', TasteProfile)
+                cached_storage.register_view('stats', CollectionStats)
+                cached_storage.register_view('search', SearchIndex)
+                _storage_backend = cached_storage
+    return _storage_backend
+
+def title_index(collection):
+    """Index normalisierter Titel und externer IDs einer Sammlung (Duplikaterkennung in O(1))."""
+    return get_storage().view(collection, 'titles')
+
+def taste_profile(collection):
+    """Geschmacksprofil einer Sammlung (Genre-Zähler, Favoriten, Künstler), inkrementell nachgeführt."""
+    return get_storage().view(collection, 'taste')
+
+# Öffentliche Namen der Sammlungen (/api/stats/<Name>, /api/library/search?types=)
+MEDIA_COLLECTIONS = {
+    'movies': 'movies',
+    'games': 'games',
+    'music': 'music_tracks'
+}
+
+@app.route('/api/stats/<name>', methods=['GET'])
+def get_collection_stats(name):
+    """
+    Gibt die Kennzahlen einer Sammlung (movies, games, music) zurück: Bewertungen,
+    Genres, Jahre, Typen, Quellen und Favoriten. Die Zähler werden bei jeder Änderung
+    nachgeführt, die Sammlung selbst wird dafür nicht geladen.
+    """
+    collection = MEDIA_COLLECTIONS.get(name)
+    if collection is None:
+        return jsonify({'success': False, 'message': f'Unknown collection: {name}'}), 404
+    # Version vor der Sicht lesen (wie bei full_collection_response)
+    version = get_storage().version(collection)
+    response = jsonify(get_storage().view(collection, 'stats').to_dict())
+    response.headers['X-Collection-Version'] = str(version)
+    return response
+
+LIBRARY_SEARCH_DEFAULT_LIMIT = 20
+LIBRARY_SEARCH_MAX_LIMIT = 100
+
+@app.route('/api/library/search', methods=['GET'])
+def search_library():
+    """
+    Durchsucht die eigene Sammlung (Filme, Spiele, Musik) über den lokalen Volltext-Index,
+    tolerant gegenüber Tippfehlern. Parameter: q, limit (Standard 20) und optional
+    types=movies,games,music. Die Treffer aller Sammlungen werden nach Score gemischt.
+    """
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'error': 'No query provided'}), 400
+    try:
+        limit = int(request.args.get('limit', LIBRARY_SEARCH_DEFAULT_LIMIT))
+    except ValueError:
+        return jsonify({'error': 'Invalid limit'}), 400
+    limit = max(1, min(limit, LIBRARY_SEARCH_MAX_LIMIT))
+
+    names = [name.strip() for name in request.args.get('types', '').split(',') if name.strip()]
+    unknown = [name for name in names if name not in MEDIA_COLLECTIONS]
+    if unknown:
+        return jsonify({'error': f"Unknown type: {', '.join(unknown)}"}), 400
+
+    start = time.perf_counter()
+    hits = []
+    for name in names or MEDIA_COLLECTIONS:
+        index = get_storage().view(MEDIA_COLLECTIONS[name], 'search')
+        hits.extend({'type': name, 'score': score, 'item': item} for score, item in index.search(query, limit))
+    hits.sort(key=lambda hit: hit['score'], reverse=True)
+
+    return jsonify({
+        'query': query,
+        'results': hits[:limit],
+        'took_ms': round((time.perf_counter() - start) * 1000, 1)
+    })
+
+@app.route('/api/storage/stats', methods=['GET'])
+def get_storage_stats():
+    """Gibt das aktive Speicher-Backend und die Cache-Statistiken zurück."""
+    storage_backend = get_storage()
+    return jsonify({
+        "backend": storage_backend.name,
+        "cache": storage_backend.stats()
+    })
+
 def load_movies():
-    """Lädt Filme aus der JSON-Datei."""
-    if os.path.exists(MOVIES_FILE):
-        with open(MOVIES_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    return []
+    """Lädt Filme aus dem Speicher-Backend."""
+    return get_storage().load('movies')
 
 def save_movies(movies):
-    """Speichert Filme in der JSON-Datei."""
-    with open(MOVIES_FILE, 'w', encoding='utf-8') as f:
-        json.dump(movies, f, ensure_ascii=False, indent=4)
-
-def load_api_cache():
-    """Lädt API-Cache aus der JSON-Datei."""
-    if os.path.exists(MOVIE_API_CACHE_FILE):
-        with open(MOVIE_API_CACHE_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    return {}
+    """Speichert alle Filme im Speicher-Backend."""
+    get_storage().save('movies', movies)
 
-def save_api_cache(cache):
-    """Speichert API-Cache in der JSON-Datei."""
-    with open(MOVIE_API_CACHE_FILE, 'w', encoding='utf-8') as f:
-        json.dump(cache, f, ensure_ascii=False, indent=4)
+_settings_cache = None  # (mtime/Größe der Datei, Einstellungen)
+_settings_lock = Lock()
+
+def _settings_stamp():
+    try:
+        st = os.stat(SETTINGS_FILE)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
 
 def load_settings():
-    """Lädt die Einstellungen aus der JSON-Datei."""
-    if os.path.exists(SETTINGS_FILE):
+    """
+    Lädt die Einstellungen aus der JSON-Datei.
+    Die Datei wird nur neu gelesen, wenn sie sich geändert hat; zurückgegeben wird eine Kopie.
+    """
+    global _settings_cache
+    stamp = _settings_stamp()
+    cached = _settings_cache
+    if cached is not None and cached[0] == stamp:
+        return dict(cached[1])
+
+    if stamp is not None:
         with open(SETTINGS_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    return {
-        "streaming_api_key": "",
-        "ai_provider": "openai",  # Default zu OpenAI
-        "openai_api_key": "",
-        "gemini_api_key": "",
-        "language": "en"  # Standard: Englisch
-    }
+            settings = json.load(f)
+    else:
+        settings = {
+            "streaming_api_key": "",
+            "ai_provider": "openai",  # Default zu OpenAI
+            "openai_api_key": "",
+            "gemini_api_key": "",
+            "language": "en",  # Standard: Englisch
+            "storage_backend": "json"  # 'json' oder 'sqlite'
+        }
+    _settings_cache = (stamp, settings)
+    return dict(settings)
+
+# Monatliches Limit für externe API-Aufrufe
+API_USAGE_LIMIT = 1000
+api_usage_counter = ApiUsageCounter(
+    API_USAGE_FILE,
+    limit=API_USAGE_LIMIT,
+    initial=load_settings()  # Übernimmt beim ersten Start api_usage_count aus settings.json
+)
+
+# Gemeinsamer HTTP-Client für alle Anbieter (Keep-Alive pro Host, Timeouts, Wiederholungen mit Backoff)
+http_client = HttpClient(
+    timeout=(load_settings().get("http_connect_timeout", 5), load_settings().get("http_read_timeout", 20)),
+    max_retries=load_settings().get("http_max_retries", 3)
+)
+
+# Ratenbegrenzung pro Anbieter (Anfragen pro Sekunde), greift vor allem bei parallelen Importen
+streaming_rate_limiter = TokenBucket(load_settings().get("streaming_rate_limit", 10))
+
+# Gleichzeitige Anfragen mit demselben Cache-Schlüssel zu einem API-Aufruf bündeln
+movie_api_flight = SingleFlight()
+games_api_flight = SingleFlight()
+
+# Hintergrund-Jobs für Importe (Fortschritt über /api/jobs/<id>)
+job_manager = JobManager(workers=load_settings().get("import_workers", 2))
+
+# API-Caches: Einträge sind 7 Tage gültig (604800 Sekunden), die Größe ist über die Einstellungen begrenzt
+API_CACHE_TTL = 604800
+movie_api_cache = ApiCache(
+    MOVIE_API_CACHE_FILE,
+    ttl=API_CACHE_TTL,
+    max_entries=load_settings().get("api_cache_max_entries", 5000)
+)
+
+# Cache für KI-Antworten (Schlüssel: Hash aus Anbieter, Modell, Parametern und Prompt),
+# damit gleiche Fragen bzw. unveränderte Vorschlagsanfragen nicht erneut das LLM abwarten
+ai_response_cache = ApiCache(
+    AI_RESPONSE_CACHE_FILE,
+    ttl=load_settings().get("ai_cache_ttl", 86400),
+    max_entries=load_settings().get("ai_cache_max_entries", 500)
+)
+
 LANGUAGE_TRANSLATIONS_FILE = os.path.join(BASE_DIR, 'language_translations.json')
 
 def load_translations():
@@ -100,9 +278,12 @@ def get_translations():
     translations = load_translations()
     return jsonify(translations)
 def save_settings(settings):
-    """Speichert die Einstellungen in der JSON-Datei."""
-    with open(SETTINGS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(settings, f, ensure_ascii=False, indent=4)
+    """Speichert die Einstellungen in der JSON-Datei und aktualisiert den Einstellungs-Cache."""
+    global _settings_cache
+    with _settings_lock:
+        with open(SETTINGS_FILE, 'w', encoding='utf-8') as f:
+            json.dump(settings, f, ensure_ascii=False, indent=4)
+        _settings_cache = (_settings_stamp(), dict(settings))
 
 @app.route('/api/movies/search', methods=['GET'])
 def search_movie():
@@ -126,85 +307,61 @@ def search_movie():
 
     return jsonify(movie_data)
 
-def get_ai_answer(message):
-    """Holt eine Antwort vom ausgewählten KI-Anbieter."""
-    settings = load_settings()
+# Ein langlebiger Client pro KI-Anbieter und API-Schlüssel ("ai_provider": "openai", "gemini" oder "fake")
+ai_clients = AiClientPool()
 
-    if settings["ai_provider"] == "gemini":
-        return get_gemini_answer(message, settings["gemini_api_key"])
-    else:  # Default zu OpenAI
-        return get_openai_answer(message, settings["openai_api_key"])
-
-def get_gemini_answer(message, api_key):
-    """Holt eine Antwort von Gemini KI."""
-    if not api_key:
-        return "Kein Gemini API-Schlüssel vorhanden. Bitte richten Sie Ihren API-Schlüssel in den Einstellungen ein."
+def ai_cache_key(provider, model, params, message):
+    """Hash aus Anbieter, Modell, Parametern und normalisiertem Prompt (Leerraum zusammengefasst)."""
+    prompt = ' '.join(message.split())
+    payload = json.dumps([provider, model, params, prompt], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
 
-    try:
-        # API-Schlüssel für Gemini setzen
-        genai.configure(api_key=api_key)
-
-        client = genai.Client()
-
-        model = "gemini-2.0-flash"
-        contents = [
-            types.Content(
-                role="user",
-                parts=[
-                    types.Part.from_text(
-                        text=message
-                    ),
-                ],
-            ),
-        ]
-        generate_content_config = types.GenerateContentConfig(
-            temperature=1,
-            top_p=0.95,
-            top_k=40,
-            max_output_tokens=8192,
-            response_mime_type="text/plain",
-        )
-
-        response = client.generate_content(
-            model=model,
-            contents=contents,
-            generation_config=generate_content_config,
-        )
-
-        return response.text
-    except Exception as e:
-        return f"Fehler bei der Verwendung der Gemini API: {str(e)}"
-
-def get_openai_answer(message, api_key):
-    """Holt eine Antwort von OpenAI."""
-    if not api_key:
-        return "Kein OpenAI API-Schlüssel vorhanden. Bitte richten Sie Ihren API-Schlüssel in den Einstellungen ein."
+def cached_ai_answer(provider, model, params, message, fetch, bypass_cache=False):
+    """
+    Gibt die gecachte Antwort zurück oder ruft fetch() auf und cacht deren Ergebnis.
+    Mit bypass_cache wird immer neu gefragt (das Ergebnis ersetzt den Cache-Eintrag).
+    Fehler von fetch() werden nicht gecacht.
+    """
+    key = ai_cache_key(provider, model, params, message)
+    if not bypass_cache:
+        cached = ai_response_cache.get(key)
+        if cached is not None:
+            print(f"Verwende gecachte KI-Antwort ({provider})")
+            return cached
+    answer = fetch()
+    if answer:
+        ai_response_cache.set(key, answer)
+    return answer
+
+def get_ai_provider():
+    """Gibt (Anbieter, None) zurück oder (None, Hinweis), wenn kein API-Schlüssel eingerichtet ist."""
+    settings = load_settings()
+    name = settings.get("ai_provider", "openai")
+    if name not in ai_clients.providers:
+        name = "openai"  # Default zu OpenAI
+    api_key = settings.get(f"{name}_api_key", "")
+    if name != "fake" and not api_key:
+        label = ai_clients.providers[name].label
+        return None, f"Kein {label} API-Schlüssel vorhanden. Bitte richten Sie Ihren API-Schlüssel in den Einstellungen ein."
+    return ai_clients.get(name, api_key), None
+
+def get_ai_answer(message, bypass_cache=False):
+    """Holt eine Antwort vom ausgewählten KI-Anbieter (aus dem Cache, außer bei bypass_cache)."""
+    provider, error = get_ai_provider()
+    if error:
+        return error
 
     try:
-        client = OpenAI(api_key=api_key)
-
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "Du bist ein hilfreicher Assistent."},
-                {"role": "user", "content": message}
-            ],
-            response_format={"type": "text"},
-            temperature=1,
-            max_tokens=2048,
-            top_p=1,
-            frequency_penalty=0,
-            presence_penalty=0
-        )
-
-        return response.choices[0].message.content
+        return cached_ai_answer(provider.name, provider.model, provider.params, message,
+                                lambda: provider.complete(message), bypass_cache)
     except Exception as e:
-        return f"Fehler bei der Verwendung der OpenAI API: {str(e)}"
+        return f"Fehler bei der Verwendung der {provider.label} API: {str(e)}"
 
-def search_movie_api(title, country="DE"):
+def search_movie_api(title, country="DE", job=None):
     """
     Sucht nach einem Film über die Streaming-Verfügbarkeits-API.
     Gibt die API-Antwort zurück oder None, wenn nichts gefunden wurde.
+    Ist 'job' gesetzt, werden Cache-Treffer und API-Aufrufe dort mitgezählt.
     """
     # API-Schlüssel aus den Einstellungen holen
     settings = load_settings()
@@ -213,24 +370,36 @@ def search_movie_api(title, country="DE"):
     # Titel für das Caching normalisieren
     normalized_title = title.lower().strip()
 
-    # Zuerst Cache prüfen
-    cache = load_api_cache()
+    # Zuerst Cache prüfen (abgelaufene Einträge liefert der Cache nicht mehr)
     cache_key = f"{normalized_title}_{country}"
+    cached = movie_api_cache.get(cache_key)
 
-    if cache_key in cache:
+    if cached is not None:
         print(f"Verwende Cache-Daten für '{title}'")
-        # Prüfe, ob der Cache veraltet ist (älter als 7 Tage)
-        cache_time = cache.get(f"{cache_key}_timestamp", 0)
-        current_time = datetime.now().timestamp()
-
-        # Cache ist 7 Tage gültig (604800 Sekunden)
-        if current_time - cache_time < 604800:
-            return cache[cache_key]
-        else:
-            print(f"Cache für '{title}' ist veraltet, wird aktualisiert...")
-
-    # Vor dem API-Aufruf prüfen, ob genügend Budget vorhanden ist
-    if not check_api_usage_limit():
+        if job:
+            job.record_cache_hit()
+        return cached
+
+    # Gleichzeitige Anfragen für denselben Titel (z.B. zwei Tabs oder Import und KI-Vorschläge)
+    # teilen sich einen API-Aufruf
+    data, shared = movie_api_flight.do(cache_key, lambda: _request_movie_api(title, country, cache_key, api_key, job))
+    if shared:
+        print(f"Verwende Ergebnis der laufenden Anfrage für '{title}'")
+        if job:
+            job.record_cache_hit()
+    return data
+
+def _request_movie_api(title, country, cache_key, api_key, job=None):
+    """Stellt die eigentliche API-Anfrage für search_movie_api() (pro Schlüssel nie parallel)."""
+    # Ein eben beendeter Aufruf für denselben Schlüssel könnte das Ergebnis schon gecacht haben
+    cached = movie_api_cache.peek(cache_key)
+    if cached is not None:
+        if job:
+            job.record_cache_hit()
+        return cached
+
+    # Vor dem API-Aufruf Budget reservieren, damit parallele Anfragen das Limit nicht überschreiten
+    if not api_usage_counter.reserve():
         print(f"API-Limit erreicht! Kann keine Anfrage für '{title}' stellen.")
         return None
 
@@ -248,18 +417,21 @@ def search_movie_api(title, country="DE"):
         "x-rapidapi-host": API_HOST
     }
 
+    committed = False
     try:
-        response = requests.get(url, headers=headers, params=querystring)
+        streaming_rate_limiter.acquire()
+        response = http_client.get(url, provider='streaming_availability', headers=headers, params=querystring)
         if response.status_code == 200:
             data = response.json()
             print(data)
-            # API-Nutzungszähler erhöhen
-            increment_api_usage()
-
-            # Ergebnis mit Zeitstempel cachen
-            cache[cache_key] = data
-            cache[f"{cache_key}_timestamp"] = datetime.now().timestamp()
-            save_api_cache(cache)
+            # Reservierten API-Aufruf verbuchen
+            api_usage_counter.commit()
+            committed = True
+            if job:
+                job.record_api_call()
+
+            # Ergebnis cachen
+            movie_api_cache.set(cache_key, data)
             return data
         else:
             print(f"API-Fehler: {response.status_code} - {response.text}")
@@ -267,48 +439,52 @@ def search_movie_api(title, country="DE"):
     except Exception as e:
         print(f"Fehler beim Aufrufen der API: {str(e)}")
         return None
+    finally:
+        if not committed:
+            api_usage_counter.release()
 def get_api_usage():
-    """Holt die aktuelle API-Nutzungszahl aus settings.json."""
-    settings = load_settings()
-
-    # Prüfen, ob ein neuer Monat begonnen hat und ggf. zurücksetzen
-    last_reset_month = settings.get("last_reset_month", "")
-    current_month = datetime.now().strftime("%Y-%m")
-
-    if last_reset_month != current_month:
-        settings["api_usage_count"] = 0
-        settings["last_reset_month"] = current_month
-        save_settings(settings)
-        return 0
-
-    return settings.get("api_usage_count", 0)
+    """Gibt die aktuelle API-Nutzungszahl dieses Monats zurück."""
+    return api_usage_counter.count()
 
 def increment_api_usage():
-    """Erhöht den API-Nutzungszähler in settings.json."""
-    settings = load_settings()
-    current_count = settings.get("api_usage_count", 0)
-    settings["api_usage_count"] = current_count + 1
-    settings["last_reset_month"] = datetime.now().strftime("%Y-%m")
-    save_settings(settings)
-    return current_count + 1
+    """Erhöht den API-Nutzungszähler (wird gesammelt auf die Platte geschrieben)."""
+    api_usage_counter.increment()
+    return api_usage_counter.count()
 
 def check_api_usage_limit(needed_calls=1):
     """
     Prüft, ob genügend API-Budget für die benötigten Aufrufe übrig ist.
     Gibt True zurück, wenn genügend Budget vorhanden ist, sonst False.
     """
-    current_count = get_api_usage()
-    return current_count + needed_calls <= 1000  # Monatliches Limit
+    return api_usage_counter.remaining() >= needed_calls
 
 @app.route('/api/api_usage', methods=['GET'])
 def get_api_usage_endpoint():
-    """Gibt die aktuellen API-Nutzungsstatistiken zurück."""
-    current_count = get_api_usage()
+    """Gibt die aktuellen API-Nutzungsstatistiken zurück (direkt aus dem laufenden Zähler)."""
+    usage = api_usage_counter.stats()
+    current_count = usage["usage_count"]
 
     return jsonify({
         "usage_count": current_count,
-        "limit": 1000,
-        "percentage": (current_count / 1000) * 100
+        "reserved": usage["reserved"],
+        "limit": API_USAGE_LIMIT,
+        "percentage": (current_count / API_USAGE_LIMIT) * 100,
+        "caches": {
+            "movie_api": movie_api_cache.stats(),
+            "games_api": games_api_cache.stats(),
+            "spotify_search": spotify_client.search_cache.stats(),
+            "spotify_artists": spotify_client.artist_cache.stats(),
+            # Trefferquote der KI-Antworten (gleiche Frage bzw. unveränderte Vorschlagsanfrage)
+            "ai_responses": ai_response_cache.stats()
+        },
+        # Durch gebündelte gleichzeitige Anfragen eingesparte Aufrufe ('shared')
+        "single_flight": {
+            "movie_api": movie_api_flight.stats(),
+            "games_api": games_api_flight.stats(),
+            "spotify_search": spotify_client.search_flight.stats()
+        },
+        # Latenzen, Wiederholungen und Fehler pro Anbieter
+        "http": http_client.stats()
     })
 def process_api_response(api_response):
     """Extrahiert relevante Informationen aus der API-Antwort."""
@@ -440,152 +616,58 @@ def process_api_response(api_response):
         print(f"API-Antwort (gekürzt): {str(api_response)[:500]}...")
         return None
 
-def analyze_netflix_history(file_path):
-    """
-    Analysiert Netflix-Verlaufsdaten, unterscheidet zwischen Filmen und Serien
-    und gruppiert Serien nach Staffeln.
-
-    Args:
-        file_path (str): Pfad zur Netflix-Verlaufsdatei (CSV)
-
-    Returns:
-        dict: Ein Dictionary mit Listen für 'movies' und 'series'
-    """
-    # CSV-Datei einlesen
-    df = pd.read_csv(file_path)
-    titles = df['Title'].tolist()
-
-    # Präfix-Gruppen erstellen (alles vor dem ersten Doppelpunkt)
-    prefix_groups = defaultdict(list)
-    for title in titles:
-        if ':' in title:
-            prefix = title.split(':', 1)[0].strip()
-            prefix_groups[prefix].append(title)
-        else:
-            prefix_groups[title].append(title)
-
-    # Identifiziere Serien anhand von Gruppenmerkmalen
-    series_dict = {}  # {name: set_of_seasons}
-    movies = []       # Liste der Filme
-
-    for prefix, group_titles in prefix_groups.items():
-        # Analysiere Gruppenmerkmale
-        group_size = len(group_titles)
-
-        # Merkmale für Serienerkennung
-        has_multiple_colons = any(title.count(':') >= 2 for title in group_titles)
-        has_season_pattern = any(re.search(r'(?:Staffel|Season)\s*\d+', title, re.IGNORECASE) for title in group_titles)
-        has_episode_pattern = any(re.search(r'S\d+E\d+', title, re.IGNORECASE) for title in group_titles)
-        has_miniserie = any('miniserie' in title.lower() for title in group_titles)
-        has_folge = any(re.search(r'(?:Folge|Episode|Kapitel)\s*\d+', title, re.IGNORECASE) for title in group_titles)
-
-        # Extrahiere Staffelinformationen
-        seasons = set()
-        for title in group_titles:
-            # Verschiedene Staffelmuster prüfen
-            match = re.search(r'(?:Staffel|Season)\s*(\d+)', title, re.IGNORECASE)
-            if match:
-                seasons.add(match.group(1))
-                continue
-
-            match = re.search(r'S(\d+)E\d+', title, re.IGNORECASE)
-            if match:
-                seasons.add(match.group(1))
-                continue
-
-        # REGEL 1: Gruppen mit 3+ Titeln sind fast immer Serien
-        if group_size >= 3:
-            is_series = True
-
-        # REGEL 2: Gruppen mit 2 Titeln und Serien-Strukturen sind Serien
-        elif group_size == 2 and (has_multiple_colons or has_season_pattern or
-                                 has_episode_pattern or has_miniserie or has_folge):
-            is_series = True
-
-        # REGEL 3: Einzeltitel mit Staffel- oder Episoden-Mustern sind Serien
-        elif group_size == 1 and (has_season_pattern or has_episode_pattern or
-                                 has_miniserie or has_folge):
-            is_series = True
-
-        # REGEL 4: Komplexe Titelstrukturen mit mehreren Doppelpunkten sind Serien
-        elif has_multiple_colons:
-            is_series = True
-
-        # REGEL 5: Gemeinsames Format in Titeln deutet auf Episoden hin
-        elif group_size >= 2:
-            # Prüfe, ob alle Titel nach dem Doppelpunkt ein ähnliches Format haben
-            if all(':' in title for title in group_titles):
-                # Extrahiere die Teile nach dem ersten Doppelpunkt
-                suffixes = [title.split(':', 1)[1].strip() for title in group_titles]
-
-                # Wenn alle Suffixe unterschiedlich sind und ähnliche Länge haben,
-                # handelt es sich wahrscheinlich um Episodentitel
-                if len(set(suffixes)) == len(suffixes) and \
-                   max(len(s) for s in suffixes) - min(len(s) for s in suffixes) < 20:
-                    is_series = True
-                else:
-                    is_series = False
-            else:
-                is_series = False
-        else:
-            # Standardfall: Ein Einzeltitel ohne Serienmerkmale ist ein Film
-            is_series = False
-
-        # Verarbeite das Ergebnis
-        if is_series:
-            # Wenn keine Staffeln erkannt wurden, setze Staffel 1 als Standard
-            if not seasons:
-                seasons.add('1')
-
-            series_dict[prefix] = seasons
-        else:
-            # Hinzufügen zu den Filmen
-            movies.extend(group_titles)
-
-    # Nachbearbeitung: Erkenne übersehene Episoden basierend auf Titelstruktur
-    for title in titles:
-        # Prüfe, ob dieser Titel bereits klassifiziert wurde
-        if any(title.startswith(prefix + ':') for prefix in series_dict.keys()):
-            # Bereits implizit als Teil einer Serie klassifiziert
-            if title in movies:
-                movies.remove(title)
-            continue
-
-        if ':' in title and title.count(':') >= 2:
-            # Komplexe Titel mit mehreren Doppelpunkten sind fast immer Serien
-            prefix = title.split(':', 1)[0].strip()
-            if prefix not in series_dict:
-                series_dict[prefix] = {'1'}
-
-            # Entferne den Titel aus der Filmliste, falls er dort ist
-            if title in movies:
-                movies.remove(title)
-
-    # Entferne Duplikate und sortiere
-    final_movies = sorted(list(set(movies)))
-
-    # Bereite die Serienausgabe vor
-    series_list = []
-    for name, seasons in sorted(series_dict.items()):
-        seasons_sorted = sorted(seasons, key=lambda x: int(x))
-        seasons_str = ', '.join(seasons_sorted)
-        series_list.append(f"{name} (Staffel {seasons_str})")
-
-    return_dict = {
-        'movies': final_movies,
-        'series': series_list
-    }
-    print(return_dict)
-    return return_dict
-
 @app.route('/')
 def index():
     return render_template('index.html')
 
+def query_collection(collection):
+    """
+    Beantwortet eine gefilterte, sortierte und paginierte Abfrage einer Sammlung.
+    Unterstützt limit, cursor, sort, type, genre, year_min, year_max, min_rating und q.
+    Wie bei full_collection_response steht die Version im Header X-Collection-Version,
+    damit ein seitenweise geladener Client danach per /changes?since= abgleichen kann.
+    """
+    # Version vor der Abfrage lesen (im Zweifel wird eine Änderung doppelt geliefert)
+    version = get_storage().version(collection)
+    try:
+        params = collection_query.parse_query_args(request.args)
+        result = collection_query.run_query(get_storage().query_index(collection), params)
+    except collection_query.QueryError as e:
+        return jsonify({'error': str(e)}), 400
+    response = jsonify(result)
+    response.headers['X-Collection-Version'] = str(version)
+    return response
+
+def full_collection_response(collection):
+    """
+    Gibt die komplette Sammlung zurück. Die Version im Header X-Collection-Version
+    dient als Startpunkt für die Delta-Synchronisation über /changes?since=.
+    """
+    # Version vor dem Laden lesen: im Zweifel wird eine Änderung doppelt, aber nie gar nicht geliefert
+    version = get_storage().version(collection)
+    response = jsonify(get_storage().load(collection))
+    response.headers['X-Collection-Version'] = str(version)
+    return response
+
+def collection_changes(collection):
+    """Gibt die seit ?since=<version> hinzugefügten, geänderten und gelöschten Einträge zurück."""
+    since = request.args.get('since', '')
+    try:
+        since = int(since) if since != '' else None
+    except ValueError:
+        return jsonify({'error': 'Ungültige Version'}), 400
+    return jsonify(get_storage().changes_since(collection, since))
+
 @app.route('/api/movies', methods=['GET'])
 def get_movies():
-    movies = load_movies()
-    return jsonify(movies)
+    # Ohne Query-Parameter wie bisher die komplette Liste zurückgeben
+    if not request.args:
+        return full_collection_response('movies')
+    return query_collection('movies')
+
+@app.route('/api/movies/changes', methods=['GET'])
+def get_movie_changes():
+    return collection_changes('movies')
 
 @app.route('/api/movies', methods=['POST'])
 def add_movie():
@@ -594,7 +676,10 @@ def add_movie():
     if not data or 'title' not in data:
         return jsonify({'error': 'Titel ist erforderlich'}), 400
 
-    movies = load_movies()
+    # Duplikate (gleicher normalisierter Titel, imdbId oder tmdbId) vor dem API-Aufruf erkennen;
+    # mit "allowDuplicate" lässt sich der Eintrag trotzdem anlegen (z.B. für Remakes)
+    if not data.pop('allowDuplicate', False) and title_index('movies').contains_item(data):
+        return jsonify({'error': 'Titel ist bereits in der Sammlung', 'duplicate': True}), 409
 
     # Wenn API verwendet wird, Filminformationen abrufen
     if data.get('useApi', False):
@@ -608,58 +693,64 @@ def add_movie():
                     data[key] = value
 
     # Eindeutige ID und Zeitstempel hinzufügen
-    data['id'] = datetime.now().timestamp()
+    data['id'] = storage.new_item_id()
     data['createdAt'] = datetime.now().isoformat()
 
-    movies.append(data)
-    save_movies(movies)
+    movie = get_storage().insert('movies', data)
 
-    return jsonify(data), 201
+    return jsonify(movie), 201
+
+@app.route('/api/movies/<movie_id>', methods=['GET'])
+def get_movie(movie_id):
+    movie = get_storage().get('movies', movie_id)
+
+    if movie is None:
+        return jsonify({'error': 'Film nicht gefunden'}), 404
+
+    return jsonify(movie)
 
 @app.route('/api/movies/<movie_id>', methods=['PUT'])
 def update_movie(movie_id):
     data = request.json
-    movies = load_movies()
+    movie = get_storage().get('movies', movie_id)
 
-    for i, movie in enumerate(movies):
-        if str(movie.get('id')) == movie_id:
-            # Wenn API verwendet wird und der Titel geändert wurde, Filminformationen neu abrufen
-            if data.get('useApi', False) and data.get('title') != movie.get('title'):
-                api_response = search_movie_api(data['title'])
-                api_data = process_api_response(api_response)
+    if movie is None:
+        return jsonify({'error': 'Film nicht gefunden'}), 404
 
-                if api_data:
-                    # API-Daten mit Benutzereingaben zusammenführen, wobei Benutzereingaben Vorrang haben
-                    for key, value in api_data.items():
-                        if key not in data or not data[key]:
-                            data[key] = value
+    # Wenn API verwendet wird und der Titel geändert wurde, Filminformationen neu abrufen
+    if data.get('useApi', False) and data.get('title') != movie.get('title'):
+        api_response = search_movie_api(data['title'])
+        api_data = process_api_response(api_response)
 
-            # Filmdaten aktualisieren
-            for key, value in data.items():
-                movie[key] = value
+        if api_data:
+            # API-Daten mit Benutzereingaben zusammenführen, wobei Benutzereingaben Vorrang haben
+            for key, value in api_data.items():
+                if key not in data or not data[key]:
+                    data[key] = value
 
-            movie['updatedAt'] = datetime.now().isoformat()
-            movies[i] = movie
-            save_movies(movies)
+    # Filmdaten aktualisieren (die ID bleibt unverändert)
+    for key, value in data.items():
+        if key in ('id', 'legacyId'):
+            continue
+        movie[key] = value
 
-            return jsonify(movie)
+    movie['updatedAt'] = datetime.now().isoformat()
+    get_storage().update('movies', movie_id, movie)
 
-    return jsonify({'error': 'Film nicht gefunden'}), 404
+    return jsonify(movie)
 
 @app.route('/api/movies/<movie_id>', methods=['DELETE'])
 def delete_movie(movie_id):
-    movies = load_movies()
+    deleted_movie = get_storage().delete('movies', movie_id)
 
-    for i, movie in enumerate(movies):
-        if str(movie.get('id')) == movie_id:
-            deleted_movie = movies.pop(i)
-            save_movies(movies)
-            return jsonify(deleted_movie)
+    if deleted_movie is None:
+        return jsonify({'error': 'Film nicht gefunden'}), 404
 
-    return jsonify({'error': 'Film nicht gefunden'}), 404
+    return jsonify(deleted_movie)
 
 @app.route('/api/import/netflix', methods=['POST'])
 def import_netflix():
+    """Startet den Netflix-Import als Hintergrund-Job und gibt sofort die Job-ID zurück."""
     if 'file' not in request.files:
         return jsonify({'error': 'Keine Datei vorhanden'}), 400
 
@@ -669,128 +760,129 @@ def import_netflix():
         return jsonify({'error': 'Keine Datei ausgewählt'}), 400
 
     if file:
-        # Hochgeladene Datei temporär speichern
-        file_path = os.path.join(os.path.dirname(__file__), 'temp_netflix.csv')
+        # Hochgeladene Datei temporär speichern (eindeutiger Name, da mehrere Importe gleichzeitig laufen können)
+        file_path = os.path.join(BASE_DIR, f'temp_netflix_{uuid.uuid4().hex}.csv')
         file.save(file_path)
 
-        try:
-            # Datei verarbeiten
-            result = analyze_netflix_history(file_path)
-            needed_calls = len(result['movies']) + len(result['series'])
-
-            # Prüfen, ob genügend API-Budget vorhanden ist
-            if not check_api_usage_limit(needed_calls):
-                os.remove(file_path)  # Aufräumen
-                return jsonify({
-                    'error': 'API-Limit erreicht. Bitte versuchen Sie es im nächsten Monat erneut oder verwenden Sie manuelle Eingabe.'
-                })
-            # Jeden Filmtitel verarbeiten
-            movies = load_movies()
-            print(movies)
-            imported_count = 0
-            skipped_count = 0
-
-            # Verarbeite Filme
-            for title in result['movies']:
-                # Prüfen, ob Film bereits existiert
-                print(title)
-                if any(m.get('title') == title for m in movies):
-                    skipped_count += 1
-                    continue
-
-                # Versuche, Informationen über die API zu erhalten
-                api_response = search_movie_api(title)
-                api_data = process_api_response(api_response)
+        job = job_manager.submit('netflix', run_netflix_import, file_path)
+        return jsonify({'success': True, 'job_id': job.id}), 202
 
-                if api_data:
-                    # Zusätzliche Felder hinzufügen
-                    api_data['id'] = datetime.now().timestamp() + imported_count
-                    api_data['createdAt'] = datetime.now().isoformat()
-                    api_data['source'] = 'netflix_import'
+    return jsonify({'error': 'Ungültige Datei'}), 400
 
-                    movies.append(api_data)
-                    imported_count += 1
-                else:
-                    # Grundeintrag hinzufügen, wenn API-Daten nicht verfügbar sind
-                    movies.append({
-                        'title': title,
-                        'id': datetime.now().timestamp() + imported_count,
-                        'createdAt': datetime.now().isoformat(),
-                        'source': 'netflix_import',
-                        'rating': 0,
-                        'type': 'movie'  # Explizit als Film kennzeichnen
-                    })
-                    imported_count += 1
+def run_netflix_import(job, file_path):
+    """Führt den Netflix-Import im Hintergrund aus (wird vom JobManager aufgerufen)."""
+    try:
+        # Datei verarbeiten
+        result = analyze_netflix_history(file_path)
+    finally:
+        # Aufräumen
+        if os.path.exists(file_path):
+            os.remove(file_path)
 
-                # Kleine Verzögerung, um API-Ratenlimits zu vermeiden
-                time.sleep(0.05)
+    job.set_total(len(result['movies']) + len(result['series']))
 
-            # Verarbeite Serien
-            for series_title in result['series']:
-                # Prüfen, ob Serie bereits existiert
-                print(series_title)
-                if any(m.get('title') == series_title for m in movies):
-                    skipped_count += 1
-                    continue
+    # Bereits vorhandene Titel überspringen (normalisierter Titel-Index, O(1) pro Titel)
+    existing = title_index('movies')
+    seen_keys = set()
 
-                # Bereinigen des Serientitels für die API-Anfrage
-                # z.B. "Serienname (Staffel 1, 2)" zu "Serienname"
-                clean_title = series_title
-                if '(' in series_title:
-                    clean_title = series_title.split('(')[0].strip()
-
-                # Versuche, Informationen über die API zu erhalten
-                api_response = search_movie_api(clean_title)
-                api_data = process_api_response(api_response)
-
-                if api_data:
-                    # Zusätzliche Felder hinzufügen
-                    api_data['id'] = datetime.now().timestamp() + imported_count
-                    api_data['createdAt'] = datetime.now().isoformat()
-                    api_data['source'] = 'netflix_import'
-                    api_data['title'] = series_title  # Vollständigen Titel mit Staffelinfos beibehalten
-                    api_data['type'] = 'series'  # Sicherstellen, dass es als Serie markiert ist
-
-                    movies.append(api_data)
-                    imported_count += 1
-                else:
-                    # Grundeintrag hinzufügen, wenn API-Daten nicht verfügbar sind
-                    movies.append({
-                        'title': series_title,
-                        'id': datetime.now().timestamp() + imported_count,
-                        'createdAt': datetime.now().isoformat(),
-                        'source': 'netflix_import',
-                        'rating': 0,
-                        'type': 'series'  # Explizit als Serie kennzeichnen
-                    })
-                    imported_count += 1
+    # Abfragen in fester Reihenfolge sammeln: erst Filme, dann Serien
+    tasks = []  # (Titel, Suchbegriff, Typ)
+    for title in result['movies']:
+        key = title_key(title)
+        if key in existing or key in seen_keys:
+            job.advance(skipped=1)
+            continue
+        seen_keys.add(key)
+        tasks.append((title, title, 'movie'))
+
+    for series_title in result['series']:
+        # "Serienname (Staffel 1, 2)" wird ohne Staffel-Zusatz verglichen
+        key = title_key(series_title)
+        if key in existing or key in seen_keys:
+            job.advance(skipped=1)
+            continue
+        seen_keys.add(key)
+
+        # Bereinigen des Serientitels für die API-Anfrage
+        # z.B. "Serienname (Staffel 1, 2)" zu "Serienname"
+        clean_title = series_title
+        if '(' in series_title:
+            clean_title = series_title.split('(')[0].strip()
+        tasks.append((series_title, clean_title, 'series'))
+
+    # Prüfen, ob genügend API-Budget vorhanden ist
+    if not check_api_usage_limit(len(tasks)):
+        raise RuntimeError('API-Limit erreicht. Bitte versuchen Sie es im nächsten Monat erneut oder verwenden Sie manuelle Eingabe.')
+
+    # API-Abfragen parallel ausführen. Die Ratenbegrenzung pro Anbieter und die
+    # Budget-Reservierung übernimmt search_movie_api() selbst.
+    def lookup(task):
+        if job.cancelled:
+            return None
+        api_data = process_api_response(search_movie_api(task[1], job=job))
+        job.advance()
+        return api_data
 
-                # Kleine Verzögerung, um API-Ratenlimits zu vermeiden
-                time.sleep(0.05)
+    api_results = map_in_order(lookup, tasks, max_workers=load_settings().get("enrichment_workers", 8))
 
-            # Aktualisierte Filme speichern
-            save_movies(movies)
+    # Bei Abbruch nichts speichern; bereits abgefragte Titel liegen im API-Cache
+    job.check_cancelled()
 
-            # Aufräumen
-            os.remove(file_path)
-
-            return jsonify({
-                'success': True,
-                'imported': imported_count,
-                'skipped': skipped_count,
-                'movies': result['movies'],
-                'series': result['series']
+    # Ergebnisse in der ursprünglichen Reihenfolge übernehmen
+    new_movies = []
+    seen_ids = set()
+    for (title, _, content_type), api_data in zip(tasks, api_results):
+        if api_data:
+            # Unterschiedliche Titel können auf denselben Eintrag verweisen (gleiche imdbId/tmdbId)
+            id_keys = [key for key in item_keys('movies', api_data) if not key.startswith('title:')]
+            if any(key in existing or key in seen_ids for key in id_keys):
+                job.advance(skipped=1, processed=0)
+                continue
+            seen_ids.update(id_keys)
+
+            # Zusätzliche Felder hinzufügen
+            api_data['id'] = storage.new_item_id()
+            api_data['createdAt'] = datetime.now().isoformat()
+            api_data['source'] = 'netflix_import'
+            if content_type == 'series':
+                api_data['title'] = title  # Vollständigen Titel mit Staffelinfos beibehalten
+                api_data['type'] = 'series'  # Sicherstellen, dass es als Serie markiert ist
+            new_movies.append(api_data)
+        else:
+            # Grundeintrag hinzufügen, wenn API-Daten nicht verfügbar sind
+            new_movies.append({
+                'title': title,
+                'id': storage.new_item_id(),
+                'createdAt': datetime.now().isoformat(),
+                'source': 'netflix_import',
+                'rating': 0,
+                'type': content_type  # Explizit als Film bzw. Serie kennzeichnen
             })
+        job.advance(imported=1, processed=0)
 
-        except Exception as e:
-            # Aufräumen im Fehlerfall
-            if os.path.exists(file_path):
-                os.remove(file_path)
+    # Nur die neuen Filme speichern
+    get_storage().insert_many('movies', new_movies)
 
-            print(f"Fehler beim Importieren des Netflix-Verlaufs: {str(e)}")
-            return jsonify({'error': str(e)}), 500
+    return {
+        'movies': result['movies'],
+        'series': result['series']
+    }
 
-    return jsonify({'error': 'Ungültige Datei'}), 400
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Fortschritt eines Hintergrund-Jobs (verarbeitet, importiert, übersprungen, API-Aufrufe, Cache-Treffer, ETA)."""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job.to_dict())
+
+@app.route('/api/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    """Bricht einen laufenden oder wartenden Job ab. Bereits importierte Daten werden nicht gespeichert."""
+    job = job_manager.cancel(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job.to_dict())
 
 @app.route('/api/settings', methods=['GET', 'POST'])
 def handle_settings():
@@ -822,6 +914,130 @@ def handle_settings():
         except Exception as e:
             return jsonify({"success": False, "message": f"Fehler beim Laden der Einstellungen: {str(e)}"}), 500
         
+# Anteil (in Prozent), der bei KI-Vorschlägen zusätzlich angefragt wird, und Anzahl der Anfragen
+# an die KI insgesamt (erste Anfrage plus Nachforderungen, falls zu viele Titel schon vorhanden sind)
+SUGGESTION_OVERREQUEST_PERCENT = 50
+MAX_SUGGESTION_ROUNDS = 2
+
+# Prompt-Budget: Genres mit Bewertung im Prompt, Reserve für den zusammenfassenden Satz
+# und Standardbudget (Einstellung "suggestion_prompt_token_budget")
+GENRE_PROMPT_LIMIT = 12
+EXCLUSION_SUMMARY_TOKENS = 40
+SUGGESTION_PROMPT_TOKEN_BUDGET = 1500
+
+_suggestion_profiles = {}  # (Sammlung, Auswahlmodus) -> (Snapshot, Profil)
+
+def suggestion_profile(collection, selection_mode):
+    """
+    Vorberechnete Teile des Vorschlags-Prompts: Genre-Bewertungen, kompakte Genre-Liste,
+    Lieblings-Titel und die nach Relevanz sortierte Ausschlussliste. Genres, Favoriten und
+    Ausschlüsse kommen aus dem inkrementell nachgeführten Geschmacksprofil; das Ergebnis
+    wird pro Snapshot gecacht.
+    """
+    items = get_storage().snapshot(collection)
+    key = (collection, selection_mode)
+    cached = _suggestion_profiles.get(key)
+    if cached is not None and cached[0] is items:
+        return cached[1]
+
+    # Genres basierend auf Auswahlmodus (alle oder nur bewertete Titel)
+    taste = taste_profile(collection)
+    rated_only = selection_mode == 'rated'
+    genre_ratings = taste.genre_ratings(rated_only=rated_only)
+    profile = {
+        'genre_ratings': genre_ratings,
+        'genre_text': format_genre_preferences(genre_ratings) if genre_ratings else None,
+        # Top 10 Lieblings-Titel nach Benutzerbewertung
+        'favorites': taste.favorites(10),
+        'exclusions': taste.exclusions(rated_only=rated_only)
+    }
+    _suggestion_profiles[key] = (items, profile)
+    return profile
+
+_local_catalogs = {}  # Sammlung -> (Cache-Version, Katalog-Einträge, Merkmale)
+_local_catalog_lock = Lock()
+
+# Pro Sammlung: API-Cache, Aufbereitung einer API-Antwort, Merkmale und Qualität für den lokalen Empfehler
+LOCAL_RECOMMENDER_SOURCES = {
+    'movies': (lambda: movie_api_cache, lambda: process_api_response, recommender.movie_features, recommender.movie_quality),
+    'games': (lambda: games_api_cache, lambda: process_game_api_response, recommender.game_features, recommender.game_quality)
+}
+
+def local_catalog(collection):
+    """
+    Katalog für den lokalen Empfehler: alle Treffer aus dem API-Cache der Sammlung,
+    aufbereitet wie bei einer Suche, samt vorberechneter Merkmale. Wird nur neu
+    aufgebaut, wenn sich der Cache geändert hat.
+    """
+    cache_fn, process_fn, features, _ = LOCAL_RECOMMENDER_SOURCES[collection]
+    cache = cache_fn()
+    version = cache.version()
+    cached = _local_catalogs.get(collection)
+    if cached is not None and cached[0] == version:
+        return cached[1], cached[2]
+
+    with _local_catalog_lock:
+        items = []
+        seen_keys = set()
+        process = process_fn()
+        for _, data in cache.items():
+            results = data if isinstance(data, list) else (data or {}).get('results') or []
+            for result in results:
+                item = process({'results': [result]})
+                if not item or not item.get('title'):
+                    continue
+                keys = item_keys(collection, item)
+                if any(key in seen_keys for key in keys):
+                    continue
+                seen_keys.update(keys)
+                items.append(item)
+        item_features = [features(item) for item in items]
+        _local_catalogs[collection] = (version, items, item_features)
+        return items, item_features
+
+def matches_content_type(item, content_type):
+    """Filter nach Inhaltstyp wie in der Oberfläche: movie/series bzw. PC/Console."""
+    if content_type in ('movie', 'series'):
+        return item.get('type') == content_type
+    if content_type in ('PC', 'Console'):
+        platforms = [platform.lower() for platform in item.get('platforms') or []]
+        if content_type == 'PC':
+            return any('pc' in platform or 'windows' in platform for platform in platforms)
+        return any(name in platform for platform in platforms
+                   for name in ('playstation', 'xbox', 'nintendo', 'switch'))
+    return True
+
+def get_local_suggestions(collection, selection_mode, content_type, suggestion_count, favorite_items):
+    """
+    Vorschläge ohne KI und ohne Netzwerk: Kosinus-Ähnlichkeit zwischen dem Geschmacksprofil
+    der Sammlung und den bereits gecachten API-Ergebnissen (siehe recommender.recommend()).
+    """
+    catalog, catalog_features = local_catalog(collection)
+    existing = title_index(collection)
+    candidates = []
+    candidate_features = []
+    for item, item_features in zip(catalog, catalog_features):
+        if matches_content_type(item, content_type) and not existing.contains_item(item):
+            candidates.append(item)
+            candidate_features.append(item_features)
+
+    _, _, features, quality = LOCAL_RECOMMENDER_SOURCES[collection]
+    ranked = recommender.recommend(
+        get_storage().snapshot(collection), candidates, features, quality,
+        limit=suggestion_count, rated_only=selection_mode == 'rated', catalog_features=candidate_features
+    )
+
+    return jsonify({
+        'success': True,
+        'provider': 'local',
+        'recommendations': [dict(item) for _, item in ranked],
+        'scores': [round(score, 3) for score, _ in ranked],
+        'favorites': favorite_items,
+        'catalog_size': len(catalog),
+        'prompt': None,
+        'ai_response': None
+    })
+
 @app.route('/api/ai_suggestions', methods=['POST'])
 def get_ai_suggestions():
     data = request.json
@@ -837,70 +1053,109 @@ def get_ai_suggestions():
     # Überprüfe, ob es sich um eine Spieleanfrage handelt
     is_game_request = content_type in ['PC', 'Console', 'both']
 
+    # 'ai' (LLM + API-Abfragen) oder 'local' (inhaltsbasiert über die API-Caches, ohne Netzwerk)
+    provider = data.get('provider') or load_settings().get("suggestion_provider", "ai")
+    if provider == 'local':
+        collection = 'games' if is_game_request else 'movies'
+        favorite_items = custom_favorites or suggestion_profile(collection, selection_mode)['favorites']
+        return get_local_suggestions(collection, selection_mode, content_type, suggestion_count, favorite_items)
+
     if not check_api_usage_limit(suggestion_count):
         return jsonify({
             'success': False,
             'message': 'API-Limit erreicht. Bitte versuchen Sie es im nächsten Monat erneut oder reduzieren Sie die Anzahl der Vorschläge.'
         })
 
-    if is_game_request:
-        # Für Spieleanfragen
-        all_items = load_games()
-    else:
-        # Für Filmanfragen
-        all_items = load_movies()
-
-    # Titel basierend auf Auswahlmodus filtern
-    if selection_mode == 'rated':
-        selected_items = [item for item in all_items if item.get('rating', 0) > 0]
-    else:
-        selected_items = all_items
+    collection = 'games' if is_game_request else 'movies'
 
-    # Genres und Bewertungen analysieren
-    genre_ratings = analyze_genre_ratings(selected_items)
+    # Genres, Favoriten und Ausschlussliste (nach Relevanz sortiert) aus dem gecachten Profil
+    profile = suggestion_profile(collection, selection_mode)
 
     # Top 10 Lieblings-Titel nach Benutzerbewertung ermitteln
     # Wenn benutzerdefinierte Favoriten übergeben wurden, verwenden wir diese
     if custom_favorites:
         favorite_items = custom_favorites
     else:
-        favorite_items = get_favorite_titles(all_items, 10)
-
-    # Bereits gesehene Titel (zum Ausschließen von Vorschlägen)
-    watched_items = [item.get('title', '') for item in all_items]
-
-    # Prompt für KI formulieren
-    prompt = formulate_suggestion_prompt(
-        genre_ratings,
-        favorite_items,
-        watched_items,
-        content_type,
-        suggestion_count,
-        description,
-        is_game_request  # Neuer Parameter, der angibt, ob es sich um eine Spieleanfrage handelt
-    )
-    print(prompt)
-
-    # KI-Antwort holen
-    ai_response = get_ai_answer(prompt)
-
-    # Empfehlungen aus KI-Antwort extrahieren
-    recommendations = extract_recommendations(ai_response)
-
-    # Detaillierte Informationen für jede Empfehlung holen
-    detailed_recommendations = []
-    for rec in recommendations:
+        favorite_items = profile['favorites']
+
+    token_budget = load_settings().get("suggestion_prompt_token_budget", SUGGESTION_PROMPT_TOKEN_BUDGET)
+    existing = title_index(collection)
+    seen_keys = set()       # Normalisierte Titel aller bisher von der KI genannten Vorschläge
+    accepted_keys = set()   # Titel und IDs der angenommenen Vorschläge
+    suggested_titles = []   # Für die Nachforderung: diese Titel nicht erneut vorschlagen
+
+    def fresh_candidates(recommendations):
+        """Entfernt Titel aus der Sammlung und Duplikate der Antwort, bevor API-Aufrufe anfallen."""
+        fresh = []
+        for rec in recommendations:
+            key = title_key(rec)
+            if key is None or key in seen_keys:
+                continue
+            seen_keys.add(key)
+            suggested_titles.append(rec)
+            if key not in existing:
+                fresh.append(rec)
+        return fresh
+
+    # Details zu den Empfehlungen parallel holen; die Reihenfolge der KI bleibt erhalten.
+    # Budget-Reservierung und Ratenbegrenzung übernehmen search_game_api()/search_movie_api() pro Aufruf.
+    def enrich(rec):
         if is_game_request:
             # Für Spieleanfragen
-            api_response = search_game_api(rec)
-            processed_data = process_game_api_response(api_response)
-        else:
-            # Für Filmanfragen
-            api_response = search_movie_api(rec)
-            processed_data = process_api_response(api_response)
+            return process_game_api_response(search_game_api(rec))
+        # Für Filmanfragen
+        return process_api_response(search_movie_api(rec))
 
-        if processed_data:
-            detailed_recommendations.append(processed_data)
+    detailed_recommendations = []
+    prompt = ai_response = None
+    for suggestion_round in range(MAX_SUGGESTION_ROUNDS):
+        missing = suggestion_count - len(detailed_recommendations)
+        # Etwas mehr anfragen als benötigt, da ein Teil bereits in der Sammlung sein kann
+        request_count = missing + max(2, -(-missing * SUGGESTION_OVERREQUEST_PERCENT // 100))
+
+        # Prompt für KI formulieren (bei der Nachforderung zuerst ohne die schon genannten Titel)
+        round_prompt = formulate_suggestion_prompt(
+            profile['genre_ratings'],
+            favorite_items,
+            suggested_titles + profile['exclusions'],
+            content_type,
+            request_count,
+            description,
+            is_game_request,  # Neuer Parameter, der angibt, ob es sich um eine Spieleanfrage handelt
+            token_budget=token_budget,
+            genre_text=profile['genre_text']
+        )
+        print(round_prompt)
+
+        # KI-Antwort holen ('bypassCache' erzwingt neue Vorschläge trotz unveränderter Eingaben)
+        round_response = get_ai_answer(round_prompt, bypass_cache=data.get('bypassCache', False))
+        if prompt is None:
+            prompt, ai_response = round_prompt, round_response
+
+        # Empfehlungen extrahieren und vor der Anreicherung filtern
+        recommendations = extract_recommendations(round_response)
+        if not recommendations:
+            # Keine verwertbare Antwort (z.B. Fehler des Anbieters): nicht erneut nachfragen
+            break
+        candidates = fresh_candidates(recommendations)
+
+        # Nur so viele Kandidaten anreichern, wie noch fehlen; fällt einer aus, rücken die nächsten nach
+        while candidates and len(detailed_recommendations) < suggestion_count:
+            batch_size = suggestion_count - len(detailed_recommendations)
+            batch, candidates = candidates[:batch_size], candidates[batch_size:]
+            enriched = map_in_order(enrich, batch, max_workers=load_settings().get("enrichment_workers", 8))
+            for processed_data in enriched:
+                if not processed_data:
+                    continue
+                # Die API kann einen anderen Titel (z.B. mit Artikel) oder eine vorhandene ID liefern
+                keys = item_keys(collection, processed_data)
+                if existing.contains_item(processed_data) or any(key in accepted_keys for key in keys):
+                    continue
+                accepted_keys.update(keys)
+                detailed_recommendations.append(processed_data)
+
+        if len(detailed_recommendations) >= suggestion_count:
+            break
 
     return jsonify({
         'success': True,
@@ -910,84 +1165,30 @@ def get_ai_suggestions():
         'ai_response': ai_response  # Für Debug-Zwecke
     })
 
-def analyze_genre_ratings(titles):
-    """
-    Analysiert die Genres in den gegebenen Titeln und bewertet sie basierend auf der Anzahl der Einträge.
-    Je mehr Einträge ein Genre hat, desto höher ist seine Bewertung (0-5 Sterne).
-
-    Returns:
-        dict: Ein Dictionary der Genres mit ihren Bewertungen.
-    """
-    # Zähle Titel pro Genre
-    genre_counts = {}
-
-    for title in titles:
-        genres = title.get('genre', '').split(',')
-        for genre in genres:
-            genre = genre.strip()
-            if genre:
-                if genre not in genre_counts:
-                    genre_counts[genre] = 0
-
-                genre_counts[genre] += 1
-
-    # Wenn keine Genres gefunden wurden, leeres Dictionary zurückgeben
-    if not genre_counts:
-        return {}
-
-    # Finde die höchste Anzahl von Titeln in einem Genre
-    max_count = max(genre_counts.values()) if genre_counts else 0
-
-    # Berechne Bewertungen basierend auf der Anzahl der Einträge
-    # Normalisiere auf eine Skala von 0-5 Sternen
-    genre_ratings = {}
-    for genre, count in genre_counts.items():
-        # Wenn max_count > 0, normalisiere zu einem Wert zwischen 0 und 5
-        if max_count > 0:
-            # Lineare Normalisierung auf Skala 0-5
-            rating = round(count / max_count * 5, 1)  # Auf 1 Nachkommastelle runden
-            genre_ratings[genre] = rating
-        else:
-            genre_ratings[genre] = 0
-
-    return genre_ratings
-
-def get_favorite_titles(titles, limit=10):
-    """
-    Ermittelt die Lieblings-Titel des Benutzers basierend auf seinen Bewertungen.
-
-    Args:
-        titles (list): Liste der Titel-Dictionaries
-        limit (int): Maximale Anzahl an Favoriten
+def format_genre_preferences(genre_ratings, limit=GENRE_PROMPT_LIMIT):
+    """Kompakte Genre-Liste für den Prompt: die stärksten Genres mit Bewertung, der Rest nur gezählt."""
+    sorted_genres = sorted(genre_ratings.items(), key=lambda x: x[1], reverse=True)
+    text = ", ".join(f"{genre} ({rating}/5)" for genre, rating in sorted_genres[:limit])
+    if len(sorted_genres) > limit:
+        text += f" and {len(sorted_genres) - limit} less frequent genres"
+    return text
 
-    Returns:
-        list: Liste der Favoriten-Titel-Dictionaries mit Titel und Bewertung
-    """
-    # Titel mit Bewertung filtern
-    rated_titles = [t for t in titles if t.get('rating', 0) > 0]
-
-    # Nach Bewertung sortieren (höchste zuerst)
-    sorted_titles = sorted(rated_titles, key=lambda x: x.get('rating', 0), reverse=True)
-
-    # Top N Favoriten zurückgeben
-    favorites = []
-    for title in sorted_titles[:limit]:
-        favorites.append({
-            'title': title.get('title', ''),
-            'rating': title.get('rating', 0),
-            'id': title.get('id', ''),
-            'type': title.get('type', 'movie')
-        })
-
-    return favorites
-
-def formulate_suggestion_prompt(genre_ratings, favorite_titles, watched_titles, content_type, suggestion_count, description, is_game_request=False):
+def formulate_suggestion_prompt(genre_ratings, favorite_titles, watched_titles, content_type, suggestion_count, description,
+                                is_game_request=False, token_budget=None, genre_text=None):
     """
     Formuliert einen Prompt für die KI, um Film-/Serienempfehlungen oder Spieleempfehlungen zu generieren.
 
+    'watched_titles' sollte nach Relevanz sortiert sein (siehe TasteProfile.exclusions()):
+    Mit 'token_budget' werden nur so viele Titel ausgeschlossen, wie in das Budget passen,
+    der Rest wird zusammengefasst. 'genre_text' ist eine vorberechnete Genre-Liste
+    (sonst wird sie aus genre_ratings gebildet).
+
     Returns:
         str: Der formatierte Prompt
     """
+    if genre_ratings and genre_text is None:
+        genre_text = format_genre_preferences(genre_ratings)
+
     if is_game_request:
         prompt = "I need recommendations for "
 
@@ -1009,8 +1210,7 @@ def formulate_suggestion_prompt(genre_ratings, favorite_titles, watched_titles,
         # Genre-Präferenzen basierend auf Anzahl der Einträge
         if genre_ratings:
             prompt += "Based on my collection, I seem to prefer these genres (with ratings based on frequency out of 5): "
-            genre_items = [f"{genre} ({rating}/5)" for genre, rating in sorted(genre_ratings.items(), key=lambda x: x[1], reverse=True)]
-            prompt += ", ".join(genre_items) + ". "
+            prompt += genre_text + ". "
 
         # Lieblings-Titel
         if favorite_titles:
@@ -1023,10 +1223,7 @@ def formulate_suggestion_prompt(genre_ratings, favorite_titles, watched_titles,
                     fav_items.append(title)
             prompt += ", ".join(fav_items) + ". "
 
-        # Bereits gesehene Titel ausschließen
-        if watched_titles:
-            prompt += "Please DO NOT recommend any of these games as I've already played them: "
-            prompt += ", ".join(watched_titles) + ". "
+        exclusion_text = "Please DO NOT recommend any of these games as I've already played them: "
     else:
         # Bestehender Code für Filmempfehlungen
         prompt = "I need recommendations for "
@@ -1049,8 +1246,7 @@ def formulate_suggestion_prompt(genre_ratings, favorite_titles, watched_titles,
         # Genre-Präferenzen basierend auf Anzahl der Einträge
         if genre_ratings:
             prompt += "Based on my collection, I seem to prefer these genres (with ratings based on frequency out of 5): "
-            genre_items = [f"{genre} ({rating}/5)" for genre, rating in sorted(genre_ratings.items(), key=lambda x: x[1], reverse=True)]
-            prompt += ", ".join(genre_items) + ". "
+            prompt += genre_text + ". "
 
         # Lieblings-Titel
         if favorite_titles:
@@ -1058,17 +1254,29 @@ def formulate_suggestion_prompt(genre_ratings, favorite_titles, watched_titles,
             fav_items = [f"{title['title']} ({title['rating']}/5)" for title in favorite_titles]
             prompt += ", ".join(fav_items) + ". "
 
-        # Bereits gesehene Titel ausschließen
-        if watched_titles:
-            prompt += "Please DO NOT recommend any of these titles as I've already seen them: "
-            prompt += ", ".join(watched_titles) + ". "
+        exclusion_text = "Please DO NOT recommend any of these titles as I've already seen them: "
 
     # Formatierungsanweisungen (gleich für beide Typen)
-    prompt += "Please format your answer ONLY as a JSON object with the following syntax: " \
+    format_text = "Please format your answer ONLY as a JSON object with the following syntax: " \
             "[{\"recomendation_1\":\"title_of_the_recomendation\", \"recomendation_2\":\"title_of_the_recomendation\"}]. " \
             "Do not include any other text or explanations in your response, just the JSON array with exactly the recommendations I asked for."
 
-    return prompt
+    # Bereits gesehene Titel ausschließen: die wichtigsten, soweit das Token-Budget reicht
+    if watched_titles:
+        if token_budget is None:
+            excluded, omitted = [str(title) for title in watched_titles], 0
+        else:
+            remaining = token_budget - estimate_tokens(prompt + exclusion_text + format_text) - EXCLUSION_SUMMARY_TOKENS
+            excluded, omitted = fit_to_budget(watched_titles, max(0, remaining))
+        if excluded:
+            prompt += exclusion_text + ", ".join(excluded) + ". "
+        if omitted:
+            prompt += f"I also know {omitted} {'other ' if excluded else ''}titles from my collection"
+            if genre_ratings:
+                prompt += f", mostly {', '.join(top_genres(genre_ratings, 3))}"
+            prompt += ", so prefer less obvious picks over the most popular ones. "
+
+    return prompt + format_text
 
 def extract_recommendations(ai_response):
     """
@@ -1137,33 +1345,25 @@ GAMES_FILE = os.path.join(BASE_DIR, 'games.json')
 GAMES_API_CACHE_FILE = os.path.join(BASE_DIR, 'games_api_cache.json')
 
 def load_games():
-    """Loads games from the JSON file."""
-    if os.path.exists(GAMES_FILE):
-        with open(GAMES_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    return []
+    """Loads games from the storage backend."""
+    return get_storage().load('games')
 
 def save_games(games):
-    """Saves games to the JSON file."""
-    with open(GAMES_FILE, 'w', encoding='utf-8') as f:
-        json.dump(games, f, ensure_ascii=False, indent=4)
-
-def load_games_api_cache():
-    """Loads games API cache from the JSON file."""
-    if os.path.exists(GAMES_API_CACHE_FILE):
-        with open(GAMES_API_CACHE_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    return {}
+    """Saves all games to the storage backend."""
+    get_storage().save('games', games)
 
-def save_games_api_cache(cache):
-    """Saves games API cache to the JSON file."""
-    with open(GAMES_API_CACHE_FILE, 'w', encoding='utf-8') as f:
-        json.dump(cache, f, ensure_ascii=False, indent=4)
+rawg_rate_limiter = TokenBucket(load_settings().get("rawg_rate_limit", 5))
+games_api_cache = ApiCache(
+    GAMES_API_CACHE_FILE,
+    ttl=API_CACHE_TTL,
+    max_entries=load_settings().get("api_cache_max_entries", 5000)
+)
 
-def search_game_api(title):
+def search_game_api(title, job=None):
     """
     Searches for a game via the RAWG API.
     Returns the API response or None if nothing was found.
+    If 'job' is given, cache hits and API calls are counted there.
     """
     # Get API key from settings
     settings = load_settings()
@@ -1176,24 +1376,35 @@ def search_game_api(title):
     # Normalize title for caching
     normalized_title = title.lower().strip()
 
-    # Check cache first
-    cache = load_games_api_cache()
+    # Check cache first (expired entries are not returned)
     cache_key = f"{normalized_title}"
+    cached = games_api_cache.get(cache_key)
 
-    if cache_key in cache:
+    if cached is not None:
         print(f"Using cached data for '{title}'")
-        # Check if the cache is older than 7 days
-        cache_time = cache.get(f"{cache_key}_timestamp", 0)
-        current_time = datetime.now().timestamp()
-
-        # Cache is valid for 7 days (604800 seconds)
-        if current_time - cache_time < 604800:
-            return cache[cache_key]
-        else:
-            print(f"Cache for '{title}' is outdated, will be updated...")
-
-    # Check API limit before making a request
-    if not check_api_usage_limit():
+        if job:
+            job.record_cache_hit()
+        return cached
+
+    # Concurrent searches for the same title share one API call
+    data, shared = games_api_flight.do(cache_key, lambda: _request_game_api(title, cache_key, api_key, job))
+    if shared:
+        print(f"Using result of the in-flight request for '{title}'")
+        if job:
+            job.record_cache_hit()
+    return data
+
+def _request_game_api(title, cache_key, api_key, job=None):
+    """Makes the actual RAWG request for search_game_api() (never in parallel for the same key)."""
+    # A request that just finished for the same key may already have cached the result
+    cached = games_api_cache.peek(cache_key)
+    if cached is not None:
+        if job:
+            job.record_cache_hit()
+        return cached
+
+    # Reserve budget before making a request so parallel requests cannot exceed the limit
+    if not api_usage_counter.reserve():
         print(f"API limit reached! Cannot make a request for '{title}'")
         return None
 
@@ -1205,18 +1416,21 @@ def search_game_api(title):
         "key": api_key
     }
 
+    committed = False
     try:
-        response = requests.get(url, params=params)
+        rawg_rate_limiter.acquire()
+        response = http_client.get(url, provider='rawg', params=params)
         if response.status_code == 200:
             data = response.json()
 
-            # Increment API usage counter
-            increment_api_usage()
+            # Book the reserved API call
+            api_usage_counter.commit()
+            committed = True
+            if job:
+                job.record_api_call()
 
-            # Cache the result with timestamp
-            cache[cache_key] = data
-            cache[f"{cache_key}_timestamp"] = datetime.now().timestamp()
-            save_games_api_cache(cache)
+            # Cache the result
+            games_api_cache.set(cache_key, data)
 
             return data
         else:
@@ -1225,6 +1439,9 @@ def search_game_api(title):
     except Exception as e:
         print(f"Error calling the API: {str(e)}")
         return None
+    finally:
+        if not committed:
+            api_usage_counter.release()
 
 def process_game_api_response(api_response):
     """Extracts relevant information from the RAWG API response."""
@@ -1298,8 +1515,14 @@ def process_game_api_response(api_response):
 # API endpoints for games
 @app.route('/api/games', methods=['GET'])
 def get_games():
-    games = load_games()
-    return jsonify(games)
+    # Without query parameters return the complete list as before
+    if not request.args:
+        return full_collection_response('games')
+    return query_collection('games')
+
+@app.route('/api/games/changes', methods=['GET'])
+def get_game_changes():
+    return collection_changes('games')
 
 @app.route('/api/games', methods=['POST'])
 def add_game():
@@ -1308,7 +1531,10 @@ def add_game():
     if not data or 'title' not in data:
         return jsonify({'error': 'Title is required'}), 400
 
-    games = load_games()
+    # Detect duplicates (same normalized title or RAWG slug) before any API call;
+    # "allowDuplicate" adds the entry anyway
+    if not data.pop('allowDuplicate', False) and title_index('games').contains_item(data):
+        return jsonify({'error': 'Game is already in your collection', 'duplicate': True}), 409
 
     # If API is used, get game information
     if data.get('useApi', False):
@@ -1322,55 +1548,60 @@ def add_game():
                     data[key] = value
 
     # Add unique ID and timestamp
-    data['id'] = datetime.now().timestamp()
+    data['id'] = storage.new_item_id()
     data['createdAt'] = datetime.now().isoformat()
 
-    games.append(data)
-    save_games(games)
+    get_storage().insert('games', data)
 
     return jsonify(data), 201
 
+@app.route('/api/games/<game_id>', methods=['GET'])
+def get_game(game_id):
+    game = get_storage().get('games', game_id)
+
+    if game is None:
+        return jsonify({'error': 'Game not found'}), 404
+
+    return jsonify(game)
+
 @app.route('/api/games/<game_id>', methods=['PUT'])
 def update_game(game_id):
     data = request.json
-    games = load_games()
+    game = get_storage().get('games', game_id)
 
-    for i, game in enumerate(games):
-        if str(game.get('id')) == game_id:
-            # If API is used and title has changed, get new information
-            if data.get('useApi', False) and data.get('title') != game.get('title'):
-                api_response = search_game_api(data['title'])
-                api_data = process_game_api_response(api_response)
+    if game is None:
+        return jsonify({'error': 'Game not found'}), 404
 
-                if api_data:
-                    # Merge API data with user input
-                    for key, value in api_data.items():
-                        if key not in data or not data[key]:
-                            data[key] = value
+    # If API is used and title has changed, get new information
+    if data.get('useApi', False) and data.get('title') != game.get('title'):
+        api_response = search_game_api(data['title'])
+        api_data = process_game_api_response(api_response)
 
-            # Update game data
-            for key, value in data.items():
-                game[key] = value
+        if api_data:
+            # Merge API data with user input
+            for key, value in api_data.items():
+                if key not in data or not data[key]:
+                    data[key] = value
 
-            game['updatedAt'] = datetime.now().isoformat()
-            games[i] = game
-            save_games(games)
+    # Update game data (the id stays unchanged)
+    for key, value in data.items():
+        if key in ('id', 'legacyId'):
+            continue
+        game[key] = value
 
-            return jsonify(game)
+    game['updatedAt'] = datetime.now().isoformat()
+    get_storage().update('games', game_id, game)
 
-    return jsonify({'error': 'Game not found'}), 404
+    return jsonify(game)
 
 @app.route('/api/games/<game_id>', methods=['DELETE'])
 def delete_game(game_id):
-    games = load_games()
+    deleted_game = get_storage().delete('games', game_id)
 
-    for i, game in enumerate(games):
-        if str(game.get('id')) == game_id:
-            deleted_game = games.pop(i)
-            save_games(games)
-            return jsonify(deleted_game)
+    if deleted_game is None:
+        return jsonify({'error': 'Game not found'}), 404
 
-    return jsonify({'error': 'Game not found'}), 404
+    return jsonify(deleted_game)
 
 @app.route('/api/games/search', methods=['GET'])
 def search_game():
@@ -1449,6 +1680,7 @@ def import_games_csv():
       game_title,date
     Für jede Zeile wird der Spieltitel per API gesucht, es wird nur das erste Suchergebnis verwendet,
     und das Ergebnis (ggf. angereichert mit dem CSV-Datum) wird der Games-Collection hinzugefügt.
+    Der Import läuft als Hintergrund-Job; die Antwort enthält nur die Job-ID.
     """
     file = request.files.get('file')
     if not file:
@@ -1457,46 +1689,70 @@ def import_games_csv():
     try:
         # Falls vorhanden, BOM entfernen (utf-8-sig)
         stream = file.stream.read().decode('utf-8-sig').splitlines()
-        reader = csv.DictReader(stream)
+        rows = list(csv.DictReader(stream))
     except Exception as e:
         return jsonify({'error': 'CSV parsing error', 'details': str(e)}), 400
 
-    games = load_games()
-    imported = 0
-    skipped = 0
+    job = job_manager.submit('games', run_games_import, rows)
+    return jsonify({'success': True, 'job_id': job.id}), 202
+
+def run_games_import(job, rows):
+    """Führt den Games-Import im Hintergrund aus (wird vom JobManager aufgerufen)."""
+    job.set_total(len(rows))
+    new_games = []
+
+    # Bereits vorhandene Spiele (und Duplikate innerhalb der CSV) vor der API-Abfrage überspringen
+    existing = title_index('games')
+    seen_keys = set()
+
+    for row in rows:
+        job.check_cancelled()
 
-    for row in reader:
-        title = row.get('game_title', '').strip()
-        csv_date = row.get('date', '').strip()
+        title = (row.get('game_title') or '').strip()
+        csv_date = (row.get('date') or '').strip()
         if not title:
-            skipped += 1
+            job.advance(skipped=1)
             continue
 
-        api_response = search_game_api(title)
+        key = title_key(title)
+        if key in existing or key in seen_keys:
+            job.advance(skipped=1)
+            continue
+        seen_keys.add(key)
+
+        api_response = search_game_api(title, job=job)
         if not api_response:
             print(f"No API response for '{title}'")
-            skipped += 1
+            job.advance(skipped=1)
             continue
 
         game_info = process_game_api_response(api_response)
         if not game_info:
             print(f"Failed to process API response for '{title}'")
-            skipped += 1
+            job.advance(skipped=1)
             continue
 
-        # Optional: Datum aus CSV hinzufügen (z. B. als "csv_date" speichern)
+        # Der CSV-Titel kann vom RAWG-Titel abweichen: auch über slug bzw. RAWG-Titel prüfen
+        game_keys = item_keys('games', game_info)
+        if any(key in existing or key in seen_keys for key in game_keys):
+            job.advance(skipped=1)
+            continue
+        seen_keys.update(game_keys)
+
+        # Optional: Datum aus CSV hinzufügen (z. B. als "csv_date" speichern)
         if csv_date:
             game_info['csv_date'] = csv_date
 
         # Eindeutige ID und Zeitstempel hinzufügen
-        game_info['id'] = datetime.now().timestamp()
+        game_info['id'] = storage.new_item_id()
         game_info['createdAt'] = datetime.now().isoformat()
 
-        games.append(game_info)
-        imported += 1
+        new_games.append(game_info)
+        job.advance(imported=1)
+
+    # Bei Abbruch wird nichts gespeichert (check_cancelled() oben beendet den Job vorher)
+    get_storage().insert_many('games', new_games)
 
-    save_games(games)
-    return jsonify({'success': True, 'imported': imported, 'skipped': skipped})
 @app.route('/api/ask_ai', methods=['POST'])
 def ask_ai():
     data = request.json
@@ -1507,92 +1763,117 @@ def ask_ai():
 
     try:
         print("AI Prompt:"+message)
-        answer = get_ai_answer(message)
+        answer = get_ai_answer(message, bypass_cache=data.get('bypassCache', False))
         print("AI Answer: "+answer)
         return jsonify({"success": True, "answer": answer})
     except Exception as e:
         return jsonify({"success": False, "message": f"Fehler beim Abrufen der KI-Antwort: {str(e)}"}), 500
 
-def get_tracks_from_csv(file_path):
-    tracks = []
+def sse_event(data, event=None):
+    """Formatiert ein Server-Sent Event mit JSON-Daten."""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@app.route('/api/ask_ai/stream', methods=['GET', 'POST'])
+def ask_ai_stream():
+    """
+    Wie /api/ask_ai, aber die Antwort wird als Server-Sent Events gestreamt:
+    ein 'data: {"token": ...}' pro eintreffendem Stück, zum Schluss 'event: done'
+    mit der vollständigen Antwort oder 'event: error' mit einer Meldung.
+    Nachricht per POST-JSON oder per GET ?message= (für EventSource).
+    """
+    data = request.get_json(silent=True) or request.args
+    message = data.get('message')
+    bypass_cache = data.get('bypassCache', False) in (True, 'true', '1')
+
+    if not message:
+        return jsonify({"success": False, "message": "Keine Nachricht angegeben"}), 400
+
+    provider, error = get_ai_provider()
+
+    def generate():
+        if error:
+            yield sse_event({"message": error}, "error")
+            return
+
+        key = ai_cache_key(provider.name, provider.model, provider.params, message)
+        cached = None if bypass_cache else ai_response_cache.get(key)
+        if cached is not None:
+            yield sse_event({"token": cached})
+            yield sse_event({"answer": cached, "cached": True}, "done")
+            return
+
+        parts = []
+        try:
+            for token in provider.stream(message):
+                parts.append(token)
+                yield sse_event({"token": token})
+        except Exception as e:
+            yield sse_event({"message": f"Fehler bei der Verwendung der {provider.label} API: {str(e)}"}, "error")
+            return
+
+        answer = ''.join(parts)
+        if answer:
+            ai_response_cache.set(key, answer)
+        yield sse_event({"answer": answer, "cached": False}, "done")
+
+    print("AI Prompt (Stream):" + message)
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+# Spalten, aus denen eine Spotify-Track-ID übernommen wird (z.B. "Track URI" bei Exportify)
+TRACK_ID_COLUMNS = ('Track URI', 'Track ID', 'Spotify ID', 'URI')
+SPOTIFY_TRACK_ID_RE = re.compile(r'^(?:spotify:track:|https?://open\.spotify\.com/(?:intl-\w+/)?track/)?([A-Za-z0-9]{22})(?:\?.*)?$')
+
+def parse_track_id(value):
+    """Spotify-Track-ID aus einer URI, einem Link oder einer nackten ID (sonst None)."""
+    match = SPOTIFY_TRACK_ID_RE.match((value or '').strip())
+    return match.group(1) if match else None
+
+def get_track_rows_from_csv(file_path):
+    """Liest die CSV-Zeilen als {'query', 'track_id'}; track_id ist None, wenn die CSV keine enthält."""
+    rows = []
     with open(file_path, newline='', encoding='utf-8') as csvfile:
         reader = csv.DictReader(csvfile)
         for row in reader:
-            track = f"{row['Track Name']} {row['Artist Name(s)']}"
-            tracks.append(track)
-    return tracks
+            track_id = None
+            for column in TRACK_ID_COLUMNS:
+                track_id = parse_track_id(row.get(column))
+                if track_id:
+                    break
+            rows.append({'query': f"{row['Track Name']} {row['Artist Name(s)']}", 'track_id': track_id})
+    return rows
+
+def get_tracks_from_csv(file_path):
+    return [row['query'] for row in get_track_rows_from_csv(file_path)]
 import os
 import json
 import csv
-import requests
-import base64
-
-# Spotify API Zugangsdaten
 
 # Verzeichnis der aktuellen Python-Datei
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
-def get_access_token(client_id, client_secret):
-    token_url = "https://accounts.spotify.com/api/token"
-    auth_str = f"{client_id}:{client_secret}"
-    b64_auth_str = base64.b64encode(auth_str.encode()).decode()
-    headers = {
-        "Authorization": f"Basic {b64_auth_str}",
-        "Content-Type": "application/x-www-form-urlencoded"
-    }
-    data = {"grant_type": "client_credentials"}
-    response = requests.post(token_url, headers=headers, data=data)
-    response.raise_for_status()
-    return response.json()['access_token']
-
-def search_track(token, query):
-    search_url = "https://api.spotify.com/v1/search"
-    headers = {"Authorization": f"Bearer {token}"}
-    params = {
-        "q": query,
-        "type": "track",
-        "limit": 1
-    }
-    response = requests.get(search_url, headers=headers, params=params)
-    response.raise_for_status()
-    reqjson = response.json()
-    print(reqjson)
-    return reqjson
-
-def get_artist_data(token, artist_id):
-    url = f"https://api.spotify.com/v1/artists/{artist_id}"
-    headers = {"Authorization": f"Bearer {token}"}
-    response = requests.get(url, headers=headers)
-    response.raise_for_status()
-    reqjson = response.json()
-    print(reqjson)
-    return reqjson
-
-def load_cache(filename):
-    path = os.path.join(BASE_DIR, filename)
-    if os.path.exists(path):
-        with open(path, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    return {}
-
-def save_cache(filename, data):
-    path = os.path.join(BASE_DIR, filename)
-    with open(path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2)
+# Spotify-Client mit wiederverwendetem Token; Such- und Künstler-Caches liegen im Speicher
+# und werden gesammelt geschrieben (Einträge aus den alten Cache-Dateien werden übernommen)
+SPOTIFY_CACHE_TTL = 30 * 24 * 3600
+spotify_client = SpotifyClient(
+    lambda: (load_settings().get("spotify_client_id", ""), load_settings().get("spotify_client_secret", "")),
+    http_client,
+    ApiCache(os.path.join(BASE_DIR, "music_api_cache.json"), ttl=SPOTIFY_CACHE_TTL,
+             max_entries=load_settings().get("spotify_cache_max_entries", 20000), migrate_untimed=True),
+    ApiCache(os.path.join(BASE_DIR, "spotify_artists_api_cache.json"), ttl=SPOTIFY_CACHE_TTL,
+             max_entries=load_settings().get("spotify_cache_max_entries", 20000), migrate_untimed=True)
+)
 
-def select_best_image(images):
-    if not images:
-        return None
-    # Wähle das Bild mit maximaler Breite
-    best = max(images, key=lambda x: x.get('width', 0))
-    return best.get('url')
 @app.route('/api/import/music', methods=['POST'])
 def import_music_csv():
     """
     Verarbeitet eine hochgeladene Musik-CSV-Datei.
-    Erwartet Spalten: "Track Name" und "Artist Name(s)"
+    Erwartet Spalten: "Track Name" und "Artist Name(s)", optional "Track URI"
+    (bzw. "Track ID"), dann entfällt die Suche für diese Zeile.
 
-    Gibt eine JSON-Antwort zurück mit dem Status und der Anzahl importierter Tracks.
+    Gibt sofort die ID des Import-Jobs zurück; Fortschritt und Anzahl importierter
+    Tracks liefert GET /api/jobs/<id>.
     """
     if 'file' not in request.files:
         return jsonify({'success': False, 'message': 'No file provided'}), 400
@@ -1603,158 +1884,171 @@ def import_music_csv():
         return jsonify({'success': False, 'message': 'No file selected'}), 400
 
     if file and file.filename.endswith('.csv'):
-        # Hochgeladene Datei temporär speichern
-        file_path = os.path.join(BASE_DIR, 'temp_music.csv')
+        # Hochgeladene Datei temporär speichern (eindeutiger Name, da mehrere Importe gleichzeitig laufen können)
+        file_path = os.path.join(BASE_DIR, f'temp_music_{uuid.uuid4().hex}.csv')
         file.save(file_path)
 
-        try:
-            # get_trackinfo Funktion mit dem Dateipfad aufrufen
-            track_infos = get_trackinfo(file_path=file_path)
-
-            # Erfolgsantwort mit Anzahl der importierten Tracks
-            return jsonify({
-                'success': True,
-                'imported': len(track_infos),
-                'message': f'Successfully imported {len(track_infos)} music tracks'
-            })
-
-        except Exception as e:
-            return jsonify({'success': False, 'message': f'Error processing file: {str(e)}'}), 500
-
-        finally:
-            # Temporäre Datei nach der Verarbeitung löschen
-            if os.path.exists(file_path):
-                os.remove(file_path)
+        # Der Import läuft als Hintergrund-Job, der Fortschritt ist über /api/jobs/<id> abrufbar
+        job = job_manager.submit('music', run_music_import, file_path)
+        return jsonify({'success': True, 'job_id': job.id}), 202
 
     else:
         return jsonify({'success': False, 'message': 'Invalid file format. Please upload a CSV file.'}), 400
+
+def run_music_import(job, file_path):
+    """Führt den Musik-Import im Hintergrund aus (wird vom JobManager aufgerufen)."""
+    try:
+        get_trackinfo(file_path=file_path, job=job)
+    finally:
+        # Temporäre Datei nach der Verarbeitung löschen
+        if os.path.exists(file_path):
+            os.remove(file_path)
+def load_music_tracks():
+    """Lädt die Music Tracks aus dem Speicher-Backend."""
+    return get_storage().load('music_tracks')
+
 @app.route('/music_tracks.json')
 def get_music_tracks():
-    """API-Endpunkt zum Abrufen der Music Tracks."""
-    music_tracks_file = os.path.join(BASE_DIR, 'music_tracks.json')
-    if os.path.exists(music_tracks_file):
-        with open(music_tracks_file, 'r', encoding='utf-8') as f:
-            return jsonify(json.load(f))
-    return jsonify([])
-def get_trackinfo(file_path=None, download=False, track_name=""):
-    # Cache-Dateien und Ausgabedatei im BASE_DIR
-    music_api_cache_file = "music_api_cache.json"
-    artist_cache_file = "spotify_artists_api_cache.json"
-    output_file = "music_tracks.json"  # Korrigiert von "music_tacks.json"
-
-    music_api_cache = load_cache(music_api_cache_file)
-    artist_cache = load_cache(artist_cache_file)
-
+    """API-Endpunkt zum Abrufen der Music Tracks (mit Query-Parametern gefiltert und paginiert)."""
+    if not request.args:
+        return full_collection_response('music_tracks')
+    return query_collection('music_tracks')
+
+@app.route('/api/music/changes', methods=['GET'])
+def get_music_changes():
+    return collection_changes('music_tracks')
+def get_trackinfo(file_path=None, download=False, track_name="", job=None, track_names=None):
     try:
-        # API-Schlüssel aus den Einstellungen holen
-        settings = load_settings()
-        SPOTIFY_CLIENT_ID = settings.get("spotify_client_id", "")
-        SPOTIFY_CLIENT_SECRET = settings.get("spotify_client_secret", "")
-        token = get_access_token(SPOTIFY_CLIENT_ID, SPOTIFY_CLIENT_SECRET)
+        # Token wird vom Spotify-Client bis kurz vor Ablauf wiederverwendet
+        spotify_client.token()
     except Exception as e:
         print(f"Fehler beim Abruf des Tokens: {e}")
         return []
 
-    # CSV-Datei mit den Track-Queries
+    # CSV-Datei mit den Track-Queries (und ggf. Track-IDs)
     if file_path:
-        track_queries = get_tracks_from_csv(file_path)
-    elif track_name:
-        track_queries = [track_name]
+        track_rows = get_track_rows_from_csv(file_path)
+    elif track_name or track_names:
+        track_rows = [{'query': query, 'track_id': None} for query in (track_names or [track_name])]
     else:
         return []
 
-    all_track_infos = []
+    if job:
+        job.set_total(len(track_rows))
 
-    for query in track_queries:
-        # API-Anfrage cachen und sofort abspeichern
-        if query in music_api_cache and not download:
-            search_result = music_api_cache[query]
+    # Bei einem Import bereits vorhandene Tracks kennen, um sie ohne weitere Abfragen zu überspringen
+    existing_tracks = []
+    existing = None
+    seen_keys = set()
+    if file_path:
+        try:
+            existing_tracks = load_music_tracks()
+            existing = title_index('music_tracks')
+        except Exception as e:
+            print(f"Fehler beim Laden bestehender Tracks: {e}")
+
+    def is_duplicate(key):
+        if key is None or (existing is not None and key in existing) or key in seen_keys:
+            if job:
+                job.advance(skipped=1)
+            return True
+        seen_keys.add(key)
+        return False
+
+    # 1. Zeilen auswählen: Duplikate überspringen, bevor irgendeine Anfrage gestellt wird
+    pending = []
+    for row in track_rows:
+        if file_path:
+            # Gleiche Suchanfrage (normalisiert) bzw. gleiche Track-ID bereits in der Sammlung oder in dieser CSV
+            if is_duplicate(title_key(row['query'])):
+                continue
+            if row['track_id'] and is_duplicate(f"track:{row['track_id']}"):
+                continue
+        pending.append(row)
+
+    # 2. Tracks auflösen: bekannte IDs gesammelt über /v1/tracks (bis zu 50 pro Anfrage),
+    #    sonst per Suche (Cache im Speicher, 'download' erzwingt eine neue Abfrage).
+    #    Die Suchen laufen parallel; ausgewertet wird danach in der ursprünglichen Reihenfolge.
+    tracks_by_id = spotify_client.get_tracks(
+        [row['track_id'] for row in pending if row['track_id']], refresh=download, job=job)
+
+    def search(row):
+        if job and job.cancelled:
+            return None
+        try:
+            return spotify_client.search_track(row['query'], refresh=download, job=job)
+        except Exception as e:
+            print(f"Fehler bei der Suchanfrage für '{row['query']}': {e}")
+            return None
+
+    search_results = iter(map_in_order(search, [row for row in pending if not row['track_id']],
+                                       max_workers=load_settings().get("enrichment_workers", 8)))
+
+    resolved = []
+    for row in pending:
+        if job:
+            job.check_cancelled()
+        query = row['query']
+
+        if row['track_id']:
+            track_data = tracks_by_id.get(row['track_id'])
+            if track_data is None:
+                print(f"Track-ID {row['track_id']} nicht gefunden: {query}")
+                if job:
+                    job.advance(skipped=1)
+                continue
         else:
-            try:
-                search_result = search_track(token, query)
-                music_api_cache[query] = search_result
-                save_cache(music_api_cache_file, music_api_cache)
-            except Exception as e:
-                print(f"Fehler bei der Suchanfrage für '{query}': {e}")
+            search_result = next(search_results)
+            if search_result is None:
+                if job:
+                    job.advance(skipped=1)
                 continue
 
-        items = search_result.get("tracks", {}).get("items", [])
-        if not items:
-            print(f"Kein Treffer für: {query}")
-            continue
+            items = search_result.get("tracks", {}).get("items", [])
+            if not items:
+                print(f"Kein Treffer für: {query}")
+                if job:
+                    job.advance(skipped=1)
+                continue
 
-        track_data = items[0]
-        track_info = {
-            "query": query,
-            "track_id": track_data.get("id"),
-            "track_name": track_data.get("name"),
-            "track_spotify_link": track_data.get("external_urls", {}).get("spotify"),
-            "popularity": track_data.get("popularity")
-        }
+            track_data = items[0]
+            # Verschiedene Suchanfragen können denselben Track liefern
+            if file_path and is_duplicate(f"track:{track_data.get('id')}" if track_data.get("id") else None):
+                continue
 
-        # Album-Informationen
-        album = track_data.get("album", {})
-        album_info = {
-            "album_name": album.get("name"),
-            "album_spotify_link": album.get("external_urls", {}).get("spotify"),
-            "album_image": select_best_image(album.get("images", []))
-        }
-        track_info["album"] = album_info
-
-        # Künstler-Informationen
-        artists_info = []
-        for artist in track_data.get("artists", []):
-            artist_id = artist.get("id")
-            if artist_id in artist_cache and not download:
-                artist_data = artist_cache[artist_id]
-            else:
-                try:
-                    artist_data = get_artist_data(token, artist_id)
-                    artist_cache[artist_id] = artist_data
-                    save_cache(artist_cache_file, artist_cache)
-                except Exception as e:
-                    print(f"Fehler bei der Künstleranfrage für ID '{artist_id}': {e}")
-                    continue
-            artist_info = {
-                "artist_id": artist_id,
-                "artist_name": artist.get("name"),
-                "artist_spotify_link": artist.get("external_urls", {}).get("spotify"),
-                "genres": artist_data.get("genres", []),
-                "artist_image": select_best_image(artist_data.get("images", []))
-            }
-            artists_info.append(artist_info)
-        track_info["artists"] = artists_info
+        resolved.append((query, track_data))
+        if job:
+            job.advance()
 
+    if job:
+        job.check_cancelled()
+
+    # 3. Künstler aller Tracks gesammelt laden (bis zu 50 pro Anfrage, bekannte aus dem Cache)
+    artists_by_id = spotify_client.get_artists(
+        [artist.get("id") for _, track_data in resolved for artist in track_data.get("artists", [])],
+        refresh=download, job=job)
+
+    # 4. Ergebnisse in der Reihenfolge der CSV zusammensetzen
+    all_track_infos = []
+    for query, track_data in resolved:
+        track_info = track_document(query, track_data, artists_by_id)
         all_track_infos.append(track_info)
+        if job:
+            job.advance(imported=1, processed=0)
 
-    # Bei Vorschlagsanfragen (track_name ist gesetzt, file_path nicht)
+    # Bei Vorschlagsanfragen (track_name/track_names ist gesetzt, file_path nicht)
     # nur Ergebnisse zurückgeben, ohne die Datei zu überschreiben
-    if track_name and not file_path:
+    if not file_path:
         return all_track_infos
 
-    # Nur bei einem Import (file_path ist gesetzt) die Datei aktualisieren
-    output_path = os.path.join(BASE_DIR, output_file)
-    existing_tracks = []
-    if os.path.exists(output_path):
-        try:
-            with open(output_path, 'r', encoding='utf-8') as f:
-                existing_tracks = json.load(f)
-        except Exception as e:
-            print(f"Fehler beim Laden bestehender Tracks: {e}")
-
-    # Bei einem Import alle neuen Tracks hinzufügen (keine Duplikate)
+    # Bei einem Import alle neuen Tracks hinzufügen (Duplikate wurden oben bereits übersprungen)
     if file_path:
-        existing_track_ids = set(track.get('track_id') for track in existing_tracks if track.get('track_id'))
-
-        for track in all_track_infos:
-            if track.get('track_id') and track.get('track_id') not in existing_track_ids:
-                existing_tracks.append(track)
-                existing_track_ids.add(track.get('track_id'))
+        new_tracks = all_track_infos
+        for track in new_tracks:
+            track['source'] = 'csv_import'
+        get_storage().insert_many('music_tracks', new_tracks)
 
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(existing_tracks, f, indent=2)
-
-        return existing_tracks
+        return existing_tracks + new_tracks
 
     return all_track_infos
 @app.route('/api/add_game', methods=['POST'])
@@ -1765,20 +2059,19 @@ def add_game_endpoint():
         
         if not game_data:
             return jsonify({'success': False, 'message': 'No game data provided'}), 400
-        
-        # Load existing games
-        games = load_games()
-        
-        # Add the new game to the collection with a unique ID
-        if 'id' not in game_data:
-            game_data['id'] = datetime.now().timestamp()
+
+        # Check for duplicates (same normalized title or RAWG slug)
+        if not game_data.pop('allowDuplicate', False) and title_index('games').contains_item(game_data):
+            return jsonify({'success': False, 'duplicate': True, 'message': 'Game is already in your collection'}), 409
+
         if 'createdAt' not in game_data:
             game_data['createdAt'] = datetime.now().isoformat()
         
-        games.append(game_data)
-        save_games(games)
+        # The storage assigns the ID (an old-style client ID is kept as legacyId);
+        # return the stored item so the client uses that ID for updates and deletes
+        game = get_storage().insert('games', game_data)
         
-        return jsonify({'success': True, 'game': game_data})
+        return jsonify({'success': True, 'game': game})
     
     except Exception as e:
         import traceback
@@ -1794,32 +2087,15 @@ def get_music_suggestions():
         suggestion_count = data.get('suggestionCount', 5)
         suggestion_type = data.get('suggestionType', 'similar')
 
-        # Get all tracks
-        music_tracks_file = os.path.join(BASE_DIR, 'music_tracks.json')
-        tracks = []
-        if os.path.exists(music_tracks_file):
-            try:
-                with open(music_tracks_file, 'r', encoding='utf-8') as f:
-                    tracks = json.load(f)
-                print(f"Successfully loaded {len(tracks)} tracks")
-            except Exception as e:
-                print(f"Error loading music tracks: {str(e)}")
-                tracks = []
-
-        # Extract information for AI prompt
-        artists = {}
-        genres = {}
-
-        for track in tracks:
-            if track.get('artists'):
-                for artist in track['artists']:
-                    artist_name = artist.get('artist_name', '')
-                    if artist_name:
-                        artists[artist_name] = artists.get(artist_name, 0) + 1
-
-                    if artist.get('genres'):
-                        for genre in artist['genres']:
-                            genres[genre] = genres.get(genre, 0) + 1
+        # Artist and genre frequencies come from the incrementally maintained taste profile
+        favorite_genres = []
+        favorite_artists = []
+        try:
+            taste = taste_profile('music_tracks')
+            favorite_genres = taste.top_genres(10)
+            favorite_artists = taste.top_artists(10)
+        except Exception as e:
+            print(f"Error loading music taste profile: {str(e)}")
 
         # Create AI prompt
         prompt = f"I need recommendations for {suggestion_count} music tracks that I might enjoy."
@@ -1828,17 +2104,15 @@ def get_music_suggestions():
             prompt += f" I'm looking for music that is: {description}."
 
         # Add genre preferences
-        if genres:
-            top_genres = sorted(genres.items(), key=lambda x: x[1], reverse=True)[:10]
+        if favorite_genres:
             prompt += " Based on my collection, my top genres are: "
-            prompt += ", ".join([genre for genre, _ in top_genres])
+            prompt += ", ".join([genre for genre, _ in favorite_genres])
             prompt += "."
 
         # Add artist preferences
-        if artists:
-            top_artists = sorted(artists.items(), key=lambda x: x[1], reverse=True)[:10]
+        if favorite_artists:
             prompt += " My favorite artists include: "
-            prompt += ", ".join([artist for artist, _ in top_artists])
+            prompt += ", ".join([artist for artist, _ in favorite_artists])
             prompt += "."
 
         # Format instructions
@@ -1849,7 +2123,7 @@ def get_music_suggestions():
         # Get AI response
         try:
             print("AI Prompt: " + prompt)
-            ai_response = get_ai_answer(prompt)
+            ai_response = get_ai_answer(prompt, bypass_cache=data.get('bypassCache', False))
             print("AI Response: " + ai_response)
 
             # Extract recommendations from AI response
@@ -1878,19 +2152,18 @@ def get_music_suggestions():
             if not recommendations or not isinstance(recommendations, list):
                 return jsonify({'success': False, 'error': 'No valid recommendations generated'}), 500
 
-            # Get track info for each recommendation
-            track_results = []
+            # Get track info for all recommendations at once: searches run in parallel,
+            # artists are loaded in one batch, and the AI's order is kept
+            queries = []
             for rec in recommendations:
                 if isinstance(rec, dict):
                     track_name = rec.get('track', '')
                     artist_name = rec.get('artist', '')
 
                     if track_name and artist_name:
-                        query = f"{track_name} {artist_name}"
-                        track_info = get_trackinfo(track_name=query)
+                        queries.append(f"{track_name} {artist_name}")
 
-                        if track_info and len(track_info) > 0:
-                            track_results.append(track_info[0])
+            track_results = get_trackinfo(track_names=queries) if queries else []
 
             return jsonify({
                 'success': True,
@@ -1918,26 +2191,13 @@ def add_track_endpoint():
         if not track_data:
             return jsonify({'success': False, 'message': 'No track data provided'}), 400
 
-        # Load existing tracks
-        music_tracks_file = os.path.join(BASE_DIR, 'music_tracks.json')
-        tracks = []
-        if os.path.exists(music_tracks_file):
-            with open(music_tracks_file, 'r', encoding='utf-8') as f:
-                tracks = json.load(f)
-
-        # Check if track already exists by track_id
-        track_id = track_data.get('track_id')
-        if track_id:
-            # Check if track already exists
-            if any(track.get('track_id') == track_id for track in tracks):
-                return jsonify({'success': False, 'message': 'Track already exists in your collection'}), 200
-
-        # Add the new track to the collection
-        tracks.append(track_data)
-
-        # Save the updated collection
-        with open(music_tracks_file, 'w', encoding='utf-8') as f:
-            json.dump(tracks, f, ensure_ascii=False, indent=2)
+        # Check if track already exists (by track_id or normalized track name + artists)
+        if title_index('music_tracks').contains_item(track_data):
+            return jsonify({'success': False, 'message': 'Track already exists in your collection'}), 200
+
+        # Add the new track to the collection (only the suggestion cards post here)
+        track_data.setdefault('source', 'suggestion')
+        get_storage().insert('music_tracks', track_data)
 
         return jsonify({'success': True, 'message': 'Track added to collection successfully'})
 
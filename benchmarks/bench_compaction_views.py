@@ -0,0 +1,111 @@
+"""
+Benchmark: abgeleitete Sichten über eine Journal-Kompaktierung hinweg.
+
+Legt eine JSON-Sammlung (Standard: 100.000 Filme) an, baut die Sichten von
+CachedStorage auf (Zähl-Sicht und Volltext-Index), schreibt einen Eintrag und
+kompaktiert das Journal. Geprüft wird, dass danach keine Sicht neu aufgebaut
+wird, und zwar einmal über die Rückmeldung des Backends und einmal über den
+Vergleich beim Neuladen (falls die Rückmeldung fehlt bzw. zu spät kommt).
+
+    python benchmarks/bench_compaction_views.py [--items 100000] [--seed 42]
+"""
+import os
+import sys
+import time
+import random
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import storage  # noqa: E402
+from search_index import SearchIndex  # noqa: E402
+
+GENRES = ['Action', 'Drama', 'Comedy', 'Horror', 'Thriller', 'Romance', 'Animation', 'Documentary']
+
+
+class CountingView:
+    """Sicht, die nur mitzählt, wie oft sie komplett aufgebaut wurde."""
+
+    builds = 0
+
+    def __init__(self, collection, items):
+        CountingView.builds += 1
+
+    def add(self, item):
+        pass
+
+    def remove(self, item):
+        pass
+
+
+def generate_movies(count, seed=42):
+    rng = random.Random(seed)
+    return [{
+        'id': storage.new_item_id(),
+        'title': f'Movie {i} {rng.randint(1, 99999)}',
+        'genre': ', '.join(rng.sample(GENRES, 2)),
+        'rating': rng.randint(0, 5),
+        'year': rng.randint(1950, 2025),
+        'type': 'movie'
+    } for i in range(count)]
+
+
+def run(movies, directory, use_callback):
+    files = {name: os.path.join(directory, f'{name}.json') for name in ('movies', 'games', 'music_tracks')}
+    backend = storage.JsonBackend(files, compact_ops=10 ** 9, compact_seconds=10 ** 9)
+    backend.save('movies', movies)
+    cached = storage.CachedStorage(backend)
+    if not use_callback:
+        backend.on_compacted = None
+    cached.register_view('counting', CountingView)
+    cached.register_view('search', SearchIndex)
+
+    CountingView.builds = 0
+    start = time.perf_counter()
+    cached.view('movies', 'counting')
+    cached.view('movies', 'search')
+    build_time = time.perf_counter() - start
+
+    cached.insert('movies', {'title': 'Compaction Test', 'genre': 'Drama', 'rating': 4})
+    builds_before = CountingView.builds
+
+    start = time.perf_counter()
+    backend.compact('movies')
+    cached.view('movies', 'counting')
+    search = cached.view('movies', 'search')
+    after_time = time.perf_counter() - start
+
+    found = bool(search.search('compaction test'))
+    backend.close()
+    return build_time, after_time, builds_before, CountingView.builds, found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--items', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    movies = generate_movies(args.items, args.seed)
+    failed = False
+    for label, use_callback in (('Rückmeldung', True), ('Vergleich', False)):
+        directory = tempfile.mkdtemp()
+        try:
+            build_time, after_time, before, after, found = run(movies, directory, use_callback)
+        finally:
+            shutil.rmtree(directory)
+        print(f"{label:<12} Aufbau {build_time:.2f}s, Kompaktierung + Zugriff {after_time:.3f}s, "
+              f"Sicht aufgebaut: {before} -> {after}")
+        if after != before or not found:
+            failed = True
+
+    if failed:
+        print("FEHLER: Sichten wurden nach der Kompaktierung neu aufgebaut!")
+        sys.exit(1)
+    print("Sichten bleiben über die Kompaktierung erhalten")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+Benchmark: Group Commit bei gleichzeitigen Schreibvorgängen.
+
+Mehrere Threads fügen gleichzeitig Filme ein (Standard: 8 Threads x 25 Einträge),
+einmal direkt über JsonBackend und einmal über CachedStorage, wie es die App
+tut. Gezählt werden die fsync-Aufrufe: gemeinsam geschriebene Änderungen
+brauchen weniger fsyncs als Schreibvorgänge. Danach wird geprüft, dass nach
+dem Neuladen alle Einträge vorhanden sind.
+
+    python benchmarks/bench_group_commit.py [--threads 8] [--writes 25]
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import storage  # noqa: E402
+
+_real_fsync = os.fsync
+_fsync_count = 0
+_fsync_lock = threading.Lock()
+
+
+def _counting_fsync(fd):
+    global _fsync_count
+    with _fsync_lock:
+        _fsync_count += 1
+    _real_fsync(fd)
+
+
+def run(threads, writes, through_cache):
+    global _fsync_count
+    directory = tempfile.mkdtemp()
+    try:
+        files = {name: os.path.join(directory, f'{name}.json') for name in ('movies', 'games', 'music_tracks')}
+        backend = storage.JsonBackend(files, compact_ops=10 ** 9, compact_seconds=10 ** 9)
+        target = storage.CachedStorage(backend) if through_cache else backend
+        if through_cache:
+            target.snapshot('movies')
+
+        def worker(number):
+            for i in range(writes):
+                target.insert('movies', {'id': storage.new_item_id(), 'title': f'Movie {number}-{i}'})
+
+        workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+        _fsync_count = 0
+        start = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        fsyncs = _fsync_count
+
+        cached_count = len(target.snapshot('movies')) if through_cache else None
+        backend._stop.set()
+        stored = len(storage.JsonBackend(files).load('movies'))
+        return elapsed, fsyncs, stored, cached_count
+    finally:
+        shutil.rmtree(directory)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--writes', type=int, default=25)
+    args = parser.parse_args()
+
+    total = args.threads * args.writes
+    os.fsync = _counting_fsync
+    failed = False
+    try:
+        for label, through_cache in (('JsonBackend', False), ('CachedStorage', True)):
+            elapsed, fsyncs, stored, cached_count = run(args.threads, args.writes, through_cache)
+            print(f"{label:<14} {total} Schreibvorgänge, {fsyncs} fsyncs, {elapsed:.2f}s, gespeichert: {stored}")
+            if fsyncs >= total or stored != total or cached_count not in (None, total):
+                failed = True
+    finally:
+        os.fsync = _real_fsync
+
+    if failed:
+        print("FEHLER: Schreibvorgänge wurden nicht gemeinsam geschrieben oder gingen verloren!")
+        sys.exit(1)
+    print("Group Commit greift auch über CachedStorage")
+
+
+if __name__ == '__main__':
+    main()
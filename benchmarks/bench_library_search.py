@@ -0,0 +1,114 @@
+"""
+Benchmark für den Volltext-Index der Bibliothekssuche.
+
+Erzeugt eine synthetische Filmsammlung (Standard: 100.000 Einträge), misst den
+Aufbau von search_index.SearchIndex, typische Suchanfragen (exakt, Präfix,
+Tippfehler, häufiges Genre, mehrere Wörter) und inkrementelle Änderungen und
+vergleicht die Treffer einer exakten Titelsuche mit einem linearen Durchlauf.
+
+    python benchmarks/bench_library_search.py [--items 100000] [--seed 42] [--repeat 20]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from search_index import SearchIndex, tokenize  # noqa: E402
+
+SYLLABLES = ['ka', 'lo', 'mi', 'ter', 'nor', 'ste', 'lar', 'dra', 'vin', 'gol', 'sha', 'dow', 'ri', 'ven',
+             'mar', 'tin', 'ber', 'gen', 'qui', 'zor']
+GENRES = ['Action', 'Drama', 'Comedy', 'Horror', 'Thriller', 'Romance', 'Animation', 'Documentary',
+          'Crime', 'Sci-Fi', 'Fantasy', 'Mystery']
+
+
+def _word(rng):
+    return ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+
+
+def generate_movies(count, seed=42):
+    """Filme mit Titel, Regie, Genres und Notizen aus einem Wortschatz von etwa count / 5 Wörtern."""
+    rng = random.Random(seed)
+    vocabulary = list({_word(rng) for _ in range(max(100, count // 5))})
+    movies = []
+    for i in range(count):
+        movies.append({
+            'id': str(i),
+            'title': ' '.join(rng.choice(vocabulary) for _ in range(rng.randint(1, 4))).title(),
+            'director': f'{rng.choice(vocabulary).title()} {rng.choice(vocabulary).title()}',
+            'genre': ', '.join(rng.sample(GENRES, rng.randint(1, 3))),
+            'notes': ' '.join(rng.choice(vocabulary) for _ in range(12)),
+            'type': rng.choice(['movie', 'series'])
+        })
+    return movies
+
+
+def _typo(word, rng):
+    """Vertauscht zwei benachbarte Buchstaben."""
+    i = rng.randrange(len(word) - 1)
+    return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+
+
+def _measure(index, query, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        hits = index.search(query)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000, hits
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--items', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    movies = generate_movies(args.items, args.seed)
+
+    start = time.perf_counter()
+    index = SearchIndex('movies', movies)
+    print(f"{args.items} Einträge, {len(index.postings)} Wörter, Aufbau {time.perf_counter() - start:.2f}s")
+
+    sample = rng.choice(movies)
+    title_word = tokenize(sample['title'])[0]
+    queries = {
+        'Titel exakt': sample['title'],
+        'Präfix': title_word[:4],
+        'Tippfehler': _typo(title_word, rng),
+        'Genre (häufig)': 'drama',
+        'Regie + Genre': f"{sample['director']} {sample['genre'].split(',')[0]}"
+    }
+    for label, query in queries.items():
+        ms, hits = _measure(index, query, args.repeat)
+        print(f"{label:<16} {query!r:<40} {ms:7.2f} ms  {len(hits)} Treffer")
+
+    # Inkrementelle Änderung wie bei CachedStorage.update(): alter Eintrag raus, neuer rein
+    times = []
+    for _ in range(args.repeat):
+        old = rng.choice(movies)
+        new = dict(old, title=old['title'] + ' Remastered')
+        start = time.perf_counter()
+        index.remove(old)
+        index.add(new)
+        times.append(time.perf_counter() - start)
+        index.remove(new)
+        index.add(old)
+    print(f"Änderung         {statistics.median(times) * 1000:.3f} ms")
+
+    # Die exakte Titelsuche muss den Eintrag finden, den auch ein linearer Durchlauf findet
+    expected = {movie['id'] for movie in movies if movie['title'] == sample['title']}
+    found = {item['id'] for _, item in index.search(sample['title'], limit=len(expected) + 20)}
+    if not expected <= found:
+        print("FEHLER: Titel wurde nicht gefunden!")
+        sys.exit(1)
+    print("Titelsuche vollständig")
+
+
+if __name__ == '__main__':
+    main()
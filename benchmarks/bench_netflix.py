@@ -0,0 +1,210 @@
+"""
+Benchmark für die Netflix-Verlaufsanalyse.
+
+Erzeugt einen synthetischen Verlauf (Standard: 100.000 Zeilen), vergleicht die
+bisherige Implementierung mit netflix_history.analyze_netflix_history() und
+prüft, dass beide dieselben Filme und Serien liefern.
+
+    python benchmarks/bench_netflix.py [--rows 100000] [--seed 42] [--skip-legacy]
+"""
+import os
+import re
+import sys
+import csv
+import time
+import random
+import argparse
+import tempfile
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from netflix_history import analyze_netflix_history, iter_titles  # noqa: E402
+
+WORDS = ['Dark', 'Night', 'House', 'Crown', 'Stranger', 'Money', 'Heist', 'Blue', 'Ocean', 'Witcher',
+         'Lost', 'City', 'Fire', 'Shadow', 'Kingdom', 'River', 'Moon', 'Storm', 'Silent', 'Garden']
+
+
+def _name(rng, words=2):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)) + f' {rng.randint(1, 9999)}'
+
+
+def generate_history(rows, seed=42):
+    """Erzeugt Netflix-Verlaufstitel: Serien mit Staffeln/Episoden, Filme, Miniserien und Wiederholungen."""
+    rng = random.Random(seed)
+    series = [_name(rng) for _ in range(max(1, rows // 60))]
+    movies = [_name(rng, 3) for _ in range(max(1, rows // 20))]
+    franchises = [_name(rng, 2) + ' Saga' for _ in range(max(1, rows // 10))]
+    titles = []
+    while len(titles) < rows:
+        kind = rng.random()
+        if kind < 0.55:
+            show = rng.choice(series)
+            season = rng.randint(1, 6)
+            episode = rng.randint(1, 12)
+            fmt = rng.randint(0, 3)
+            if fmt == 0:
+                titles.append(f'{show}: Staffel {season}: Folge {episode}')
+            elif fmt == 1:
+                titles.append(f'{show}: Season {season}: Episode {episode}')
+            elif fmt == 2:
+                titles.append(f'{show}: S{season:02d}E{episode:02d}')
+            else:
+                titles.append(f'{show}: Kapitel {episode}')
+        elif kind < 0.65:
+            titles.append(f'{rng.choice(series)}: Miniserie: Teil {rng.randint(1, 4)}')
+        elif kind < 0.75:
+            # Filme mit Untertitel ("Franchise: Untertitel")
+            titles.append(f'{rng.choice(franchises)}: {_name(rng, 1)}')
+        elif kind < 0.85 and titles:
+            # Wiederholt angesehen
+            titles.append(rng.choice(titles))
+        else:
+            titles.append(rng.choice(movies))
+    return titles
+
+
+def write_csv(titles, path):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Title', 'Date'])
+        for i, title in enumerate(titles):
+            writer.writerow([title, f'{1 + i % 28:02d}.{1 + i % 12:02d}.23'])
+
+
+def legacy_classify(titles):
+    """Bisherige Implementierung aus app.py (ohne das Einlesen per pandas), als Referenz."""
+    prefix_groups = defaultdict(list)
+    for title in titles:
+        if ':' in title:
+            prefix = title.split(':', 1)[0].strip()
+            prefix_groups[prefix].append(title)
+        else:
+            prefix_groups[title].append(title)
+
+    series_dict = {}
+    movies = []
+
+    for prefix, group_titles in prefix_groups.items():
+        group_size = len(group_titles)
+
+        has_multiple_colons = any(title.count(':') >= 2 for title in group_titles)
+        has_season_pattern = any(re.search(r'(?:Staffel|Season)\s*\d+', title, re.IGNORECASE) for title in group_titles)
+        has_episode_pattern = any(re.search(r'S\d+E\d+', title, re.IGNORECASE) for title in group_titles)
+        has_miniserie = any('miniserie' in title.lower() for title in group_titles)
+        has_folge = any(re.search(r'(?:Folge|Episode|Kapitel)\s*\d+', title, re.IGNORECASE) for title in group_titles)
+
+        seasons = set()
+        for title in group_titles:
+            match = re.search(r'(?:Staffel|Season)\s*(\d+)', title, re.IGNORECASE)
+            if match:
+                seasons.add(match.group(1))
+                continue
+
+            match = re.search(r'S(\d+)E\d+', title, re.IGNORECASE)
+            if match:
+                seasons.add(match.group(1))
+                continue
+
+        if group_size >= 3:
+            is_series = True
+        elif group_size == 2 and (has_multiple_colons or has_season_pattern or
+                                 has_episode_pattern or has_miniserie or has_folge):
+            is_series = True
+        elif group_size == 1 and (has_season_pattern or has_episode_pattern or
+                                 has_miniserie or has_folge):
+            is_series = True
+        elif has_multiple_colons:
+            is_series = True
+        elif group_size >= 2:
+            if all(':' in title for title in group_titles):
+                suffixes = [title.split(':', 1)[1].strip() for title in group_titles]
+                if len(set(suffixes)) == len(suffixes) and \
+                   max(len(s) for s in suffixes) - min(len(s) for s in suffixes) < 20:
+                    is_series = True
+                else:
+                    is_series = False
+            else:
+                is_series = False
+        else:
+            is_series = False
+
+        if is_series:
+            if not seasons:
+                seasons.add('1')
+            series_dict[prefix] = seasons
+        else:
+            movies.extend(group_titles)
+
+    for title in titles:
+        if any(title.startswith(prefix + ':') for prefix in series_dict.keys()):
+            if title in movies:
+                movies.remove(title)
+            continue
+
+        if ':' in title and title.count(':') >= 2:
+            prefix = title.split(':', 1)[0].strip()
+            if prefix not in series_dict:
+                series_dict[prefix] = {'1'}
+            if title in movies:
+                movies.remove(title)
+
+    final_movies = sorted(list(set(movies)))
+
+    series_list = []
+    for name, seasons in sorted(series_dict.items()):
+        seasons_sorted = sorted(seasons, key=lambda x: int(x))
+        seasons_str = ', '.join(seasons_sorted)
+        series_list.append(f"{name} (Staffel {seasons_str})")
+
+    return {'movies': final_movies, 'series': series_list}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--skip-legacy', action='store_true', help='Nur die neue Implementierung messen')
+    args = parser.parse_args()
+
+    titles = generate_history(args.rows, args.seed)
+    fd, path = tempfile.mkstemp(suffix='.csv')
+    os.close(fd)
+    try:
+        write_csv(titles, path)
+        print(f"{args.rows} Zeilen, {len(set(titles))} unterschiedliche Titel")
+
+        start = time.perf_counter()
+        result = analyze_netflix_history(path)
+        new_time = time.perf_counter() - start
+        print(f"neu:      {new_time:.3f}s (inkl. CSV-Streaming)")
+
+        if args.skip_legacy:
+            return
+
+        try:
+            import pandas as pd
+            start = time.perf_counter()
+            legacy_titles = pd.read_csv(path)['Title'].tolist()
+            read_time = time.perf_counter() - start
+        except ImportError:
+            # Ohne pandas nur die Klassifizierung vergleichen
+            legacy_titles = list(iter_titles(path))
+            read_time = 0.0
+
+        start = time.perf_counter()
+        expected = legacy_classify(legacy_titles)
+        legacy_time = time.perf_counter() - start + read_time
+        print(f"bisher:   {legacy_time:.3f}s" + ('' if read_time else ' (ohne pandas-Einlesen)'))
+        print(f"Speedup:  {legacy_time / new_time:.1f}x")
+
+        if result != expected:
+            print("FEHLER: Ergebnisse unterscheiden sich!")
+            sys.exit(1)
+        print("Ergebnisse identisch")
+    finally:
+        os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,409 @@
+import json
+import base64
+import threading
+from bisect import bisect_left, bisect_right, insort
+
+# Standardgröße einer Seite und Obergrenze für 'limit'
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+# Felder, nach denen sortiert werden kann (pro Sammlung)
+SORT_FIELDS = {
+    'movies': ('title', 'year', 'rating', 'imdbRating', 'createdAt', 'id'),
+    'games': ('title', 'year', 'rating', 'rawg_rating', 'createdAt', 'id'),
+    'music_tracks': ('title', 'popularity', 'artist', 'album')
+}
+
+# Sortierfelder mit Zahlenwerten (alle übrigen werden als Text verglichen)
+NUMERIC_SORT_FIELDS = ('year', 'rating', 'imdbRating', 'rawg_rating', 'popularity')
+
+
+class QueryError(ValueError):
+    """Ungültige Query-Parameter (z.B. unbekannte Sortierung oder kaputter Cursor)."""
+
+
+def _split_genres(value):
+    if isinstance(value, list):
+        return [str(g).strip() for g in value if str(g).strip()]
+    return [g.strip() for g in str(value or '').split(',') if g.strip()]
+
+
+def _to_float(value):
+    try:
+        return float(value) if value is not None and value != '' else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_year(value):
+    try:
+        return int(str(value)[:4]) if value else None
+    except (TypeError, ValueError):
+        return None
+
+
+def extract_fields(collection, item):
+    """
+    Normalisiert die filter- und sortierbaren Felder eines Eintrags.
+    Filme, Spiele und Musik-Tracks speichern dieselben Informationen unter verschiedenen Namen.
+    """
+    if collection == 'music_tracks':
+        artists = item.get('artists') or []
+        genres = []
+        for artist in artists:
+            for genre in artist.get('genres') or []:
+                if genre not in genres:
+                    genres.append(genre)
+        return {
+            'title': item.get('track_name') or '',
+            'search': ' '.join([item.get('track_name') or ''] + [a.get('artist_name') or '' for a in artists]),
+            'types': [],
+            'genres': genres,
+            'year': None,
+            'rating': _to_float(item.get('popularity')),
+            'popularity': _to_float(item.get('popularity')),
+            'artist': artists[0].get('artist_name') if artists else None,
+            'album': (item.get('album') or {}).get('album_name')
+        }
+
+    if collection == 'games':
+        return {
+            'title': item.get('title') or '',
+            'search': ' '.join([item.get('title') or ''] + list(item.get('platforms') or [])),
+            # Bei Spielen filtert 'type' nach Plattform (z.B. 'PC')
+            'types': list(item.get('platforms') or []),
+            'genres': _split_genres(item.get('genre')),
+            'year': _to_year(item.get('release_date') or item.get('year')),
+            'rating': _to_float(item.get('rating')),
+            'rawg_rating': _to_float(item.get('rawg_rating')),
+            'createdAt': item.get('createdAt'),
+            'id': str(item.get('id', ''))
+        }
+
+    return {
+        'title': item.get('title') or '',
+        'search': ' '.join([item.get('title') or '', item.get('director') or '']),
+        'types': [item.get('type') or 'movie'],
+        'genres': _split_genres(item.get('genre')),
+        'year': _to_year(item.get('year')),
+        'rating': _to_float(item.get('rating')),
+        'imdbRating': _to_float(item.get('imdbRating')),
+        'createdAt': item.get('createdAt'),
+        'id': str(item.get('id', ''))
+    }
+
+
+def _sort_value(field, fields):
+    value = fields.get(field)
+    if field in ('title', 'artist', 'album') and value is not None:
+        value = str(value).casefold()
+    # Einträge ohne Wert werden aufsteigend zuerst einsortiert
+    return (value is not None, value if value is not None else 0)
+
+
+class CollectionIndex:
+    """
+    Sekundärindizes über eine Sammlung: Typ, Genre, Jahr und je eine sortierte
+    Reihenfolge pro Sortierfeld (bei der ersten Abfrage erstellt).
+
+    Wird von CachedStorage als Sicht gehalten und über add()/remove() nachgeführt,
+    statt nach jeder Änderung neu aufgebaut zu werden. Einträge haben dafür statt
+    ihrer Position im Snapshot eine fortlaufende Nummer, deren Reihenfolge der
+    Sammlung entspricht; eine Aktualisierung (remove + add mit gleichem
+    Schlüssel) behält die Nummer und damit ihren Platz.
+    """
+
+    def __init__(self, collection, items, key_func):
+        self.collection = collection
+        self.key_func = key_func
+        self.docs = {}       # Nummer -> (Schlüssel, Eintrag, Felder)
+        self.positions = {}  # Schlüssel -> Nummern (bei doppelten Schlüsseln mehrere)
+        self._anonymous = {}  # id(Eintrag) -> Nummer für Einträge ohne Schlüssel
+        self.sequence = []   # Nummern in Reihenfolge der Sammlung
+        self.by_type = {}
+        self.by_genre = {}
+        self.years = []      # sortiert: (Jahr, Nummer)
+        self._orders = {}    # Feld -> (sortierte ((Wert, Schlüssel), Nummer), nur die Sortierschlüssel)
+        self._next_doc = 0
+        self._last_removed = None  # (Schlüssel, Nummer) für remove + add einer Aktualisierung
+        self._lock = threading.Lock()
+
+        # Erster Aufbau: anhängen und einmal sortieren statt einzeln einzufügen
+        for item in items:
+            fields = self._index(item, self._next_doc)
+            self.sequence.append(self._next_doc)
+            if fields['year'] is not None:
+                self.years.append((fields['year'], self._next_doc))
+            self._next_doc += 1
+        self.years.sort()
+
+    def __len__(self):
+        return len(self.docs)
+
+    def _index(self, item, doc):
+        key = self.key_func(item)
+        if key is None:
+            key = f'#{doc}'
+            self._anonymous[id(item)] = doc
+        fields = extract_fields(self.collection, item)
+        self.docs[doc] = (key, item, fields)
+        insort(self.positions.setdefault(key, []), doc)
+        for value in fields['types']:
+            self.by_type.setdefault(str(value).casefold(), set()).add(doc)
+        for genre in fields['genres']:
+            self.by_genre.setdefault(genre.casefold(), set()).add(doc)
+        return fields
+
+    def add(self, item):
+        with self._lock:
+            key = self.key_func(item)
+            if key is not None and self._last_removed and self._last_removed[0] == key:
+                doc = self._last_removed[1]
+            else:
+                doc = self._next_doc
+                self._next_doc += 1
+            self._last_removed = None
+
+            fields = self._index(item, doc)
+            key = self.docs[doc][0]
+            insort(self.sequence, doc)
+            if fields['year'] is not None:
+                insort(self.years, (fields['year'], doc))
+            for field, (entries, sort_keys) in self._orders.items():
+                sort_key = (_sort_value(field, fields), key)
+                i = bisect_right(entries, (sort_key, doc))
+                entries.insert(i, (sort_key, doc))
+                sort_keys.insert(i, sort_key)
+
+    def remove(self, item):
+        with self._lock:
+            key = self.key_func(item)
+            if key is None:
+                doc = self._anonymous.pop(id(item), None)
+            else:
+                docs = self.positions.get(key)
+                doc = docs[0] if docs else None
+            if doc is None:
+                return
+            key, _, fields = self.docs.pop(doc)
+            _discard_sorted(self.positions, key, doc)
+            self._last_removed = (key, doc)
+
+            _remove_sorted(self.sequence, doc)
+            for value in fields['types']:
+                _discard(self.by_type, str(value).casefold(), doc)
+            for genre in fields['genres']:
+                _discard(self.by_genre, genre.casefold(), doc)
+            if fields['year'] is not None:
+                _remove_sorted(self.years, (fields['year'], doc))
+            for field, (entries, sort_keys) in self._orders.items():
+                i = bisect_left(entries, ((_sort_value(field, fields), key), doc))
+                del entries[i]
+                del sort_keys[i]
+
+    def order(self, field):
+        """Sortierte Liste von ((Wert, Schlüssel), Nummer) für ein Feld (wird bei Bedarf erstellt)."""
+        if field not in self._orders:
+            entries = [((_sort_value(field, fields), key), doc) for doc, (key, _, fields) in self.docs.items()]
+            entries.sort()
+            self._orders[field] = (entries, [entry[0] for entry in entries])
+        return self._orders[field]
+
+    def candidates(self, filters):
+        """Gibt die Nummern zurück, die alle Filter erfüllen (None = alle)."""
+        result = None
+
+        def intersect(current, docs):
+            return set(docs) if current is None else current & docs
+
+        if filters.get('type'):
+            result = intersect(result, self.by_type.get(filters['type'].casefold(), set()))
+        if filters.get('genre'):
+            result = intersect(result, self.by_genre.get(filters['genre'].casefold(), set()))
+        if filters.get('year_min') is not None or filters.get('year_max') is not None:
+            lo = bisect_left(self.years, (filters['year_min'],)) if filters.get('year_min') is not None else 0
+            hi = (bisect_right(self.years, (filters['year_max'], float('inf')))
+                  if filters.get('year_max') is not None else len(self.years))
+            result = intersect(result, {doc for _, doc in self.years[lo:hi]})
+
+        min_rating = filters.get('min_rating')
+        query = (filters.get('q') or '').casefold()
+        if min_rating is not None or query:
+            docs = self.docs if result is None else result
+            result = {
+                doc for doc in docs
+                if (min_rating is None or (self.docs[doc][2]['rating'] or 0) >= min_rating)
+                and (not query or query in self.docs[doc][2]['search'].casefold())
+            }
+        return result
+
+
+def _remove_sorted(values, value):
+    i = bisect_left(values, value)
+    if i < len(values) and values[i] == value:
+        del values[i]
+
+
+def _discard_sorted(index, value, doc):
+    docs = index[value]
+    _remove_sorted(docs, doc)
+    if not docs:
+        del index[value]
+
+
+def _discard(index, value, doc):
+    docs = index.get(value)
+    if docs is not None:
+        docs.discard(doc)
+        if not docs:
+            del index[value]
+
+
+def _encode_cursor(sort, value):
+    raw = json.dumps([sort, value], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def _decode_cursor(cursor, sort):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        cursor_sort, value = json.loads(raw)
+    except (ValueError, TypeError):
+        raise QueryError('Invalid cursor')
+    if cursor_sort != sort:
+        raise QueryError('Cursor does not match sort order')
+    return value
+
+
+def parse_query_args(args):
+    """Liest die Query-Parameter aus request.args."""
+    def number(name, convert):
+        value = args.get(name)
+        if value in (None, ''):
+            return None
+        try:
+            return convert(value)
+        except (TypeError, ValueError):
+            raise QueryError(f'Invalid value for {name}')
+
+    limit = number('limit', int)
+    if limit is None:
+        limit = DEFAULT_LIMIT
+    return {
+        'limit': max(1, min(limit, MAX_LIMIT)),
+        'cursor': args.get('cursor') or None,
+        'sort': args.get('sort') or None,
+        'type': args.get('type') or None,
+        'genre': args.get('genre') or None,
+        'year_min': number('year_min', int),
+        'year_max': number('year_max', int),
+        'min_rating': number('min_rating', float),
+        'q': args.get('q') or None
+    }
+
+
+def run_query(index, params):
+    """
+    Filtert, sortiert und paginiert eine Sammlung.
+
+    'sort' ist ein Feldname, optional mit '-' für absteigend (z.B. '-rating').
+    Ohne 'sort' bleibt die Reihenfolge der Sammlung erhalten. Der Cursor
+    kodiert den Sortierwert und Schlüssel des letzten Eintrags und bleibt daher
+    stabil, auch wenn zwischendurch Einträge hinzugefügt oder gelöscht werden.
+
+    Returns:
+        dict: {'items', 'total', 'limit', 'nextCursor'}
+    """
+    limit = params['limit']
+    sort = params.get('sort')
+    with index._lock:
+        candidates = index.candidates(params)
+        total = len(index.docs) if candidates is None else len(candidates)
+
+        if sort:
+            descending = sort.startswith('-')
+            field = sort.lstrip('-')
+            if field not in SORT_FIELDS[index.collection]:
+                raise QueryError(f'Unsupported sort field: {field}')
+            entries, sort_keys = index.order(field)
+
+            if params.get('cursor'):
+                after = _cursor_sort_key(field, _decode_cursor(params['cursor'], sort))
+                start = bisect_left(sort_keys, after) - 1 if descending else bisect_right(sort_keys, after)
+            else:
+                start = len(entries) - 1 if descending else 0
+
+            step = -1 if descending else 1
+            page = []
+            last_key = None
+            i = start
+            while 0 <= i < len(entries) and len(page) < limit:
+                sort_key, doc = entries[i]
+                if candidates is None or doc in candidates:
+                    page.append(doc)
+                    last_key = sort_key
+                i += step
+            has_more = bool(page) and _has_more(entries, candidates, i, step)
+            next_cursor = _encode_cursor(sort, [list(last_key[0]), last_key[1]]) if has_more else None
+        else:
+            # Reihenfolge der Sammlung: Cursor = [Schlüssel, Nummer] des letzten Eintrags.
+            # Wurde genau dieser Eintrag gelöscht, geht es mit dem nächsten dahinter weiter.
+            start = 0
+            if params.get('cursor'):
+                value = _decode_cursor(params['cursor'], None)
+                try:
+                    last_key, last_doc = value
+                    docs = index.positions.get(last_key) if isinstance(last_key, str) else None
+                    start = bisect_right(index.sequence, docs[0] if docs else int(last_doc))
+                except (TypeError, ValueError):
+                    raise QueryError('Invalid cursor')
+            page = []
+            i = start
+            while i < len(index.sequence) and len(page) < limit:
+                doc = index.sequence[i]
+                if candidates is None or doc in candidates:
+                    page.append(doc)
+                i += 1
+            has_more = bool(page) and _has_more(index.sequence, candidates, i, 1, True)
+            next_cursor = _encode_cursor(None, [index.docs[page[-1]][0], page[-1]]) if has_more else None
+
+        items = [index.docs[doc][1] for doc in page]
+
+    return {
+        'items': items,
+        'total': total,
+        'limit': limit,
+        'nextCursor': next_cursor
+    }
+
+
+def _cursor_sort_key(field, value):
+    """
+    Prüft den Sortierwert eines Cursors und gibt ihn als Sortierschlüssel zurück. Ein Wert
+    mit falschem Typ (z.B. eine Zahl bei einem Textfeld) würde sonst erst beim Vergleich
+    in bisect mit einem TypeError scheitern.
+    """
+    try:
+        (present, sort_value), key = value
+    except (TypeError, ValueError):
+        raise QueryError('Invalid cursor')
+    if not isinstance(present, bool) or not isinstance(key, str):
+        raise QueryError('Invalid cursor')
+    if present:
+        expected = (int, float) if field in NUMERIC_SORT_FIELDS else str
+        valid = isinstance(sort_value, expected) and not isinstance(sort_value, bool)
+    else:
+        valid = sort_value == 0 and not isinstance(sort_value, bool)
+    if not valid:
+        raise QueryError('Invalid cursor')
+    return ((present, sort_value), key)
+
+
+def _has_more(entries, candidates, i, step, plain=False):
+    """Prüft, ob ab Index i (in Laufrichtung) noch ein passender Eintrag folgt."""
+    while 0 <= i < len(entries):
+        pos = entries[i] if plain else entries[i][1]
+        if candidates is None or pos in candidates:
+            return True
+        i += step
+    return False
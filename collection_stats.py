@@ -0,0 +1,213 @@
+import heapq
+import re
+import threading
+
+from storage import item_key
+from taste_profile import RankedItems, split_genres, item_rating, increment_counts
+
+YEAR_RE = re.compile(r'(\d{4})')
+
+# Plattform-Gruppen der Spiele-Statistik (wie bisher in games_main.js: Teilstring im Plattformnamen)
+PLATFORM_GROUPS = {
+    'pc': ('pc', 'windows'),
+    'console': ('playstation', 'xbox', 'nintendo', 'switch')
+}
+
+# Einträge ohne 'source' wurden von Hand (bzw. aus den Vorschlägen) hinzugefügt
+DEFAULT_SOURCE = 'manual'
+
+FAVORITES_LIMIT = 10
+TOP_ARTISTS_LIMIT = 10
+
+
+def _year(value):
+    match = YEAR_RE.search(str(value or ''))
+    return match.group(1) if match else None
+
+
+def _rating_bucket(rating):
+    """1, 1.0 und '1' landen im selben Eimer '1'; halbe Sterne bleiben erhalten."""
+    return f'{rating:g}'
+
+
+def _popularity_bucket(popularity):
+    """Spotify-Popularität 0..100 in Zehnerschritten ('0-9', ..., '90-100')."""
+    low = min(int(popularity) // 10 * 10, 90)
+    return f'{low}-{low + 9}' if low < 90 else '90-100'
+
+
+def _sorted_counts(counts, by_key=False):
+    if by_key:
+        return dict(sorted(counts.items()))
+    return dict(sorted(counts.items(), key=lambda x: (-x[1], x[0])))
+
+
+class CollectionStats:
+    """
+    Kennzahlen einer Sammlung für die Statistik-Seiten: Bewertungsverteilung,
+    Genres, Jahre, Typen, Quellen und Favoriten (Musik: Popularität, Künstler,
+    Alben und beliebteste Tracks).
+
+    Wird von CachedStorage als Sicht gehalten und bei jeder Änderung über
+    add()/remove() nachgeführt; to_dict() wird bis zur nächsten Änderung
+    zwischengespeichert. Eine Statistik-Anfrage kostet damit unabhängig von der
+    Größe der Sammlung nur das Serialisieren der Zähler.
+    """
+
+    def __init__(self, collection, items=()):
+        self.collection = collection
+        self.total = 0
+        self.ratings = {}
+        self.genres = {}
+        self.years = {}
+        self.types = {}
+        self.sources = {}
+        self.platforms = {}
+
+        # Nur Musik
+        self.artists = {}
+        self.albums = {}
+        self.artist_images = {}
+        self.popularity_sum = 0
+        self.popularity_count = 0
+
+        self._favorites = RankedItems()
+        self._result = None
+        self._lock = threading.Lock()
+
+        for item in items:
+            self.add(item)
+
+    def _key(self, item):
+        return item_key(self.collection, item) or item.get('title') or item.get('query')
+
+    def add(self, item):
+        self._apply(item, 1)
+
+    def remove(self, item):
+        self._apply(item, -1)
+
+    def _apply(self, item, delta):
+        with self._lock:
+            self._result = None
+            self.total += delta
+            if self.collection == 'music_tracks':
+                self._apply_track(item, delta)
+            else:
+                self._apply_item(item, delta)
+
+    def _apply_item(self, item, delta):
+        """Filme, Serien und Spiele."""
+        increment_counts(self.genres, split_genres(item), delta)
+        rating = item_rating(item)
+        increment_counts(self.ratings, [_rating_bucket(rating)], delta)
+
+        if self.collection == 'games':
+            year = _year(item.get('release_date'))
+            platforms = [str(platform) for platform in item.get('platforms') or []]
+            increment_counts(self.platforms, platforms, delta)
+            lowered = [platform.lower() for platform in platforms]
+            groups = [group for group, needles in PLATFORM_GROUPS.items()
+                      if any(needle in platform for platform in lowered for needle in needles)]
+            increment_counts(self.types, groups, delta)
+            # Bei Spielen sind die Shops die Bezugsquellen
+            increment_counts(self.sources, [str(store) for store in item.get('stores') or []], delta)
+        else:
+            year = _year(item.get('year'))
+            increment_counts(self.types, [item.get('type') or 'movie'], delta)
+            increment_counts(self.sources, [item.get('source') or DEFAULT_SOURCE], delta)
+        if year:
+            increment_counts(self.years, [year], delta)
+
+        if rating <= 0:
+            return
+        key = self._key(item)
+        if delta < 0:
+            self._favorites.remove(key)
+            return
+        favorite = {
+            'id': item.get('id', ''),
+            'title': item.get('title', ''),
+            'rating': item.get('rating', 0)
+        }
+        if self.collection == 'movies':
+            favorite['type'] = item.get('type', 'movie')
+        self._favorites.add(key, rating, favorite)
+
+    def _apply_track(self, item, delta):
+        increment_counts(self.sources, [item.get('source') or DEFAULT_SOURCE], delta)
+        album = item.get('album') or {}
+        if album.get('album_name'):
+            increment_counts(self.albums, [album['album_name']], delta)
+        year = _year(album.get('album_release_date'))
+        if year:
+            increment_counts(self.years, [year], delta)
+
+        for artist in item.get('artists') or []:
+            name = artist.get('artist_name')
+            if name:
+                increment_counts(self.artists, [name], delta)
+                if name not in self.artists:
+                    self.artist_images.pop(name, None)
+                elif artist.get('artist_image') and name not in self.artist_images:
+                    self.artist_images[name] = artist['artist_image']
+            # Wie in der bisherigen Statistik zählt jedes Genre einmal pro Künstler des Tracks
+            increment_counts(self.genres, artist.get('genres') or [], delta)
+
+        popularity = item.get('popularity')
+        if popularity:
+            increment_counts(self.ratings, [_popularity_bucket(popularity)], delta)
+            self.popularity_sum += popularity * delta
+            self.popularity_count += delta
+
+        key = self._key(item)
+        if delta < 0:
+            self._favorites.remove(key)
+            return
+        self._favorites.add(key, popularity or 0, {
+            'track_id': item.get('track_id'),
+            'track_name': item.get('track_name'),
+            'artists': [artist.get('artist_name') for artist in item.get('artists') or []
+                        if artist.get('artist_name')],
+            'album_name': album.get('album_name'),
+            'popularity': popularity or 0
+        })
+
+    def to_dict(self):
+        """Die Kennzahlen als JSON-fähiges Dict (bis zur nächsten Änderung zwischengespeichert)."""
+        with self._lock:
+            if self._result is None:
+                self._result = self._build()
+            return self._result
+
+    def _build(self):
+        result = {
+            'total': self.total,
+            'genres': _sorted_counts(self.genres),
+            'years': _sorted_counts(self.years, by_key=True),
+            'sources': _sorted_counts(self.sources),
+            'favorites': self._favorites.top(FAVORITES_LIMIT)
+        }
+        if self.collection == 'music_tracks':
+            top_artists = heapq.nlargest(TOP_ARTISTS_LIMIT, self.artists.items(), key=lambda x: x[1])
+            result.update({
+                'popularity': _sorted_counts(self.ratings, by_key=True),
+                'average_popularity': (round(self.popularity_sum / self.popularity_count)
+                                       if self.popularity_count else 0),
+                'artist_count': len(self.artists),
+                'album_count': len(self.albums),
+                'top_artists': [{'name': name, 'tracks': count, 'image': self.artist_images.get(name)}
+                                for name, count in top_artists]
+            })
+            return result
+
+        not_rated = self.ratings.get('0', 0)
+        result.update({
+            'rated': self.total - not_rated,
+            'not_rated': not_rated,
+            'ratings': _sorted_counts(self.ratings, by_key=True),
+            'types': _sorted_counts(self.types)
+        })
+        if self.collection == 'games':
+            result['platforms'] = _sorted_counts(self.platforms)
+        return result
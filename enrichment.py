@@ -0,0 +1,119 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class TokenBucket:
+    """
+    Einfacher Token-Bucket als Ratenbegrenzung pro API-Anbieter.
+
+    'rate' Tokens pro Sekunde werden nachgefüllt, höchstens 'capacity' Stück
+    (kurze Bursts sind also erlaubt). acquire() blockiert, bis ein Token frei ist.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens=1):
+        """Wartet, bis 'tokens' Tokens verfügbar sind, und entnimmt sie."""
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class _Flight:
+    __slots__ = ('event', 'result', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Bündelt gleichzeitige Aufrufe mit demselben Schlüssel zu einem einzigen.
+
+    Läuft für einen Schlüssel bereits ein Aufruf, warten weitere Aufrufer
+    darauf und erhalten dasselbe Ergebnis (bzw. dieselbe Exception), statt
+    selbst eine API-Anfrage zu stellen.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}
+        self._stats = {'calls': 0, 'shared': 0}
+
+    def do(self, key, func):
+        """Ruft func() für 'key' höchstens einmal gleichzeitig auf. Gibt (Ergebnis, geteilt) zurück."""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                self._stats['shared'] += 1
+                leader = False
+            else:
+                flight = self._flights[key] = _Flight()
+                self._stats['calls'] += 1
+                leader = True
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result, True
+
+        try:
+            flight.result = func()
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.event.set()
+        return flight.result, False
+
+    def stats(self):
+        """Ausgeführte und eingesparte (geteilte) Aufrufe."""
+        with self._lock:
+            return dict(self._stats, in_flight=len(self._flights))
+
+
+def map_in_order(func, items, max_workers=8):
+    """
+    Ruft func(item) für alle Einträge parallel in einem begrenzten Thread-Pool auf
+    und gibt die Ergebnisse in der Reihenfolge der Eingabe zurück.
+    Schlägt ein Aufruf fehl, steht an seiner Stelle None.
+    """
+    items = list(items)
+    if not items:
+        return []
+
+    def safe_call(item):
+        try:
+            return func(item)
+        except Exception as e:
+            print(f"Fehler bei der Anreicherung von '{item}': {str(e)}")
+            return None
+
+    if max_workers <= 1 or len(items) == 1:
+        return [safe_call(item) for item in items]
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as pool:
+        return list(pool.map(safe_call, items))
@@ -0,0 +1,177 @@
+import time
+import random
+import threading
+from collections import deque
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Statuscodes, bei denen ein erneuter Versuch sinnvoll ist
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def _retry_after(response):
+    """Wartezeit aus dem Retry-After-Header in Sekunden (Zahl oder HTTP-Datum), sonst None."""
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class _ProviderStats:
+    """Latenzen und Zähler für einen Anbieter (die letzten 'window' Anfragen für Perzentile)."""
+
+    def __init__(self, window=500):
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.statuses = {}
+        self.total_ms = 0.0
+        self.latencies = deque(maxlen=window)
+
+    def to_dict(self):
+        latencies = sorted(self.latencies)
+
+        def percentile(p):
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))], 1)
+
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'retries': self.retries,
+            'statuses': dict(self.statuses),
+            'avg_ms': round(self.total_ms / self.requests, 1) if self.requests else None,
+            'p50_ms': percentile(0.5),
+            'p95_ms': percentile(0.95),
+            'max_ms': round(latencies[-1], 1) if latencies else None
+        }
+
+
+class HttpClient:
+    """
+    Gemeinsamer HTTP-Client für alle externen Anbieter.
+
+    - Eine requests.Session pro Host, damit Verbindungen (inkl. TLS) wiederverwendet werden
+    - Verbindungs- und Lese-Timeout für jede Anfrage ('timeout' als (connect, read))
+    - Bei 429/5xx und Verbindungsfehlern bis zu 'max_retries' weitere Versuche mit
+      exponentiellem Backoff und Jitter; ein Retry-After-Header hat Vorrang.
+      Verlangt der Anbieter eine längere Pause als 'max_retry_after', wird die
+      Antwort direkt zurückgegeben statt einen Worker-Thread so lange zu blockieren.
+    - Latenzstatistik pro Anbieter (stats())
+    """
+
+    def __init__(self, timeout=(5, 20), max_retries=3, backoff_base=0.5, backoff_max=10,
+                 max_retry_after=30, pool_maxsize=16):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_retry_after = max_retry_after
+        self.pool_maxsize = pool_maxsize
+
+        self._sessions = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def _session(self, url):
+        parts = urlsplit(url)
+        host = f'{parts.scheme}://{parts.netloc}'
+        session = self._sessions.get(host)
+        if session is None:
+            with self._lock:
+                session = self._sessions.get(host)
+                if session is None:
+                    session = requests.Session()
+                    # Wiederholungen übernimmt request() selbst (mit Retry-After und Statistik)
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_maxsize, max_retries=0)
+                    session.mount(f'{parts.scheme}://', adapter)
+                    self._sessions[host] = session
+        return session
+
+    def _backoff(self, attempt):
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _record(self, provider, elapsed_ms, status=None, error=False, retry=False):
+        with self._lock:
+            stats = self._stats.get(provider)
+            if stats is None:
+                stats = self._stats[provider] = _ProviderStats()
+            stats.requests += 1
+            stats.total_ms += elapsed_ms
+            stats.latencies.append(elapsed_ms)
+            if status is not None:
+                stats.statuses[str(status)] = stats.statuses.get(str(status), 0) + 1
+            if error:
+                stats.errors += 1
+            if retry:
+                stats.retries += 1
+
+    def request(self, method, url, provider=None, timeout=None, max_retries=None, **kwargs):
+        """
+        Führt eine Anfrage aus und gibt die letzte Antwort zurück. Wirft die Exception
+        von requests, wenn auch der letzte Versuch an Verbindung oder Timeout scheitert.
+        """
+        provider = provider or urlsplit(url).netloc
+        timeout = self.timeout if timeout is None else timeout
+        max_retries = self.max_retries if max_retries is None else max_retries
+        session = self._session(url)
+
+        attempt = 0
+        while True:
+            start = time.perf_counter()
+            try:
+                response = session.request(method, url, timeout=timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                retry = attempt < max_retries
+                self._record(provider, (time.perf_counter() - start) * 1000, error=True, retry=retry)
+                if not retry:
+                    raise
+                delay = self._backoff(attempt)
+                print(f"HTTP-Fehler bei {provider} ({type(e).__name__}), neuer Versuch in {delay:.1f}s")
+            else:
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                if response.status_code not in RETRY_STATUSES or attempt >= max_retries:
+                    self._record(provider, elapsed_ms, status=response.status_code,
+                                 error=response.status_code >= 400)
+                    return response
+
+                delay = _retry_after(response)
+                if delay is None:
+                    delay = self._backoff(attempt)
+                elif delay > self.max_retry_after:
+                    self._record(provider, elapsed_ms, status=response.status_code, error=True)
+                    return response
+                self._record(provider, elapsed_ms, status=response.status_code, error=True, retry=True)
+                print(f"{provider} antwortet mit {response.status_code}, neuer Versuch in {delay:.1f}s")
+                response.close()
+
+            time.sleep(delay)
+            attempt += 1
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def stats(self):
+        """Latenz- und Fehlerstatistik pro Anbieter."""
+        with self._lock:
+            return {provider: stats.to_dict() for provider, stats in self._stats.items()}
+
+    def close(self):
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
@@ -0,0 +1,209 @@
+import time
+import uuid
+import queue
+import threading
+
+# Endzustände eines Jobs
+FINISHED_STATES = ('completed', 'failed', 'cancelled')
+
+
+class JobCancelled(Exception):
+    """Wird im Worker ausgelöst, wenn ein Job abgebrochen wurde."""
+
+
+class Job:
+    """
+    Ein Hintergrund-Job (z.B. ein Import) mit Fortschrittszählern.
+
+    Die Zähler werden von der Job-Funktion (ggf. aus mehreren Threads)
+    über die Methoden unten fortgeschrieben und per to_dict() ausgeliefert.
+    """
+
+    def __init__(self, kind):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = 'queued'
+        self.total = None
+        self.processed = 0
+        self.imported = 0
+        self.skipped = 0
+        self.api_calls = 0
+        self.cache_hits = 0
+        self.error = None
+        self.result = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+        self._lock = threading.Lock()
+        self._cancel_event = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    def check_cancelled(self):
+        """Bricht die Job-Funktion ab, falls der Job abgebrochen wurde."""
+        if self._cancel_event.is_set():
+            raise JobCancelled()
+
+    def set_total(self, total):
+        with self._lock:
+            self.total = total
+
+    def advance(self, imported=0, skipped=0, processed=1):
+        """
+        Markiert einen Eintrag als verarbeitet (importiert oder übersprungen).
+        Mit processed=0 werden nur die Zähler nachgetragen, z.B. wenn erst nach
+        der API-Abfrage feststeht, ob ein Eintrag übernommen wird.
+        """
+        with self._lock:
+            self.processed += processed
+            self.imported += imported
+            self.skipped += skipped
+
+    def record_api_call(self, calls=1):
+        with self._lock:
+            self.api_calls += calls
+
+    def record_cache_hit(self, hits=1):
+        with self._lock:
+            self.cache_hits += hits
+
+    def _eta(self, now):
+        if self.status != 'running' or not self.total or not self.processed or self.started_at is None:
+            return None
+        remaining = self.total - self.processed
+        if remaining <= 0:
+            return 0
+        elapsed = now - self.started_at
+        return round(elapsed / self.processed * remaining, 1)
+
+    def to_dict(self):
+        now = time.time()
+        with self._lock:
+            return {
+                'id': self.id,
+                'kind': self.kind,
+                'status': self.status,
+                'total': self.total,
+                'processed': self.processed,
+                'imported': self.imported,
+                'skipped': self.skipped,
+                'api_calls': self.api_calls,
+                'cache_hits': self.cache_hits,
+                'eta_seconds': self._eta(now),
+                'error': self.error,
+                'result': self.result,
+                'created_at': self.created_at,
+                'started_at': self.started_at,
+                'finished_at': self.finished_at
+            }
+
+
+class JobManager:
+    """
+    Einfache In-Process-Warteschlange für lange laufende Aufgaben.
+
+    submit() legt einen Job an und gibt ihn sofort zurück; die Arbeit
+    erledigen 'workers' Hintergrund-Threads. Abgeschlossene Jobs bleiben
+    'keep_seconds' lang abrufbar, danach werden sie verworfen.
+    """
+
+    def __init__(self, workers=2, keep_seconds=3600, max_jobs=200):
+        self.workers = workers
+        self.keep_seconds = keep_seconds
+        self.max_jobs = max_jobs
+
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._threads = []
+
+    def _ensure_workers(self):
+        if self._threads:
+            return
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker_loop, name=f'job-worker-{i}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, kind, func, *args, **kwargs):
+        """
+        Reiht func(job, *args, **kwargs) ein. Der Rückgabewert von func wird
+        als 'result' des Jobs gespeichert.
+        """
+        job = Job(kind)
+        with self._lock:
+            self._cleanup()
+            self._jobs[job.id] = job
+            self._ensure_workers()
+        self._queue.put((job, func, args, kwargs))
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        """Fordert den Abbruch an. Gibt den Job zurück oder None, wenn er unbekannt ist."""
+        job = self.get(job_id)
+        if job is None:
+            return None
+        job.cancel()
+        with job._lock:
+            if job.status == 'queued':
+                # Noch nicht gestartet: sofort als abgebrochen markieren, der Worker überspringt ihn
+                job.status = 'cancelled'
+                job.finished_at = time.time()
+        return job
+
+    def _worker_loop(self):
+        while True:
+            job, func, args, kwargs = self._queue.get()
+            try:
+                self._run(job, func, args, kwargs)
+            finally:
+                self._queue.task_done()
+
+    def _run(self, job, func, args, kwargs):
+        with job._lock:
+            if job.status != 'queued':
+                return
+            job.status = 'running'
+            job.started_at = time.time()
+
+        status, result, error = 'completed', None, None
+        try:
+            result = func(job, *args, **kwargs)
+            if job.cancelled:
+                status = 'cancelled'
+        except JobCancelled:
+            status = 'cancelled'
+        except Exception as e:
+            print(f"Fehler im Job {job.kind} ({job.id}): {str(e)}")
+            status, error = 'failed', str(e)
+
+        with job._lock:
+            job.status = status
+            job.result = result
+            job.error = error
+            job.finished_at = time.time()
+
+    def _cleanup(self):
+        """Verwirft alte abgeschlossene Jobs (muss unter self._lock aufgerufen werden)."""
+        now = time.time()
+        for job_id, job in list(self._jobs.items()):
+            if job.status in FINISHED_STATES and job.finished_at and now - job.finished_at > self.keep_seconds:
+                del self._jobs[job_id]
+
+        if len(self._jobs) >= self.max_jobs:
+            finished = sorted(
+                (job for job in self._jobs.values() if job.status in FINISHED_STATES),
+                key=lambda job: job.finished_at or 0
+            )
+            for job in finished[:len(self._jobs) - self.max_jobs + 1]:
+                del self._jobs[job.id]
@@ -0,0 +1,201 @@
+import csv
+import re
+
+# Vorkompilierte Muster für die Serienerkennung
+SEASON_RE = re.compile(r'(?:Staffel|Season)\s*(\d+)', re.IGNORECASE)
+EPISODE_RE = re.compile(r'S(\d+)E\d+', re.IGNORECASE)
+FOLGE_RE = re.compile(r'(?:Folge|Episode|Kapitel)\s*\d+', re.IGNORECASE)
+
+
+def iter_titles(file_path, column='Title'):
+    """Liest die Titel-Spalte einer Netflix-Verlaufsdatei zeilenweise (ohne die ganze Datei zu laden)."""
+    with open(file_path, newline='', encoding='utf-8-sig') as csvfile:
+        reader = csv.reader(csvfile)
+        header = next(reader, None)
+        if not header or column not in header:
+            raise ValueError(f"Spalte '{column}' fehlt in der CSV-Datei")
+        index = header.index(column)
+        for row in reader:
+            if len(row) > index and row[index]:
+                yield row[index]
+
+
+class _Group:
+    """Gesammelte Merkmale aller Titel mit demselben Präfix."""
+
+    __slots__ = ('size', 'titles', 'seasons', 'multiple_colons', 'season_pattern', 'episode_pattern',
+                 'miniserie', 'folge', 'colon_count', 'suffixes', 'min_suffix', 'max_suffix')
+
+    def __init__(self):
+        self.size = 0
+        self.titles = set()
+        self.seasons = set()
+        self.multiple_colons = False
+        self.season_pattern = False
+        self.episode_pattern = False
+        self.miniserie = False
+        self.folge = False
+        self.colon_count = 0
+        self.suffixes = set()
+        self.min_suffix = None
+        self.max_suffix = None
+
+    def is_series(self):
+        # REGEL 1: Gruppen mit 3+ Titeln sind fast immer Serien
+        if self.size >= 3:
+            return True
+
+        structure = self.season_pattern or self.episode_pattern or self.miniserie or self.folge
+
+        # REGEL 2: Gruppen mit 2 Titeln und Serien-Strukturen sind Serien
+        if self.size == 2 and (self.multiple_colons or structure):
+            return True
+
+        # REGEL 3: Einzeltitel mit Staffel- oder Episoden-Mustern sind Serien
+        if self.size == 1 and structure:
+            return True
+
+        # REGEL 4: Komplexe Titelstrukturen mit mehreren Doppelpunkten sind Serien
+        if self.multiple_colons:
+            return True
+
+        # REGEL 5: Gemeinsames Format in Titeln deutet auf Episoden hin:
+        # Alle Titel haben einen Doppelpunkt, alle Teile danach sind unterschiedlich
+        # und ähnlich lang (wahrscheinlich Episodentitel)
+        if self.size >= 2 and self.colon_count == self.size:
+            return len(self.suffixes) == self.size and self.max_suffix - self.min_suffix < 20
+
+        # Standardfall: Ein Einzeltitel ohne Serienmerkmale ist ein Film
+        return False
+
+
+def _title_features(title):
+    """Berechnet die Merkmale eines einzelnen Titels (einmal pro unterschiedlichem Titel)."""
+    colon = ':' in title
+    if colon:
+        head, tail = title.split(':', 1)
+        prefix = head.strip()
+        suffix = tail.strip()
+    else:
+        head = prefix = title
+        suffix = None
+
+    season_match = SEASON_RE.search(title)
+    episode_match = EPISODE_RE.search(title)
+    if season_match:
+        season = season_match.group(1)
+    elif episode_match:
+        season = episode_match.group(1)
+    else:
+        season = None
+
+    return (
+        prefix,
+        head if colon else None,
+        suffix,
+        season,
+        title.count(':') >= 2,
+        season_match is not None,
+        episode_match is not None,
+        'miniserie' in title.lower(),
+        FOLGE_RE.search(title) is not None
+    )
+
+
+def classify_titles(titles):
+    """
+    Unterscheidet in einem Durchlauf zwischen Filmen und Serien und gruppiert
+    Serien nach Staffeln.
+
+    Die Merkmale werden pro unterschiedlichem Titel nur einmal berechnet und
+    pro Präfix (alles vor dem ersten Doppelpunkt) zusammengefasst. Die
+    Laufzeit ist daher linear in der Anzahl der Zeilen.
+
+    Returns:
+        dict: Ein Dictionary mit Listen für 'movies' und 'series'
+    """
+    features = {}  # Titel -> Merkmale (Cache für wiederholt angesehene Titel)
+    groups = {}    # Präfix -> _Group
+
+    for title in titles:
+        feature = features.get(title)
+        if feature is None:
+            feature = features[title] = _title_features(title)
+        prefix, _, suffix, season, multiple_colons, season_pattern, episode_pattern, miniserie, folge = feature
+
+        group = groups.get(prefix)
+        if group is None:
+            group = groups[prefix] = _Group()
+        group.size += 1
+        if title in group.titles:
+            # Wiederholung: Merkmale sind bereits erfasst, nur das Episodenformat (REGEL 5) ist verletzt
+            if suffix is not None:
+                group.colon_count += 1
+            continue
+        group.titles.add(title)
+
+        if season is not None:
+            group.seasons.add(season)
+        group.multiple_colons |= multiple_colons
+        group.season_pattern |= season_pattern
+        group.episode_pattern |= episode_pattern
+        group.miniserie |= miniserie
+        group.folge |= folge
+        if suffix is not None:
+            group.colon_count += 1
+            group.suffixes.add(suffix)
+            length = len(suffix)
+            if group.min_suffix is None or length < group.min_suffix:
+                group.min_suffix = length
+            if group.max_suffix is None or length > group.max_suffix:
+                group.max_suffix = length
+
+    # Identifiziere Serien anhand von Gruppenmerkmalen
+    series_dict = {}  # {name: set_of_seasons}
+    movie_groups = []
+    for prefix, group in groups.items():
+        if group.is_series():
+            # Wenn keine Staffeln erkannt wurden, setze Staffel 1 als Standard
+            series_dict[prefix] = group.seasons or {'1'}
+        else:
+            movie_groups.append(group)
+
+    # Nachbearbeitung: Filmtitel, die mit "<Serienname>:" beginnen, gehören zur Serie.
+    # Der Serienname enthält keinen Doppelpunkt, daher reicht ein Hash-Lookup mit dem
+    # (ungestrippten) Teil vor dem ersten Doppelpunkt statt eines Vergleichs mit jedem Präfix.
+    # Titel mit mehreren Doppelpunkten liegen durch REGEL 4 immer schon in einer Seriengruppe.
+    movies = set()
+    for group in movie_groups:
+        for title in group.titles:
+            head = features[title][1]
+            if head is not None and head in series_dict:
+                continue
+            movies.add(title)
+
+    # Bereite die Serienausgabe vor
+    series_list = []
+    for name, seasons in sorted(series_dict.items()):
+        seasons_sorted = sorted(seasons, key=lambda x: int(x))
+        seasons_str = ', '.join(seasons_sorted)
+        series_list.append(f"{name} (Staffel {seasons_str})")
+
+    return {
+        'movies': sorted(movies),
+        'series': series_list
+    }
+
+
+def analyze_netflix_history(file_path):
+    """
+    Analysiert Netflix-Verlaufsdaten, unterscheidet zwischen Filmen und Serien
+    und gruppiert Serien nach Staffeln.
+
+    Args:
+        file_path (str): Pfad zur Netflix-Verlaufsdatei (CSV)
+
+    Returns:
+        dict: Ein Dictionary mit Listen für 'movies' und 'series'
+    """
+    result = classify_titles(iter_titles(file_path))
+    print(f"Netflix-Verlauf analysiert: {len(result['movies'])} Filme, {len(result['series'])} Serien")
+    return result
@@ -0,0 +1,154 @@
+import re
+
+import numpy as np
+
+from taste_profile import item_rating
+
+# Gewichte der Merkmalsgruppen (Genres zählen am stärksten)
+FEATURE_WEIGHTS = {
+    'genre': 1.0,
+    'director': 0.6,
+    'platform': 0.5,
+    'decade': 0.4,
+    'type': 0.3
+}
+
+# Anteil der allgemeinen Qualität (IMDb- bzw. RAWG-Bewertung) am Ergebnis
+QUALITY_WEIGHT = 0.15
+
+# Gewicht nicht bewerteter Einträge im Profil (bewertete: -1 bis 1 je nach Sternen)
+UNRATED_WEIGHT = 0.3
+
+YEAR_RE = re.compile(r'(\d{4})')
+
+
+def _split(value):
+    if isinstance(value, list):
+        return [str(v).strip() for v in value if str(v).strip()]
+    return [part.strip() for part in (value or '').split(',') if part.strip()]
+
+
+def _year(value):
+    match = YEAR_RE.search(str(value or ''))
+    return int(match.group(1)) if match else None
+
+
+def movie_features(item):
+    """Merkmale eines Films/einer Serie als Liste von (Merkmal, Gewicht)."""
+    features = [(f'genre:{genre.casefold()}', FEATURE_WEIGHTS['genre']) for genre in _split(item.get('genre'))]
+    features += [(f'director:{director.casefold()}', FEATURE_WEIGHTS['director'])
+                 for director in _split(item.get('director'))]
+    year = _year(item.get('year'))
+    if year:
+        features.append((f'decade:{year // 10 * 10}', FEATURE_WEIGHTS['decade']))
+    if item.get('type'):
+        features.append((f"type:{item['type']}", FEATURE_WEIGHTS['type']))
+    return features
+
+
+def game_features(item):
+    """Merkmale eines Spiels als Liste von (Merkmal, Gewicht)."""
+    features = [(f'genre:{genre.casefold()}', FEATURE_WEIGHTS['genre']) for genre in _split(item.get('genre'))]
+    features += [(f'platform:{platform.casefold()}', FEATURE_WEIGHTS['platform'])
+                 for platform in _split(item.get('platforms'))]
+    year = _year(item.get('release_date'))
+    if year:
+        features.append((f'decade:{year // 10 * 10}', FEATURE_WEIGHTS['decade']))
+    return features
+
+
+def movie_quality(item):
+    """IMDb-Bewertung auf 0..1 normiert."""
+    try:
+        return min(1.0, max(0.0, float(item.get('imdbRating') or 0) / 10))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def game_quality(item):
+    """RAWG-Bewertung (0..5) auf 0..1 normiert."""
+    try:
+        return min(1.0, max(0.0, float(item.get('rawg_rating') or 0) / 5))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def profile_weight(item, rated_only=False):
+    """Einfluss eines Eintrags auf das Geschmacksprofil: gut bewertete ziehen an, schlecht bewertete stoßen ab."""
+    rating = item_rating(item)
+    if rating > 0:
+        return (rating - 2.5) / 2.5
+    return 0.0 if rated_only else UNRATED_WEIGHT
+
+
+def recommend(collection_items, catalog_items, features, quality=None, limit=10, rated_only=False,
+              catalog_features=None):
+    """
+    Inhaltsbasierte Empfehlungen ohne Netzwerk.
+
+    Die Sammlung wird zu einem gewichteten Profilvektor zusammengefasst und
+    per Kosinus-Ähnlichkeit mit allen Katalog-Einträgen verglichen (eine
+    Matrix-Vektor-Multiplikation). Spalten gibt es nur für Merkmale, die in der
+    Sammlung vorkommen; die Normen der Katalog-Einträge werden trotzdem über
+    alle ihre Merkmale berechnet, damit die Kosinus-Werte korrekt bleiben.
+
+    Args:
+        collection_items: Einträge der Sammlung (mit 'rating' des Benutzers)
+        catalog_items: Kandidaten (bereits ohne Einträge der Sammlung)
+        features: Funktion item -> [(Merkmal, Gewicht)], z.B. movie_features
+        quality: optionale Funktion item -> 0..1 für einen kleinen Qualitätsbonus
+        catalog_features: optional vorberechnete features() der Katalog-Einträge (gleiche Reihenfolge)
+
+    Returns:
+        list: [(Score, Katalog-Eintrag)] absteigend sortiert, höchstens 'limit'
+    """
+    if not catalog_items:
+        return []
+
+    # Profil als Merkmal -> Gewicht
+    columns = {}
+    profile_values = []
+    for item in collection_items:
+        weight = profile_weight(item, rated_only)
+        if not weight:
+            continue
+        item_features = features(item)
+        norm = np.sqrt(sum(w * w for _, w in item_features))
+        if not norm:
+            continue
+        for feature, w in item_features:
+            col = columns.setdefault(feature, len(columns))
+            if col == len(profile_values):
+                profile_values.append(0.0)
+            profile_values[col] += weight * w / norm
+
+    profile = np.array(profile_values, dtype=np.float32)
+    profile_norm = np.linalg.norm(profile)
+    if not columns or not profile_norm:
+        return []
+    profile /= profile_norm
+
+    matrix = np.zeros((len(catalog_items), len(columns)), dtype=np.float32)
+    norms = np.zeros(len(catalog_items), dtype=np.float32)
+    if catalog_features is None:
+        catalog_features = [features(item) for item in catalog_items]
+    for row, item_features in enumerate(catalog_features):
+        squared = 0.0
+        for feature, w in item_features:
+            squared += w * w
+            col = columns.get(feature)
+            if col is not None:
+                matrix[row, col] += w
+        norms[row] = np.sqrt(squared)
+
+    norms[norms == 0] = 1.0
+    scores = (matrix @ profile) / norms
+    if quality is not None:
+        quality_scores = np.fromiter((quality(item) for item in catalog_items), dtype=np.float32,
+                                     count=len(catalog_items))
+        scores = (1 - QUALITY_WEIGHT) * scores + QUALITY_WEIGHT * quality_scores
+
+    limit = min(limit, len(catalog_items))
+    top = np.argpartition(-scores, limit - 1)[:limit]
+    top = top[np.argsort(-scores[top], kind='stable')]
+    return [(float(scores[i]), catalog_items[i]) for i in top]
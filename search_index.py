@@ -0,0 +1,251 @@
+import heapq
+import threading
+import unicodedata
+
+import numpy as np
+
+from storage import item_key
+from title_index import NON_WORD_RE
+
+# Gewicht eines Treffers je Feld (ein Wort zählt mit dem höchsten Gewicht seiner Felder)
+FIELD_WEIGHTS = {
+    'title': 3.0,
+    'track_name': 3.0,
+    'artist': 2.0,
+    'director': 2.0,
+    'album': 1.5,
+    'genre': 1.0,
+    'platform': 1.0,
+    'notes': 0.5
+}
+
+# Abschläge für unscharfe Treffer gegenüber einem exakten Wort
+PREFIX_FACTOR = 0.9
+FUZZY_FACTOR = 0.8
+
+# Mindest-Ähnlichkeit (Dice-Koeffizient der Trigramme) für einen Tippfehler-Treffer
+FUZZY_THRESHOLD = 0.5
+
+# Kürzere Suchwörter werden nur exakt bzw. als Präfix gesucht
+FUZZY_MIN_LENGTH = 4
+
+# Höchstens so viele ähnliche Wörter pro Suchwort werden berücksichtigt
+MAX_EXPANSIONS = 20
+
+
+def normalize(text):
+    """Case-Folding und Akzente entfernen ("Amélie" -> "amelie")."""
+    text = str(text)
+    if text.isascii():
+        return text.casefold()
+    text = unicodedata.normalize('NFKD', text).casefold()
+    return ''.join(char for char in text if not unicodedata.combining(char))
+
+
+def tokenize(text):
+    if not text:
+        return []
+    return NON_WORD_RE.sub(' ', normalize(text)).split()
+
+
+def trigrams(token):
+    """Trigramme eines Wortes mit Rand-Markierung (' ab', 'abc', 'bc ')."""
+    padded = f' {token} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _as_list(value):
+    if isinstance(value, list):
+        return [str(v) for v in value if v]
+    return [value] if value else []
+
+
+def searchable_fields(collection, item):
+    """(Feld, Text)-Paare eines Eintrags für den Suchindex."""
+    if collection == 'music_tracks':
+        artists = item.get('artists') or []
+        fields = [('track_name', item.get('track_name') or item.get('query'))]
+        fields += [('artist', artist.get('artist_name')) for artist in artists]
+        fields.append(('album', (item.get('album') or {}).get('album_name')))
+        fields += [('genre', genre) for artist in artists for genre in artist.get('genres') or []]
+        return fields
+
+    fields = [('title', item.get('title')), ('genre', item.get('genre')), ('notes', item.get('notes'))]
+    if collection == 'games':
+        fields += [('platform', platform) for platform in _as_list(item.get('platforms'))]
+    else:
+        fields += [('director', item.get('director')), ('notes', item.get('overview'))]
+    return fields
+
+
+class SearchIndex:
+    """
+    Invertierter Volltext-Index einer Sammlung mit Tippfehler-Toleranz.
+
+    Jedes Wort verweist auf die Einträge, in denen es vorkommt (mit dem Gewicht
+    des wichtigsten Feldes); ein Trigramm-Index über den Wortschatz findet
+    Präfixe ("inter" -> "interstellar") und ähnliche Schreibweisen ("godfahter").
+    Wird von CachedStorage als Sicht gehalten und über add()/remove()
+    nachgeführt, eine Suche berührt daher nur die passenden Wörter.
+
+    Einträge haben intern fortlaufende Nummern (frei gewordene werden
+    wiederverwendet), damit die Scores einer Suche in NumPy-Arrays
+    aufsummiert werden können statt Eintrag für Eintrag in Python. Die
+    Reihenfolge der Sammlung hält davon getrennt eine Einfügenummer je Eintrag
+    fest; eine Aktualisierung (remove + add mit gleichem Schlüssel) behält sie.
+    """
+
+    def __init__(self, collection, items=()):
+        self.collection = collection
+        self.postings = {}   # Wort -> {Nummer: Gewicht}
+        self.trigrams = {}   # Trigramm -> Wörter
+        self.documents = {}  # Schlüssel -> (Nummer, {Wort: Gewicht})
+        self._items = []     # Nummer -> Eintrag (None, wenn frei)
+        self._free = []
+        self._sequence = np.zeros(0, dtype=np.int64)  # Nummer -> Einfügenummer (Reihenfolge der Sammlung)
+        self._next_sequence = 0
+        self._last_removed = None  # (Schlüssel, Einfügenummer) für remove + add einer Aktualisierung
+        self._lock = threading.Lock()
+
+        for item in items:
+            self.add(item)
+
+    def _key(self, item):
+        return item_key(self.collection, item) or item.get('title') or item.get('query')
+
+    def add(self, item):
+        key = self._key(item)
+        if key is None:
+            return
+        # Felder aufsteigend nach Gewicht: ein Wort behält das Gewicht seines wichtigsten Feldes
+        weights = {}
+        for field, text in sorted(searchable_fields(self.collection, item), key=lambda x: FIELD_WEIGHTS[x[0]]):
+            weights.update(dict.fromkeys(tokenize(text), FIELD_WEIGHTS[field]))
+
+        with self._lock:
+            self._remove_key(key)
+            if self._last_removed is not None and self._last_removed[0] == key:
+                sequence = self._last_removed[1]
+            else:
+                sequence = self._next_sequence
+                self._next_sequence += 1
+            self._last_removed = None
+
+            if self._free:
+                doc = self._free.pop()
+                self._items[doc] = item
+            else:
+                doc = len(self._items)
+                self._items.append(item)
+                if doc >= len(self._sequence):
+                    self._sequence = np.resize(self._sequence, max(16, 2 * doc))
+            self._sequence[doc] = sequence
+            self.documents[key] = (doc, weights)
+            for token, weight in weights.items():
+                postings = self.postings.get(token)
+                if postings is None:
+                    postings = self.postings[token] = {}
+                    for gram in trigrams(token):
+                        self.trigrams.setdefault(gram, set()).add(token)
+                postings[doc] = weight
+
+    def remove(self, item):
+        key = self._key(item)
+        with self._lock:
+            doc = self._remove_key(key)
+            self._last_removed = (key, int(self._sequence[doc])) if doc is not None else None
+
+    def _remove_key(self, key):
+        """Entfernt einen Eintrag und gibt seine (nun freie) Nummer zurück."""
+        document = self.documents.pop(key, None)
+        if document is None:
+            return None
+        doc, weights = document
+        self._items[doc] = None
+        self._free.append(doc)
+        for token in weights:
+            postings = self.postings[token]
+            postings.pop(doc, None)
+            if postings:
+                continue
+            # Wort kommt nicht mehr vor: aus Wortschatz und Trigramm-Index entfernen
+            del self.postings[token]
+            for gram in trigrams(token):
+                tokens = self.trigrams[gram]
+                tokens.discard(token)
+                if not tokens:
+                    del self.trigrams[gram]
+        return doc
+
+    def __len__(self):
+        return len(self.documents)
+
+    def _expand(self, term, prefix):
+        """Wörter des Index, die zu einem Suchwort passen, als [(Wort, Faktor)]."""
+        matches = {}
+        if term in self.postings:
+            matches[term] = 1.0
+
+        if prefix:
+            # Alle Trigramme von ' term' (ohne End-Markierung) müssen im Wort vorkommen
+            grams = [f' {term}'[i:i + 3] for i in range(len(term) - 1)]
+            sets = sorted((self.trigrams.get(gram, set()) for gram in grams), key=len)
+            candidates = set.intersection(*sets) if sets else set()
+            for token in candidates:
+                if token != term and token.startswith(term):
+                    matches.setdefault(token, PREFIX_FACTOR)
+
+        # Tippfehler nur suchen, wenn das Wort selbst nicht im Index steht
+        if term not in self.postings and len(term) >= FUZZY_MIN_LENGTH:
+            term_grams = trigrams(term)
+            shared = {}
+            for gram in term_grams:
+                for token in self.trigrams.get(gram, ()):
+                    shared[token] = shared.get(token, 0) + 1
+            for token, count in shared.items():
+                if token in matches:
+                    continue
+                # Ein Wort der Länge n hat (höchstens) n Trigramme mit Rand-Markierung
+                similarity = 2 * count / (len(term_grams) + len(token))
+                if similarity >= FUZZY_THRESHOLD:
+                    matches[token] = FUZZY_FACTOR * similarity
+
+        return heapq.nlargest(MAX_EXPANSIONS, matches.items(), key=lambda x: x[1])
+
+    def search(self, query, limit=20):
+        """
+        Sucht Einträge zu 'query'. Das letzte Suchwort gilt auch als Präfix (Suche beim Tippen).
+        Einträge, die nur einen Teil der Suchwörter enthalten, werden quadratisch abgewertet.
+        Die Scores sind zwischen den Sammlungen vergleichbar.
+
+        Returns:
+            list: [(Score, Eintrag)] absteigend sortiert, höchstens 'limit'
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+
+        with self._lock:
+            size = len(self._items)
+            scores = np.zeros(size, dtype=np.float32)
+            matched = np.zeros(size, dtype=np.float32)
+            for i, term in enumerate(terms):
+                # Bester Treffer des Suchworts je Eintrag (über alle passenden Wörter)
+                best = np.zeros(size, dtype=np.float32)
+                for token, factor in self._expand(term, prefix=i == len(terms) - 1):
+                    postings = self.postings[token]
+                    docs = np.fromiter(postings.keys(), dtype=np.int64, count=len(postings))
+                    weights = np.fromiter(postings.values(), dtype=np.float32, count=len(postings))
+                    best[docs] = np.maximum(best[docs], weights * factor)
+                scores += best
+                matched += best > 0
+
+            scores *= (matched / len(terms)) ** 2
+            hits = np.flatnonzero(scores)
+            if len(hits) > limit:
+                # Alle Einträge mit mindestens dem 'limit'-höchsten Score (Gleichstände an der Grenze inklusive)
+                threshold = np.partition(scores[hits], len(hits) - limit)[len(hits) - limit]
+                hits = hits[scores[hits] >= threshold]
+            # Bei gleichem Score in Reihenfolge der Sammlung (Einfügenummer, nicht Nummer des Eintrags)
+            hits = hits[np.lexsort((self._sequence[hits], -scores[hits]))][:limit]
+            return [(round(float(scores[doc]), 3), self._items[doc]) for doc in hits]
@@ -0,0 +1,233 @@
+import time
+import base64
+import threading
+
+from enrichment import SingleFlight
+from title_index import title_key
+
+TOKEN_URL = "https://accounts.spotify.com/api/token"
+API_URL = "https://api.spotify.com/v1"
+
+# Token so viele Sekunden vor Ablauf erneuern
+TOKEN_REFRESH_MARGIN = 60
+
+# Maximale Anzahl IDs pro Anfrage an /v1/tracks bzw. /v1/artists
+BATCH_SIZE = 50
+
+
+def select_best_image(images):
+    if not images:
+        return None
+    # Wähle das Bild mit maximaler Breite
+    best = max(images, key=lambda x: x.get('width', 0))
+    return best.get('url')
+
+
+def track_document(query, track_data, artists_by_id):
+    """
+    Baut das in music_tracks.json gespeicherte Dokument eines Tracks aus der Antwort
+    von /v1/search bzw. /v1/tracks und den Daten aus /v1/artists.
+
+    Das Schema entspricht dem früheren Abruf pro Track, mit einer bewussten Erweiterung:
+    'album.album_release_date' (für die Jahre in der Musik-Statistik). Vorher
+    gespeicherte Tracks haben das Feld nicht und zählen dort als ohne Jahr.
+    Künstler ohne geladene Daten fehlen wie bisher.
+    """
+    track_info = {
+        "query": query,
+        "track_id": track_data.get("id"),
+        "track_name": track_data.get("name"),
+        "track_spotify_link": track_data.get("external_urls", {}).get("spotify"),
+        "popularity": track_data.get("popularity")
+    }
+
+    # Album-Informationen
+    album = track_data.get("album", {})
+    track_info["album"] = {
+        "album_name": album.get("name"),
+        "album_spotify_link": album.get("external_urls", {}).get("spotify"),
+        "album_image": select_best_image(album.get("images", [])),
+        "album_release_date": album.get("release_date")
+    }
+
+    # Künstler-Informationen
+    artists_info = []
+    for artist in track_data.get("artists", []):
+        artist_id = artist.get("id")
+        artist_data = artists_by_id.get(artist_id)
+        if artist_data is None:
+            print(f"Keine Künstlerdaten für ID '{artist_id}'")
+            continue
+        artists_info.append({
+            "artist_id": artist_id,
+            "artist_name": artist.get("name"),
+            "artist_spotify_link": artist.get("external_urls", {}).get("spotify"),
+            "genres": artist_data.get("genres", []),
+            "artist_image": select_best_image(artist_data.get("images", []))
+        })
+    track_info["artists"] = artists_info
+    return track_info
+
+
+class SpotifyClient:
+    """
+    Langlebiger Spotify-Client für Importe und Musikvorschläge.
+
+    Das Client-Credentials-Token wird bis kurz vor Ablauf wiederverwendet.
+    Suchergebnisse und Künstlerdaten liegen in ApiCache-Instanzen im Speicher
+    und werden von diesen gesammelt auf die Platte geschrieben. Gleichzeitige
+    Anfragen für dieselbe Suche teilen sich einen Aufruf; Tracks und Künstler
+    mit bekannter ID werden gesammelt in Paketen zu je 50 abgefragt.
+    """
+
+    def __init__(self, credentials, http_client, search_cache, artist_cache):
+        """
+        Args:
+            credentials: Funktion, die (client_id, client_secret) liefert (z.B. aus den Einstellungen)
+            http_client: gemeinsamer HttpClient
+            search_cache: ApiCache für Suchergebnisse (Schlüssel: normalisierte Suchanfrage) und Tracks ("track:<id>")
+            artist_cache: ApiCache für Künstlerdaten (Schlüssel: Künstler-ID)
+        """
+        self.credentials = credentials
+        self.http = http_client
+        self.search_cache = search_cache
+        self.artist_cache = artist_cache
+        self.search_flight = SingleFlight()
+
+        self._token_lock = threading.Lock()
+        self._token = None
+        self._token_expires = 0
+        self._token_credentials = None
+        self._stats = {'token_requests': 0}
+
+    def token(self):
+        """Gibt ein gültiges Access-Token zurück und holt nur bei Bedarf ein neues."""
+        credentials = tuple(self.credentials())
+        with self._token_lock:
+            if (self._token and credentials == self._token_credentials
+                    and time.time() < self._token_expires - TOKEN_REFRESH_MARGIN):
+                return self._token
+
+            client_id, client_secret = credentials
+            auth_str = f"{client_id}:{client_secret}"
+            b64_auth_str = base64.b64encode(auth_str.encode()).decode()
+            headers = {
+                "Authorization": f"Basic {b64_auth_str}",
+                "Content-Type": "application/x-www-form-urlencoded"
+            }
+            data = {"grant_type": "client_credentials"}
+            response = self.http.post(TOKEN_URL, provider='spotify', headers=headers, data=data)
+            response.raise_for_status()
+            payload = response.json()
+
+            self._token = payload['access_token']
+            self._token_expires = time.time() + payload.get('expires_in', 3600)
+            self._token_credentials = credentials
+            self._stats['token_requests'] += 1
+            return self._token
+
+    def invalidate_token(self):
+        with self._token_lock:
+            self._token = None
+
+    def _get(self, path, params=None):
+        """GET gegen die Web-API; bei 401 (Token widerrufen/abgelaufen) einmal mit neuem Token."""
+        for attempt in range(2):
+            headers = {"Authorization": f"Bearer {self.token()}"}
+            response = self.http.get(f"{API_URL}{path}", provider='spotify', headers=headers, params=params)
+            if response.status_code == 401 and attempt == 0:
+                self.invalidate_token()
+                continue
+            response.raise_for_status()
+            return response.json()
+
+    def _cached(self, cache, flight, key, fetch, refresh=False, job=None):
+        """Gemeinsamer Ablauf: Cache, dann ein gebündelter API-Aufruf, Ergebnis cachen."""
+        if not refresh:
+            cached = cache.get(key)
+            if cached is not None:
+                if job:
+                    job.record_cache_hit()
+                return cached
+
+        def request():
+            if not refresh:
+                # Ein eben beendeter Aufruf für denselben Schlüssel könnte schon im Cache liegen
+                cached = cache.peek(key)
+                if cached is not None:
+                    return cached, False
+            data = fetch()
+            cache.set(key, data)
+            return data, True
+
+        (data, from_api), shared = flight.do(key, request)
+        if job:
+            if from_api and not shared:
+                job.record_api_call()
+            else:
+                job.record_cache_hit()
+        return data
+
+    def search_track(self, query, refresh=False, job=None):
+        """
+        Sucht einen Track (erstes Ergebnis) und gibt die Suchantwort zurück. Cache und
+        gebündelte Aufrufe verwenden den normalisierten Titel-Schlüssel, sodass sich
+        Anfragen, die sich nur in Groß-/Kleinschreibung oder Leerzeichen unterscheiden,
+        einen Eintrag teilen.
+        """
+        key = title_key(query) or query
+        if not refresh and key != query and self.search_cache.peek(key) is None:
+            # Einträge älterer Versionen liegen noch unter der unveränderten Anfrage
+            legacy = self.search_cache.peek(query)
+            if legacy is not None:
+                self.search_cache.set(key, legacy)
+
+        def fetch():
+            return self._get("/search", {"q": query, "type": "track", "limit": 1})
+        # Gleichzeitige Suchen nach derselben Anfrage teilen sich einen Aufruf
+        return self._cached(self.search_cache, self.search_flight, key, fetch, refresh, job)
+
+    def get_tracks(self, track_ids, refresh=False, job=None):
+        """Lädt Tracks über /v1/tracks?ids=. Gibt {id: Track} zurück (unbekannte IDs fehlen)."""
+        return self._batch(self.search_cache, 'track:', '/tracks', 'tracks', track_ids, refresh, job)
+
+    def get_artists(self, artist_ids, refresh=False, job=None):
+        """Lädt Künstlerdaten (u.a. Genres und Bilder) über /v1/artists?ids=. Gibt {id: Künstler} zurück."""
+        return self._batch(self.artist_cache, '', '/artists', 'artists', artist_ids, refresh, job)
+
+    def _batch(self, cache, prefix, path, field, ids, refresh, job):
+        """Nimmt bekannte IDs aus dem Cache und fragt die übrigen in Paketen zu je BATCH_SIZE ab."""
+        result = {}
+        missing = []
+        for item_id in dict.fromkeys(item_id for item_id in ids if item_id):
+            cached = None if refresh else cache.get(prefix + item_id)
+            if cached is not None:
+                result[item_id] = cached
+                if job:
+                    job.record_cache_hit()
+            else:
+                missing.append(item_id)
+
+        for start in range(0, len(missing), BATCH_SIZE):
+            chunk = missing[start:start + BATCH_SIZE]
+            try:
+                data = self._get(path, {"ids": ",".join(chunk)})
+            except Exception as e:
+                print(f"Fehler bei der Spotify-Abfrage {path} für {len(chunk)} IDs: {e}")
+                continue
+            if job:
+                job.record_api_call()
+            # Die Antwort hat dieselbe Reihenfolge wie die IDs; unbekannte IDs liefern null
+            for item_id, item in zip(chunk, data.get(field) or []):
+                if item:
+                    cache.set(prefix + item_id, item)
+                    result[item_id] = item
+        return result
+
+    def stats(self):
+        return {
+            'token_requests': self._stats['token_requests'],
+            'search_cache': self.search_cache.stats(),
+            'artist_cache': self.artist_cache.stats(),
+            'search_flight': self.search_flight.stats()
+        }
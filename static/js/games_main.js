@@ -4,6 +4,7 @@ let currentGameIndex = 0;
 let filteredGames = [];
 let activeGameViewType = 'all';
 let editingGameId = null;
+let gamesVersion = null; // Collection version for delta sync (/api/games/changes)
 
 // DOM elements specific to games
 const gameContainer = document.getElementById('gameContainer');
@@ -41,21 +42,69 @@ const gameApiErrorMessage = document.getElementById('gameApiErrorMessage');
 const gameSearchResultsContainer = document.getElementById('gameSearchResultsContainer');
 const gameSearchResults = document.getElementById('gameSearchResults');
 
-// Fetch games from the server
+function showGames(items) {
+  games = items;
+  updateGameFilterOptions();
+  applyGameFiltersAndSearch();
+}
+
+// Fetch games from the server page by page (see fetchCollectionPages in main.js)
 function fetchGames() {
-  fetch('/api/games')
+  fetchCollectionPages('/api/games', showGames)
+    .then(({ items, version }) => {
+      gamesVersion = version;
+      showGames(items);
+    })
+    .catch(error => {
+      console.error('Error fetching games:', error);
+      showNotification('Error loading games. Please check the console for details.', 'error');
+    });
+}
+
+// Fetch only the changes since the last known version and merge them into the local list
+function syncGames() {
+  if (gamesVersion === null) {
+    fetchGames();
+    return;
+  }
+
+  fetch(`/api/games/changes?since=${encodeURIComponent(gamesVersion)}`)
     .then(response => response.json())
     .then(data => {
-      games = data;
+      if (data.reset) {
+        games = data.items;
+      } else {
+        if (data.changed.length === 0 && data.deleted.length === 0) {
+          gamesVersion = data.version;
+          return;
+        }
+        const deletedIds = new Set(data.deleted);
+        games = games.filter(g => !deletedIds.has(String(g.id)));
+        data.changed.forEach(changedGame => {
+          const index = games.findIndex(g => g.id === changedGame.id);
+          if (index !== -1) {
+            games[index] = changedGame;
+          } else {
+            games.push(changedGame);
+          }
+        });
+      }
+      gamesVersion = data.version;
       updateGameFilterOptions();
       applyGameFiltersAndSearch();
     })
     .catch(error => {
-      console.error('Error fetching games:', error);
-      showNotification('Error loading games. Please check the console for details.', 'error');
+      console.error('Error syncing games:', error);
     });
 }
 
+// Keep open tabs up to date when they become visible again
+document.addEventListener('visibilitychange', () => {
+  if (document.visibilityState === 'visible' && localStorage.getItem('omnibaseMode') === 'Games') {
+    syncGames();
+  }
+});
+
 // Tab switching for Add Game section
 gameApiTabBtn.addEventListener('click', () => {
   gameApiForm.classList.remove('hidden');
@@ -199,14 +248,10 @@ function addGameToCollection(gameData) {
     notes: gameData.notes || ''
   };
   
-  fetch('/api/add_game', {  // Use our new endpoint
-    method: 'POST',
-    headers: {
-      'Content-Type': 'application/json'
-    },
-    body: JSON.stringify(cleanGameData)
-  })
+  // Duplikate werden per Rückfrage bestätigt (postCollectionItem() in main.js)
+  postCollectionItem('/api/add_game', cleanGameData)
   .then(response => {
+    if (!response) return null;
     if (!response.ok) {
       console.error('Error response:', response.status, response.statusText);
       throw new Error('Failed to add game');
@@ -214,6 +259,7 @@ function addGameToCollection(gameData) {
     return response.json();
   })
   .then(data => {
+    if (!data) return; // Duplikat, nicht hinzugefügt
     if (data.success) {
       // Add game to local array
       games.push(data.game);
@@ -307,20 +353,17 @@ addGameForm.addEventListener('submit', (e) => {
     });
   } else {
     // Adding a new game
-    fetch('/api/games', {
-      method: 'POST',
-      headers: {
-        'Content-Type': 'application/json'
-      },
-      body: JSON.stringify(gameData)
-    })
+    postCollectionItem('/api/games', gameData)
     .then(response => {
+      if (!response) return null;
       if (!response.ok) {
         throw new Error('Failed to add game');
       }
       return response.json();
     })
     .then(savedGame => {
+      if (!savedGame) return; // Duplikat, nicht hinzugefügt
+
       // Add game to local array
       games.push(savedGame);
       updateGameFilterOptions();
@@ -1112,51 +1155,41 @@ let gameCurrentChartType = 'pie';
 
 // Game Stats aktualisieren - mit besserer Fehlerbehandlung
 function updateGameStats() {
+  // Kennzahlen kommen fertig vom Server (bei jeder Änderung nachgeführt)
+  fetch('/api/stats/games')
+    .then(response => response.json())
+    .then(renderGameStats)
+    .catch(error => console.error("Error loading game stats:", error));
+}
+function renderGameStats(stats) {
   try {
     console.log("Updating game stats...");
     
-    // Collection Overview aktualisieren - das funktioniert bereits
-    const pcCount = games.filter(g => g.platforms && g.platforms.some(p => 
-      p.toLowerCase().includes('pc') || p.toLowerCase().includes('windows'))).length;
-    const consoleCount = games.filter(g => g.platforms && g.platforms.some(p => 
-      p.toLowerCase().includes('playstation') || 
-      p.toLowerCase().includes('xbox') || 
-      p.toLowerCase().includes('nintendo') || 
-      p.toLowerCase().includes('switch'))).length;
-    const ratedCount = games.filter(g => g.rating > 0).length;
-    const notRatedCount = games.length - ratedCount;
+    // Collection Overview aktualisieren
+    const totalCount = stats.total;
+    const pcCount = stats.types.pc || 0;
+    const consoleCount = stats.types.console || 0;
+    const ratedCount = stats.rated;
+    const notRatedCount = stats.not_rated;
     
     // UI-Elemente aktualisieren
     document.getElementById('pcGameCount').textContent = pcCount;
     document.getElementById('consoleGameCount').textContent = consoleCount;
     document.getElementById('ratedGameCount').textContent = ratedCount;
     document.getElementById('notRatedGameCount').textContent = notRatedCount;
-    document.getElementById('totalGamesCount').textContent = games.length;
+    document.getElementById('totalGamesCount').textContent = totalCount;
     
     // Prozentangaben berechnen und anzeigen
-    if (games.length > 0) {
-      document.getElementById('pcGamePercentage').textContent = `(${Math.round(pcCount / games.length * 100)}%)`;
-      document.getElementById('consoleGamePercentage').textContent = `(${Math.round(consoleCount / games.length * 100)}%)`;
-      document.getElementById('ratedGamePercentage').textContent = `(${Math.round(ratedCount / games.length * 100)}%)`;
-      document.getElementById('notRatedGamePercentage').textContent = `(${Math.round(notRatedCount / games.length * 100)}%)`;
+    if (totalCount > 0) {
+      document.getElementById('pcGamePercentage').textContent = `(${Math.round(pcCount / totalCount * 100)}%)`;
+      document.getElementById('consoleGamePercentage').textContent = `(${Math.round(consoleCount / totalCount * 100)}%)`;
+      document.getElementById('ratedGamePercentage').textContent = `(${Math.round(ratedCount / totalCount * 100)}%)`;
+      document.getElementById('notRatedGamePercentage').textContent = `(${Math.round(notRatedCount / totalCount * 100)}%)`;
     }
     
-    // Genre-Verteilung berechnen
-    const genreCounts = {};
-    games.forEach(game => {
-      if (game.genre) {
-        game.genre.split(',').forEach(g => {
-          const genre = g.trim();
-          if (genre) {
-            genreCounts[genre] = (genreCounts[genre] || 0) + 1;
-          }
-        });
-      }
-    });
-    
     // Chart-Daten vorbereiten
-    const genreLabels = Object.keys(genreCounts);
-    const genreData = Object.values(genreCounts);
+    const genreLabels = Object.keys(stats.genres);
+    const genreData = Object.values(stats.genres);
     
     // Chart erstellen - prüfen, ob Chart.js verfügbar ist
     const chartCtx = document.getElementById('gameGenreChart');
@@ -1242,10 +1275,7 @@ function updateGameStats() {
     // Lieblingsspiele aktualisieren
     const favoritesList = document.getElementById('gameFavoritesList');
     if (favoritesList) {
-      const favoriteGames = games
-        .filter(g => g.rating > 0)
-        .sort((a, b) => b.rating - a.rating)
-        .slice(0, 10);
+      const favoriteGames = stats.favorites;
       
       if (favoriteGames.length > 0) {
         let html = '<ul class="space-y-2">';
@@ -1655,16 +1685,17 @@ document.addEventListener('DOMContentLoaded', function() {
         contentType,
         suggestionCount,
         description,
-        favorites: gameFavoritesList
+        favorites: gameFavoritesList,
+        provider: document.getElementById('gameSuggestionProvider').value
       };
       console.log(JSON.stringify(requestData))
-      // API-Anfrage senden
+      // API-Anfrage senden (gleiche Eingaben erneut = neu generieren, umgeht den KI-Cache)
       fetch('/api/ai_suggestions', {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json'
         },
-        body: JSON.stringify(requestData)
+        body: JSON.stringify(withRegenerate('gameSuggestions', requestData))
       })
       .then(response => response.json())
       .then(data => {
@@ -1831,16 +1862,17 @@ document.addEventListener('DOMContentLoaded', function() {
         contentType,
         suggestionCount,
         description,
-        favorites: gameFavoritesList
+        favorites: gameFavoritesList,
+        provider: document.getElementById('gameSuggestionProvider').value
       };
       console.log(JSON.stringify(requestData))
-      // API-Anfrage senden
+      // API-Anfrage senden (gleiche Eingaben erneut = neu generieren, umgeht den KI-Cache)
       fetch('/api/ai_suggestions', {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json'
         },
-        body: JSON.stringify(requestData)
+        body: JSON.stringify(withRegenerate('gameSuggestions', requestData))
       })
       .then(response => response.json())
       .then(data => {
@@ -2138,13 +2170,13 @@ document.getElementById('generateGamePersonaBtn').addEventListener('click', () =
   // Ausgabeanweisungen formatieren
   prompt += " Please respond ONLY with a JSON object in this format: {\"persona\":\"1-2 word description\", \"description\":\"4-5 sentences about my gaming profile\"}. Do not include any other text. Please provide tge Text in the Language '"+currentLanguage+"'";
   
-  // AI-Aufruf zur Generierung der Persona
+  // AI-Aufruf zur Generierung der Persona (erneutes Generieren umgeht den Cache)
   fetch('/api/ask_ai', {
     method: 'POST',
     headers: {
       'Content-Type': 'application/json'
     },
-    body: JSON.stringify({ message: prompt })
+    body: JSON.stringify(withRegenerate('gamePersona', { message: prompt }))
   })
   .then(response => response.json())
   .then(data => {
@@ -2268,15 +2300,27 @@ document.addEventListener('DOMContentLoaded', function () {
       const formData = new FormData();
       formData.append('file', gamesCsvFileInput.files[0]);
   
-      // API-Aufruf an den Games-Import Endpunkt
+      const originalText = gamesImportBtn.textContent;
+      gamesImportBtn.disabled = true;
+
+      // API-Aufruf an den Games-Import Endpunkt; der Import läuft als Hintergrund-Job,
+      // dessen Fortschritt per pollImportJob() (main.js) abgefragt wird
       fetch('/api/import/games', {
         method: 'POST',
         body: formData
       })
         .then(response => response.json())
         .then(data => {
-          if (data.success) {
-            showNotification(`Imported ${data.imported} game items successfully! (${data.skipped} skipped)`);
+          if (!data.success) {
+            throw new Error(data.error);
+          }
+          return pollImportJob(data.job_id, job => {
+            gamesImportBtn.textContent = formatJobProgress(job);
+          });
+        })
+        .then(job => {
+          if (job.status === 'completed') {
+            showNotification(`Imported ${job.imported} game items successfully! (${job.skipped} skipped)`);
             // Hier wird angenommen, dass es eine fetchGames()-Funktion gibt,
             // die die Games-Collection neu lädt.
             if (typeof fetchGames === 'function') {
@@ -2284,14 +2328,19 @@ document.addEventListener('DOMContentLoaded', function () {
             }
             gamesCsvFileInput.value = '';
             gamesSelectedFileName.classList.add('hidden');
-            gamesImportBtn.disabled = true;
+          } else if (job.status === 'cancelled') {
+            showNotification('Import cancelled.', 'error');
           } else {
-            showNotification(`Error: ${data.error}`, 'error');
+            showNotification(`Error: ${job.error}`, 'error');
           }
         })
         .catch(error => {
           console.error('Error importing games CSV:', error);
           showNotification('Error importing games CSV. Please check the console for details.', 'error');
+        })
+        .finally(() => {
+          gamesImportBtn.textContent = originalText;
+          gamesImportBtn.disabled = gamesCsvFileInput.files.length === 0;
         });
     });
   
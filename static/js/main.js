@@ -7,6 +7,7 @@ let activeViewType = 'all';
 let darkMode = localStorage.getItem('darkMode') === 'true';
 let genreChart; // Chart.js object for stats
 let editingMovieId = null; // ID of the movie being edited
+let moviesVersion = null; // Collection version for delta sync (/api/movies/changes)
 let currentMode = "";
 let mainColor = localStorage.getItem('mainColor') || '#667EEA'; // Default indigo color
 let userSettings = {}; // Store user settings
@@ -601,15 +602,11 @@ addMovieForm.addEventListener('submit', (e) => {
     };
 
     // Sende die Filmdaten an den Server via API
-    fetch('/api/movies', {
-      method: 'POST',
-      headers: {
-        'Content-Type': 'application/json'
-      },
-      body: JSON.stringify(movie)
-    })
-    .then(response => response.json())
+    postCollectionItem('/api/movies', movie)
+    .then(response => response ? response.json() : null)
     .then(savedMovie => {
+      if (!savedMovie) return; // Duplikat, nicht hinzugefügt
+
       // Füge den gespeicherten Film (mit vom Server zugewiesener ID) zum lokalen Array hinzu
       movies.push(savedMovie);
       resetForm();
@@ -709,34 +706,250 @@ importBtn.addEventListener('click', () => {
   const formData = new FormData();
   formData.append('file', csvFileInput.files[0]);
 
+  const originalText = importBtn.textContent;
+  importBtn.disabled = true;
+
+  // The import runs as a background job on the server; poll it until it has finished
   fetch('/api/import/netflix', {
     method: 'POST',
     body: formData
   })
   .then(response => response.json())
   .then(data => {
-    if (data.success) {
-      showNotification(`Imported ${data.imported} items successfully! (${data.skipped} skipped)`);
+    if (!data.success) {
+      throw new Error(data.error);
+    }
+    return pollImportJob(data.job_id, job => {
+      importBtn.textContent = formatJobProgress(job);
+    });
+  })
+  .then(job => {
+    if (job.status === 'completed') {
+      showNotification(`Imported ${job.imported} items successfully! (${job.skipped} skipped)`);
       fetchMovies();
       csvFileInput.value = '';
       selectedFileName.classList.add('hidden');
-      importBtn.disabled = true;
+    } else if (job.status === 'cancelled') {
+      showNotification('Import cancelled.', 'error');
     } else {
-      showNotification(`Error: ${data.error}`, 'error');
+      showNotification(`Error: ${job.error}`, 'error');
     }
   })
   .catch(error => {
     console.error('Error importing Netflix history:', error);
     showNotification('Error importing Netflix history. Please check the console for details.', 'error');
+  })
+  .finally(() => {
+    importBtn.textContent = originalText;
+    importBtn.disabled = csvFileInput.files.length === 0;
   });
 });
 
-// Fetch movies from the server
+// POST a new movie/game to the collection. If the server reports a duplicate (409),
+// ask the user and resend with allowDuplicate (e.g. for remakes).
+// Resolves with the response, or null if the duplicate should not be added.
+// Also used by games_main.js.
+function postCollectionItem(url, item) {
+  const send = body => fetch(url, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json'
+    },
+    body: JSON.stringify(body)
+  });
+
+  return send(item).then(response => {
+    if (response.status !== 409) return response;
+    return response.json().then(data => {
+      const message = data.error || data.message || 'This title is already in your collection.';
+      if (!confirm(`${message}\n\nAdd it anyway?`)) return null;
+      return send({ ...item, allowDuplicate: true });
+    });
+  });
+}
+
+// Poll a background import job until it has finished and resolve with its final state.
+// Used by the Netflix, games and music imports.
+function pollImportJob(jobId, onProgress, interval = 1000) {
+  return new Promise((resolve, reject) => {
+    const poll = () => {
+      fetch(`/api/jobs/${encodeURIComponent(jobId)}`)
+        .then(response => response.json())
+        .then(job => {
+          if (!job.status) {
+            reject(new Error(job.error || 'Unknown job'));
+            return;
+          }
+          if (onProgress) onProgress(job);
+          if (['completed', 'failed', 'cancelled'].includes(job.status)) {
+            resolve(job);
+          } else {
+            setTimeout(poll, interval);
+          }
+        })
+        .catch(reject);
+    };
+    poll();
+  });
+}
+
+// Short progress text for an import job, e.g. "Importing... 120/800 (~45s left)"
+function formatJobProgress(job) {
+  if (job.status === 'queued') return 'Waiting...';
+  let text = `Importing... ${job.processed}/${job.total !== null ? job.total : '?'}`;
+  if (job.eta_seconds !== null) {
+    text += ` (~${Math.ceil(job.eta_seconds)}s left)`;
+  }
+  return text;
+}
+
+// Last request per AI feature (suggestions, personas, Ask AI)
+const lastAiRequests = {};
+
+// AI answers are cached on the server for identical inputs. Sending the same request again
+// is an explicit "regenerate", so it bypasses the cache and returns new results.
+function withRegenerate(feature, requestData) {
+  const signature = JSON.stringify(requestData);
+  const regenerate = lastAiRequests[feature] === signature;
+  lastAiRequests[feature] = signature;
+  return regenerate ? { ...requestData, bypassCache: true } : requestData;
+}
+
+// Ask the AI via /api/ask_ai/stream (Server-Sent Events) and call onToken for every chunk
+// as it arrives. Resolves with the complete answer, rejects on an 'error' event.
+function streamAiAnswer(message, onToken) {
+  return fetch('/api/ask_ai/stream', {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json'
+    },
+    body: JSON.stringify(withRegenerate('askAi', { message }))
+  }).then(response => {
+    if (!response.ok || !response.body) {
+      return response.json().then(data => { throw new Error(data.message || 'AI request failed'); });
+    }
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let answer = '';
+
+    const handleEvent = raw => {
+      let event = 'message';
+      let data = '';
+      raw.split('\n').forEach(line => {
+        if (line.startsWith('event: ')) event = line.slice(7);
+        else if (line.startsWith('data: ')) data += line.slice(6);
+      });
+      if (!data) return false;
+      const payload = JSON.parse(data);
+      if (event === 'error') throw new Error(payload.message);
+      if (event === 'done') {
+        answer = payload.answer;
+        return true;
+      }
+      answer += payload.token;
+      onToken(payload.token, answer);
+      return false;
+    };
+
+    const read = () => reader.read().then(({ done, value }) => {
+      buffer += decoder.decode(value || new Uint8Array(), { stream: !done });
+      let index;
+      while ((index = buffer.indexOf('\n\n')) !== -1) {
+        const raw = buffer.slice(0, index);
+        buffer = buffer.slice(index + 2);
+        if (handleEvent(raw)) return answer;
+      }
+      return done ? answer : read();
+    });
+    return read();
+  });
+}
+
+// Page size for loading collections through the cursor API (server maximum: 500)
+const COLLECTION_PAGE_SIZE = 500;
+
+// Loads a collection page by page (?limit=&cursor=). onFirstPage(items) is called as soon as
+// the first page arrives if more pages follow, so the UI can render before the rest is loaded.
+// Resolves with all items and the collection version of the first page (for delta sync).
+function fetchCollectionPages(url, onFirstPage) {
+  const items = [];
+  let version = null;
+
+  const loadPage = cursor => {
+    const params = new URLSearchParams({ limit: COLLECTION_PAGE_SIZE });
+    if (cursor) params.set('cursor', cursor);
+    return fetch(`${url}?${params}`)
+      .then(response => {
+        if (!response.ok) throw new Error(`Failed to load ${url}: ${response.status}`);
+        if (version === null) version = response.headers.get('X-Collection-Version');
+        return response.json();
+      })
+      .then(page => {
+        page.items.forEach(item => items.push(item));
+        if (!page.nextCursor) return { items, version };
+        if (!cursor && onFirstPage) onFirstPage(items.slice());
+        return loadPage(page.nextCursor);
+      });
+  };
+  return loadPage(null);
+}
+
+function showMovies(items, resetIndex = true) {
+  movies = items;
+  movies.forEach(movie => {
+    if (!movie.type) movie.type = 'movie';
+  });
+  updateFilterOptions();
+  applyFiltersAndSearch(resetIndex);
+}
+
+// Fetch movies from the server (first page is shown right away, the rest follows via the cursor)
 function fetchMovies() {
-  fetch('/api/movies')
+  let shownFirstPage = false;
+  fetchCollectionPages('/api/movies', firstPage => {
+    shownFirstPage = true;
+    showMovies(firstPage);
+  })
+    .then(({ items, version }) => {
+      moviesVersion = version;
+      showMovies(items, !shownFirstPage);
+    })
+    .catch(error => {
+      console.error('Error fetching movies:', error);
+      showNotification('Error loading movies. Please check the console for details.', 'error');
+    });
+}
+
+// Fetch only the changes since the last known version and merge them into the local list
+function syncMovies() {
+  if (moviesVersion === null) {
+    fetchMovies();
+    return;
+  }
+
+  fetch(`/api/movies/changes?since=${encodeURIComponent(moviesVersion)}`)
     .then(response => response.json())
     .then(data => {
-      movies = data;
+      if (data.reset) {
+        movies = data.items;
+      } else {
+        if (data.changed.length === 0 && data.deleted.length === 0) {
+          moviesVersion = data.version;
+          return;
+        }
+        const deletedIds = new Set(data.deleted);
+        movies = movies.filter(m => !deletedIds.has(String(m.id)));
+        data.changed.forEach(changedMovie => {
+          const index = movies.findIndex(m => m.id === changedMovie.id);
+          if (index !== -1) {
+            movies[index] = changedMovie;
+          } else {
+            movies.push(changedMovie);
+          }
+        });
+      }
+      moviesVersion = data.version;
       movies.forEach(movie => {
         if (!movie.type) movie.type = 'movie';
       });
@@ -744,11 +957,17 @@ function fetchMovies() {
       applyFiltersAndSearch();
     })
     .catch(error => {
-      console.error('Error fetching movies:', error);
-      showNotification('Error loading movies. Please check the console for details.', 'error');
+      console.error('Error syncing movies:', error);
     });
 }
 
+// Keep open tabs up to date when they become visible again
+document.addEventListener('visibilitychange', () => {
+  if (document.visibilityState === 'visible' && localStorage.getItem('omnibaseMode') !== 'Games' && localStorage.getItem('omnibaseMode') !== 'Music') {
+    syncMovies();
+  }
+});
+
 // Search and filter functionality
 searchInput.addEventListener('input', debounce(() => {
   applyFiltersAndSearch();
@@ -1548,27 +1767,20 @@ function askAI() {
     askButton.disabled = true;
     askButton.innerHTML = '<i class="fas fa-spinner fa-spin mr-1"></i> Getting recommendations...';
   
-    // Call the API
-    fetch('/api/ask_ai', {
-      method: 'POST',
-      headers: {
-        'Content-Type': 'application/json'
-      },
-      body: JSON.stringify({ message: prompt })
+    // Call the API and show the answer while it is being generated
+    const responseElement = document.getElementById('aiResponse');
+    responseElement.textContent = '';
+    streamAiAnswer(prompt, (token, answer) => {
+      document.getElementById('aiResponseContainer').classList.remove('hidden');
+      responseElement.textContent = answer;
     })
-    .then(response => response.json())
-    .then(data => {
+    .then(answer => {
       // Reset button
       askButton.disabled = false;
       askButton.textContent = originalText;
-    
-      if (data.success) {
-        // Show the response
-        document.getElementById('aiResponseContainer').classList.remove('hidden');
-        document.getElementById('aiResponse').textContent = data.answer;
-      } else {
-        showNotification(`Error: ${data.message}`, 'error');
-      }
+
+      document.getElementById('aiResponseContainer').classList.remove('hidden');
+      responseElement.textContent = answer;
     })
     .catch(error => {
       // Reset button
@@ -1617,11 +1829,18 @@ function showNotification(message, type = 'success') {
 
 // Function to update the Stats section
 function updateStats() {
-  const totalCount = movies.length;
-  const movieCount = movies.filter(m => m.type === 'movie').length;
-  const seriesCount = movies.filter(m => m.type === 'series').length;
-  const ratedCount = movies.filter(m => m.rating > 0).length;
-  const notRatedCount = movies.filter(m => !m.rating || m.rating === 0).length;
+  // Die Kennzahlen führt der Server bei jeder Änderung nach; die Sammlung wird dafür nicht gebraucht
+  fetch('/api/stats/movies')
+    .then(response => response.json())
+    .then(renderStats)
+    .catch(error => console.error('Error loading movie stats:', error));
+}
+function renderStats(stats) {
+  const totalCount = stats.total;
+  const movieCount = stats.types.movie || 0;
+  const seriesCount = stats.types.series || 0;
+  const ratedCount = stats.rated;
+  const notRatedCount = stats.not_rated;
   
   // Prüfe, ob die Elemente existieren, bevor wir textContent setzen
   const movieCountEl = document.getElementById('movieCount');
@@ -1651,20 +1870,8 @@ function updateStats() {
   }
 
   // Genre-Analyse
-  const genreDensity = {};
-  movies.forEach(movie => {
-    if (movie.genre) {
-      movie.genre.split(',').forEach(g => {
-        const genre = g.trim();
-        if (genre) {
-          genreDensity[genre] = (genreDensity[genre] || 0) + 1;
-        }
-      });
-    }
-  });
-
-  const labels = Object.keys(genreDensity);
-  const data = Object.values(genreDensity);
+  const labels = Object.keys(stats.genres);
+  const data = Object.values(stats.genres);
 
   const textColor = darkMode ? '#E2E8F0' : '#4A5568';
   const chartCtx = document.getElementById('genreChart');
@@ -1752,23 +1959,11 @@ function updateStats() {
   genreChart = new Chart(ctx, chartConfig);
   
   // Lieblingstitel in Stats anzeigen
-  loadStatsFavorites();
+  loadStatsFavorites(stats.favorites);
 }
-function loadStatsFavorites() {
+function loadStatsFavorites(favoritesList) {
   const statsFavoritesList = document.getElementById('statsFavoritesList');
   
-  // Get movies with ratings and sort by rating (high to low)
-  const ratedMovies = movies.filter(m => m.rating > 0)
-    .sort((a, b) => b.rating - a.rating);
-  
-  // Take top 10
-  const favoritesList = ratedMovies.slice(0, 10).map(m => ({
-    id: m.id,
-    title: m.title,
-    rating: m.rating,
-    type: m.type || 'movie'
-  }));
-  
   if (favoritesList.length > 0) {
     let html = '<ul class="space-y-2">';
     favoritesList.forEach((item, index) => {
@@ -1845,13 +2040,13 @@ function generateMoviePersona() {
   // Ausgabeformat spezifizieren
   prompt += "Please respond ONLY with a JSON array in this exact format: [{\"persona\":\"1-2 word description\", \"description\":\"6 sentences about my taste profile\"}]. Do not include any other text.";
   
-  // AI-Anfrage stellen
+  // AI-Anfrage stellen (erneutes Generieren umgeht den Cache)
   fetch('/api/ask_ai', {
     method: 'POST',
     headers: {
       'Content-Type': 'application/json'
     },
-    body: JSON.stringify({ message: prompt })
+    body: JSON.stringify(withRegenerate('moviePersona', { message: prompt }))
   })
   .then(response => response.json())
   .then(data => {
@@ -2293,16 +2488,17 @@ document.getElementById('aiSuggestionsForm').addEventListener('submit', (e) => {
     contentType,
     suggestionCount,
     description,
-    favorites: favoritesList
+    favorites: favoritesList,
+    provider: document.getElementById('suggestionProvider').value
   };
   
-  // Send request to backend
+  // Send request to backend (same inputs again = regenerate, bypasses the AI cache)
   fetch('/api/ai_suggestions', {
     method: 'POST',
     headers: {
       'Content-Type': 'application/json'
     },
-    body: JSON.stringify(requestData)
+    body: JSON.stringify(withRegenerate('movieSuggestions', requestData))
   })
   .then(response => response.json())
   .then(data => {
@@ -2730,15 +2926,11 @@ addResultBtn.addEventListener('click', () => {
   if (!currentApiResult) return;
   
   // Füge den Eintrag zur Sammlung hinzu
-  fetch('/api/movies', {
-    method: 'POST',
-    headers: {
-      'Content-Type': 'application/json'
-    },
-    body: JSON.stringify(currentApiResult)
-  })
-  .then(response => response.json())
+  postCollectionItem('/api/movies', currentApiResult)
+  .then(response => response ? response.json() : null)
   .then(savedMovie => {
+    if (!savedMovie) return; // Duplikat, nicht hinzugefügt
+
     // Füge den gespeicherten Film zum lokalen Array hinzu
     movies.push(savedMovie);
     updateFilterOptions();
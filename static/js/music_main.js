@@ -2,6 +2,7 @@
 
 // Globale Variablen
 let musicTracks = [];
+let musicStats = null; // Letzte Antwort von /api/stats/music
 let currentPage = 1;
 const itemsPerPage = 10;
 
@@ -17,13 +18,15 @@ document.addEventListener('DOMContentLoaded', function() {
   loadMusicTracks();
 });
 
-// Lädt Musikdaten aus JSON-Datei
+// Lädt die Musik-Tracks seitenweise (siehe fetchCollectionPages in main.js);
+// die erste Seite wird sofort angezeigt
 function loadMusicTracks() {
-    fetch('/music_tracks.json')
-      .then(response => response.json())
-      .then(data => {
-        musicTracks = data;
-        console.log(musicTracks);
+    fetchCollectionPages('/music_tracks.json', firstPage => {
+      musicTracks = firstPage;
+      displayMusicTracks();
+    })
+      .then(({ items }) => {
+        musicTracks = items;
         displayMusicTracks();
         updateMusicFilters();
         
@@ -507,18 +510,31 @@ function uploadMusicCsv() {
   const formData = new FormData();
   formData.append('file', csvInput.files[0]);
   
-  // Sende die Datei an den Server
+  // Sende die Datei an den Server; der Import läuft als Hintergrund-Job,
+  // dessen Fortschritt per pollImportJob() (main.js) abgefragt wird
   fetch('/api/import/music', {
     method: 'POST',
     body: formData
   })
   .then(response => response.json())
   .then(data => {
-    if (data.success) {
-      alert(`Successfully imported music tracks: ${data.imported}`);
+    if (!data.success) {
+      throw new Error(data.message || 'Unknown error occurred');
+    }
+    return pollImportJob(data.job_id, job => {
+      if (importBtn) {
+        importBtn.textContent = formatJobProgress(job);
+      }
+    });
+  })
+  .then(job => {
+    if (job.status === 'completed') {
+      alert(`Successfully imported music tracks: ${job.imported} (${job.skipped} skipped)`);
       loadMusicTracks(); // Lade die Tracks neu
+    } else if (job.status === 'cancelled') {
+      alert('Import cancelled.');
     } else {
-      alert(`Error: ${data.message || 'Unknown error occurred'}`);
+      alert(`Error: ${job.error || 'Unknown error occurred'}`);
     }
   })
   .catch(error => {
@@ -575,7 +591,15 @@ function initMusicStats() {
   }
 }
 function updateMusicStats() {
-    if (!musicTracks || musicTracks.length === 0) {
+    // Kennzahlen kommen fertig vom Server (bei jeder Änderung nachgeführt)
+    fetch('/api/stats/music')
+      .then(response => response.json())
+      .then(renderMusicStats)
+      .catch(error => console.error('Error loading music stats:', error));
+  }
+function renderMusicStats(stats) {
+    musicStats = stats;
+    if (!stats || stats.total === 0) {
       console.log("No music tracks available");
       return;
     }
@@ -590,85 +614,15 @@ function updateMusicStats() {
     const topArtistsEl = document.getElementById('topArtistsList');
     const popularTracksEl = document.getElementById('popularTracksList');
   
-    // Collection Overview berechnen
-    const totalTracks = musicTracks.length;
-    
-    // Eindeutige Künstler zählen
-    const uniqueArtists = new Set();
-    const artistImages = {}; // Für Top Artists Liste
-    
-    musicTracks.forEach(track => {
-      if (track.artists) {
-        track.artists.forEach(artist => {
-          uniqueArtists.add(artist.artist_name);
-          // Speichere das Bild für später
-          if (!artistImages[artist.artist_name] && artist.artist_image) {
-            artistImages[artist.artist_name] = artist.artist_image;
-          }
-        });
-      }
-    });
-    const artistCount = uniqueArtists.size;
-    
-    // Eindeutige Alben zählen
-    const uniqueAlbums = new Set();
-    musicTracks.forEach(track => {
-      if (track.album && track.album.album_name) {
-        uniqueAlbums.add(track.album.album_name);
-      }
-    });
-    const albumCount = uniqueAlbums.size;
-    
-    // Alle Genres sammeln
-    const allGenres = new Set();
-    musicTracks.forEach(track => {
-      if (track.artists) {
-        track.artists.forEach(artist => {
-          if (artist.genres) {
-            artist.genres.forEach(genre => allGenres.add(genre));
-          }
-        });
-      }
-    });
-    const genreCount = allGenres.size;
-    
-    // Durchschnittliche Popularität berechnen
-    let totalPopularity = 0;
-    let tracksWithPopularity = 0;
-    musicTracks.forEach(track => {
-      if (track.popularity) {
-        totalPopularity += track.popularity;
-        tracksWithPopularity++;
-      }
-    });
-    const avgPopularity = tracksWithPopularity > 0 ? 
-      Math.round(totalPopularity / tracksWithPopularity) : 0;
-    
     // Übersicht aktualisieren
-    if (trackCountEl) trackCountEl.textContent = totalTracks;
-    if (artistCountEl) artistCountEl.textContent = artistCount;
-    if (albumCountEl) albumCountEl.textContent = albumCount;
-    if (genreCountEl) genreCountEl.textContent = genreCount;
-    if (avgPopularityEl) avgPopularityEl.textContent = `${avgPopularity}%`;
+    if (trackCountEl) trackCountEl.textContent = stats.total;
+    if (artistCountEl) artistCountEl.textContent = stats.artist_count;
+    if (albumCountEl) albumCountEl.textContent = stats.album_count;
+    if (genreCountEl) genreCountEl.textContent = Object.keys(stats.genres).length;
+    if (avgPopularityEl) avgPopularityEl.textContent = `${stats.average_popularity}%`;
     
-    // Genre-Verteilung berechnen
-    const genreCounts = {};
-    musicTracks.forEach(track => {
-      if (track.artists) {
-        track.artists.forEach(artist => {
-          if (artist.genres) {
-            artist.genres.forEach(genre => {
-              genreCounts[genre] = (genreCounts[genre] || 0) + 1;
-            });
-          }
-        });
-      }
-    });
-    
-    // Genres sortieren und nur die Top 10 nehmen
-    const sortedGenres = Object.entries(genreCounts)
-      .sort((a, b) => b[1] - a[1])
-      .slice(0, 10);
+    // Genres kommen absteigend nach Häufigkeit sortiert; nur die Top 10 nehmen
+    const sortedGenres = Object.entries(stats.genres).slice(0, 10);
     
     // Genre-Chart erstellen, wenn das Element existiert
     if (genreChartEl) {
@@ -723,20 +677,7 @@ function updateMusicStats() {
     
     // Top-Künstler berechnen und anzeigen (ähnlich wie in loadMusicFavorites)
     if (topArtistsEl) {
-      const artistTrackCounts = {};
-      
-      // Zähle die Häufigkeit jedes Künstlers
-      musicTracks.forEach(track => {
-        if (track.artists) {
-          track.artists.forEach(artist => {
-            artistTrackCounts[artist.artist_name] = (artistTrackCounts[artist.artist_name] || 0) + 1;
-          });
-        }
-      });
-      
-      const topArtists = Object.entries(artistTrackCounts)
-        .sort((a, b) => b[1] - a[1])
-        .slice(0, 5);
+      const topArtists = stats.top_artists.slice(0, 5);
       
       if (topArtists.length === 0) {
         topArtistsEl.innerHTML = '<p class="text-gray-500 dark:text-gray-400 text-center">Add more tracks to see your most frequent artists.</p>';
@@ -744,9 +685,9 @@ function updateMusicStats() {
         topArtistsEl.innerHTML = `
           <ul class="space-y-2">
             ${topArtists.map((artist, index) => {
-              const artistName = artist[0];
-              const trackCount = artist[1];
-              const artistImage = artistImages[artistName] || 'https://placehold.co/200x200/e2e8f0/1e293b?text=No+Image';
+              const artistName = artist.name;
+              const trackCount = artist.tracks;
+              const artistImage = artist.image || 'https://placehold.co/200x200/e2e8f0/1e293b?text=No+Image';
               
               return `
                 <li class="flex justify-between items-center p-2 bg-white dark:bg-gray-700 rounded-lg shadow">
@@ -766,9 +707,7 @@ function updateMusicStats() {
     
     // Beliebteste Tracks berechnen und anzeigen
     if (popularTracksEl) {
-      const popularTracks = [...musicTracks]
-        .sort((a, b) => (b.popularity || 0) - (a.popularity || 0))
-        .slice(0, 5);
+      const popularTracks = stats.favorites.slice(0, 5);
       
       if (popularTracks.length === 0) {
         popularTracksEl.innerHTML = '<p class="text-gray-500 dark:text-gray-400 text-center">Add tracks to see your most popular songs here.</p>';
@@ -782,7 +721,7 @@ function updateMusicStats() {
                   <div>
                     <div class="text-gray-800 dark:text-gray-200">${track.track_name}</div>
                     <div class="text-sm text-gray-600 dark:text-gray-400">
-                      ${track.artists ? track.artists.map(a => a.artist_name).join(', ') : 'Unknown Artist'}
+                      ${track.artists.length > 0 ? track.artists.join(', ') : 'Unknown Artist'}
                     </div>
                   </div>
                 </div>
@@ -972,23 +911,9 @@ function updateMusicGenreChart(chartType) {
     const genreChartEl = document.getElementById('musicGenreChart');
     if (!genreChartEl) return;
     
-    // Genre-Daten abrufen (wir müssen die Berechnung erneut durchführen)
-    const genreCounts = {};
-    musicTracks.forEach(track => {
-      if (track.artists) {
-        track.artists.forEach(artist => {
-          if (artist.genres) {
-            artist.genres.forEach(genre => {
-              genreCounts[genre] = (genreCounts[genre] || 0) + 1;
-            });
-          }
-        });
-      }
-    });
-    
-    const sortedGenres = Object.entries(genreCounts)
-      .sort((a, b) => b[1] - a[1])
-      .slice(0, 10);
+    // Genre-Daten aus der letzten Statistik-Antwort
+    // Genres kommen absteigend nach Häufigkeit sortiert
+    const sortedGenres = Object.entries(musicStats ? musicStats.genres : {}).slice(0, 10);
       
     const labels = sortedGenres.map(g => g[0]);
     const data = sortedGenres.map(g => g[1]);
@@ -1119,13 +1044,13 @@ document.getElementById('generateMusicPersonaBtn').addEventListener('click', ()
   // Add output formatting instructions
   prompt += " Please respond ONLY with a JSON object in this format: {\"persona\":\"1-2 word description\", \"description\":\"4-5 sentences about my musical profile\"}. Do not include any other text.";
   
-  // Call AI API
+  // Call AI API (generating again bypasses the cache)
   fetch('/api/ask_ai', {
     method: 'POST',
     headers: {
       'Content-Type': 'application/json'
     },
-    body: JSON.stringify({ message: prompt })
+    body: JSON.stringify(withRegenerate('musicPersona', { message: prompt }))
   })
   .then(response => response.json())
   .then(data => {
@@ -1191,13 +1116,13 @@ function generateMusicSuggestions() {
     description: description
   };
   
-  // Call API
+  // Call API (same inputs again = regenerate, bypasses the AI cache)
   fetch('/api/music_suggestions', {
     method: 'POST',
     headers: {
       'Content-Type': 'application/json'
     },
-    body: JSON.stringify(requestData)
+    body: JSON.stringify(withRegenerate('musicSuggestions', requestData))
   })
   .then(response => response.json())
   .then(data => {
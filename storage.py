@@ -0,0 +1,1035 @@
+import os
+import re
+import json
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from collection_query import CollectionIndex
+
+# Sammlungen, die über ein Speicher-Backend verwaltet werden
+COLLECTIONS = ('movies', 'games', 'music_tracks')
+
+# Schlüsselfeld je Sammlung (Musik-Tracks haben keine eigene 'id', sondern die Spotify 'track_id')
+KEY_FIELDS = {
+    'movies': 'id',
+    'games': 'id',
+    'music_tracks': 'track_id'
+}
+
+# Einrückung der JSON-Dateien wie bisher (Musik-Tracks wurden schon immer mit indent=2 geschrieben)
+JSON_INDENT = {
+    'movies': 4,
+    'games': 4,
+    'music_tracks': 2
+}
+
+
+def item_key(collection, item):
+    """Gibt den Schlüssel eines Eintrags als String zurück (oder None, wenn keiner vorhanden ist)."""
+    value = item.get(KEY_FIELDS[collection])
+    if value is None or value == '':
+        return None
+    return str(value)
+
+
+def _file_stamp(path):
+    """Gibt (mtime_ns, size) einer Datei zurück oder None, wenn sie nicht existiert."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _journal_path(path):
+    """movies.json -> movies.journal.jsonl"""
+    return os.path.splitext(path)[0] + '.journal.jsonl'
+
+
+def _write_json_atomic(path, data, indent):
+    """Schreibt eine JSON-Datei über eine temporäre Datei, damit ein Absturz nie eine halbe Datei hinterlässt."""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=indent)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _read_journal(path):
+    """Liest alle vollständigen Operationen aus einer Journal-Datei (eine abgebrochene letzte Zeile wird ignoriert)."""
+    ops = []
+    if not os.path.exists(path):
+        return ops
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                ops.append(json.loads(line))
+            except json.JSONDecodeError:
+                print(f"Unvollständiger Journal-Eintrag in {os.path.basename(path)} wird ignoriert")
+                break
+    return ops
+
+
+def _repair_journal(path):
+    """Schneidet eine beim Absturz abgebrochene letzte Zeile ab, damit neue Einträge nicht daran angehängt werden."""
+    if not os.path.exists(path):
+        return
+    with open(path, 'rb+') as f:
+        data = f.read()
+        end = data.rfind(b'\n') + 1
+        if end < len(data):
+            print(f"Unvollständiger Journal-Eintrag in {os.path.basename(path)} wird entfernt")
+            f.truncate(end)
+
+
+def _apply_ops(collection, items, ops):
+    """
+    Wendet Journal-Operationen auf eine Liste von Einträgen an.
+    Die Operationen sind idempotent (add ersetzt einen Eintrag mit gleichem Schlüssel),
+    damit ein doppeltes Abspielen nach einem Absturz während der Kompaktierung nichts verändert.
+    """
+    positions = {}
+    for i, item in enumerate(items):
+        key = item_key(collection, item)
+        if key is not None and key not in positions:
+            positions[key] = i
+
+    deleted = False
+    for op in ops:
+        kind = op.get('op')
+        if kind in ('add', 'update'):
+            item = op['item']
+            key = op.get('key') or item_key(collection, item)
+            pos = positions.get(key) if key is not None else None
+            if pos is not None:
+                items[pos] = item
+                new_key = item_key(collection, item)
+                if new_key != key:
+                    del positions[key]
+                    if new_key is not None:
+                        positions[new_key] = pos
+            elif kind == 'add':
+                if key is not None:
+                    positions[key] = len(items)
+                items.append(item)
+        elif kind == 'delete':
+            pos = positions.pop(op.get('key'), None)
+            if pos is not None:
+                items[pos] = None
+                deleted = True
+
+    if deleted:
+        items = [item for item in items if item is not None]
+    return items
+
+
+class JsonBackend:
+    """
+    Speicherformat mit einer JSON-Datei pro Sammlung plus einem Append-only-Journal.
+
+    Einzelne Änderungen (add/update/delete) werden als JSON-Zeile an
+    '<name>.journal.jsonl' angehängt, statt die ganze Datei neu zu schreiben.
+    Gleichzeitige Änderungen werden per Group Commit gemeinsam geschrieben und
+    mit einem einzigen fsync abgeschlossen. Ein Hintergrund-Thread faltet das
+    Journal nach 'compact_ops' Operationen oder 'compact_seconds' Sekunden in
+    die JSON-Datei (Snapshot) zurück. Beim Laden wird Snapshot + Journal
+    abgespielt, ein Absturz mitten im Schreiben verliert also keine bestätigte Änderung.
+
+    Mit wait=False reihen insert_many()/update()/delete() die Operationen nur ein
+    und geben eine Ticket-Nummer zurück; wait(ticket) wartet dann auf den fsync.
+    So kann CachedStorage die Reihenfolge unter seinem Sammlungs-Lock festlegen
+    und außerhalb davon auf den gemeinsamen Commit warten.
+    """
+    name = 'json'
+    group_commit = True
+
+    def __init__(self, files, compact_ops=500, compact_seconds=30):
+        self.files = files
+        self.compact_ops = compact_ops
+        self.compact_seconds = compact_seconds
+        # Wird nach jeder Kompaktierung mit (Sammlung, Kennung vorher) aufgerufen (siehe CachedStorage)
+        self.on_compacted = None
+
+        # Group Commit: der erste wartende Thread schreibt die Operationen aller anderen mit
+        self._commit_cond = threading.Condition()
+        self._pending = []
+        self._next_ticket = 1
+        self._committed_ticket = 0
+        self._failed_tickets = {}
+        self._flushing = False
+
+        # Schützt Umbenennen/Ersetzen der Dateien während der Kompaktierung
+        self._io_lock = threading.Lock()
+        self._compact_locks = {collection: threading.RLock() for collection in files}
+        self._journal_ops = {collection: 0 for collection in files}
+        self._journal_since = {collection: None for collection in files}
+
+        # Eine abgebrochene Kompaktierung vom letzten Lauf abschließen
+        for collection in files:
+            journal = _journal_path(files[collection])
+            _repair_journal(journal)
+            if os.path.exists(journal + '.compacting'):
+                self._finish_compaction(collection)
+            self._journal_ops[collection] = len(_read_journal(journal))
+            if self._journal_ops[collection]:
+                self._journal_since[collection] = time.time()
+
+        self._stop = threading.Event()
+        self._compactor = threading.Thread(target=self._compact_loop, daemon=True)
+        self._compactor.start()
+
+    def path(self, collection):
+        return self.files[collection]
+
+    def stamp(self, collection):
+        """Änderungskennung der Sammlung (mtime und Größe von Snapshot und Journal)."""
+        journal = _journal_path(self.files[collection])
+        return (
+            _file_stamp(self.files[collection]),
+            _file_stamp(journal + '.compacting'),
+            _file_stamp(journal)
+        )
+
+    def _load_snapshot(self, collection):
+        path = self.files[collection]
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        return []
+
+    def load(self, collection):
+        """Lädt alle Einträge einer Sammlung (Snapshot + Journal)."""
+        journal = _journal_path(self.files[collection])
+        with self._compact_locks[collection]:
+            items = self._load_snapshot(collection)
+            ops = _read_journal(journal + '.compacting') + _read_journal(journal)
+        return _apply_ops(collection, items, ops) if ops else items
+
+    def save(self, collection, items):
+        """Speichert alle Einträge einer Sammlung als neuen Snapshot und leert das Journal."""
+        journal = _journal_path(self.files[collection])
+        # Bereits eingereihte Operationen vorher schreiben, damit sie nicht auf den neuen Snapshot folgen
+        with self._commit_cond:
+            last_ticket = self._next_ticket - 1
+        self.wait(last_ticket)
+        with self._compact_locks[collection], self._io_lock:
+            _write_json_atomic(self.files[collection], items, JSON_INDENT[collection])
+            for path in (journal + '.compacting', journal):
+                if os.path.exists(path):
+                    os.remove(path)
+            self._journal_ops[collection] = 0
+            self._journal_since[collection] = None
+
+    def get(self, collection, key):
+        """Sucht einen Eintrag anhand seines Schlüssels."""
+        for item in self.load(collection):
+            if item_key(collection, item) == str(key):
+                return item
+        return None
+
+    def insert(self, collection, item):
+        self.insert_many(collection, [item])
+
+    def insert_many(self, collection, items, wait=True):
+        if items:
+            return self._commit(collection, [{'op': 'add', 'item': item} for item in items], wait)
+        return 0
+
+    def update(self, collection, key, item, wait=True):
+        """Hängt eine Aktualisierung an das Journal an (die Existenz prüft der Aufrufer)."""
+        ticket = self._commit(collection, [{'op': 'update', 'key': str(key), 'item': item}], wait)
+        return True if wait else ticket
+
+    def delete(self, collection, key, wait=True):
+        """Hängt eine Löschung an das Journal an (die Existenz prüft der Aufrufer)."""
+        ticket = self._commit(collection, [{'op': 'delete', 'key': str(key)}], wait)
+        return True if wait else ticket
+
+    def _commit(self, collection, ops, wait=True):
+        """Reiht Operationen für das Journal ein und wartet (bei wait=True) auf den fsync."""
+        with self._commit_cond:
+            ticket = self._next_ticket
+            self._next_ticket += 1
+            self._pending.append((ticket, collection, ops))
+        if wait:
+            self.wait(ticket)
+        return ticket
+
+    def wait(self, ticket):
+        """Kehrt zurück, sobald die Operationen des Tickets geschrieben sind (schreibt ggf. selbst)."""
+        with self._commit_cond:
+            # Warten, bis ein anderer Thread unsere Operationen mitgeschrieben hat oder wir selbst dran sind
+            while self._committed_ticket < ticket and self._flushing:
+                self._commit_cond.wait()
+
+            if self._committed_ticket >= ticket:
+                error = self._failed_tickets.pop(ticket, None)
+                if error:
+                    raise error
+                return
+
+            self._flushing = True
+            batch = self._pending
+            self._pending = []
+
+        error = None
+        try:
+            self._write_batch(batch)
+        except Exception as e:
+            error = e
+
+        with self._commit_cond:
+            if error:
+                for batch_ticket, _, _ in batch:
+                    if batch_ticket != ticket:
+                        self._failed_tickets[batch_ticket] = error
+            self._committed_ticket = max(batch_ticket for batch_ticket, _, _ in batch)
+            self._flushing = False
+            self._commit_cond.notify_all()
+
+        if error:
+            raise error
+
+    def _write_batch(self, batch):
+        by_collection = {}
+        for _, collection, ops in batch:
+            by_collection.setdefault(collection, []).extend(ops)
+
+        with self._io_lock:
+            for collection, ops in by_collection.items():
+                lines = ''.join(json.dumps(op, ensure_ascii=False) + '\n' for op in ops)
+                with open(_journal_path(self.files[collection]), 'a', encoding='utf-8') as f:
+                    f.write(lines)
+                    f.flush()
+                    os.fsync(f.fileno())
+                self._journal_ops[collection] += len(ops)
+                if self._journal_since[collection] is None:
+                    self._journal_since[collection] = time.time()
+
+    def _compact_loop(self):
+        while not self._stop.wait(1):
+            for collection in self.files:
+                since = self._journal_since[collection]
+                if since is None:
+                    continue
+                if self._journal_ops[collection] >= self.compact_ops or time.time() - since >= self.compact_seconds:
+                    try:
+                        self.compact(collection)
+                    except Exception as e:
+                        print(f"Fehler beim Kompaktieren des Journals für {collection}: {str(e)}")
+
+    def compact(self, collection):
+        """Faltet das Journal einer Sammlung in die JSON-Datei zurück."""
+        journal = _journal_path(self.files[collection])
+        with self._compact_locks[collection]:
+            with self._io_lock:
+                if not os.path.exists(journal):
+                    return
+                stamp_before = self.stamp(collection)
+                # Neue Operationen landen ab jetzt in einem frischen Journal
+                os.replace(journal, journal + '.compacting')
+                self._journal_ops[collection] = 0
+                self._journal_since[collection] = None
+            self._finish_compaction(collection)
+        # Außerhalb der Locks: der Empfänger nimmt seinen eigenen Sammlungs-Lock
+        if self.on_compacted is not None:
+            self.on_compacted(collection, stamp_before)
+
+    def _finish_compaction(self, collection):
+        compacting = _journal_path(self.files[collection]) + '.compacting'
+        items = _apply_ops(collection, self._load_snapshot(collection), _read_journal(compacting))
+        _write_json_atomic(self.files[collection], items, JSON_INDENT[collection])
+        os.remove(compacting)
+
+    def close(self):
+        self._stop.set()
+        for collection in self.files:
+            self.compact(collection)
+
+
+# Spalten, die für Suche/Sortierung als eigene (indizierte) Spalten abgelegt werden.
+# Der vollständige Eintrag liegt zusätzlich als JSON in der Spalte 'data'.
+def _indexed_columns(collection, item):
+    if collection == 'music_tracks':
+        genres = []
+        for artist in item.get('artists') or []:
+            for genre in artist.get('genres') or []:
+                if genre not in genres:
+                    genres.append(genre)
+        return {
+            'title': item.get('track_name'),
+            'type': 'track',
+            'genre': ', '.join(genres),
+            'rating': item.get('popularity')
+        }
+
+    rating = item.get('rating')
+    try:
+        rating = float(rating) if rating is not None else None
+    except (TypeError, ValueError):
+        rating = None
+    return {
+        'title': item.get('title'),
+        'type': item.get('type'),
+        'genre': item.get('genre'),
+        'rating': rating
+    }
+
+
+class SqliteBackend:
+    """
+    Eingebettete SQLite-Datenbank mit einer Tabelle pro Sammlung.
+
+    Einzelne Änderungen werden als UPDATE/DELETE auf genau einer Zeile ausgeführt,
+    statt die ganze Sammlung neu zu schreiben. Die Reihenfolge der Einträge
+    bleibt über den AUTOINCREMENT-Primärschlüssel 'pk' erhalten.
+    """
+    name = 'sqlite'
+
+    def __init__(self, db_path, json_files=None):
+        self.db_path = db_path
+        self.json_files = json_files or {}
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._create_schema()
+        self._migrate_from_json()
+
+    def path(self, collection):
+        return self.db_path
+
+    def stamp(self, collection):
+        """Änderungskennung der Datenbank (Hauptdatei und WAL-Datei)."""
+        return (_file_stamp(self.db_path), _file_stamp(self.db_path + '-wal'))
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _create_schema(self):
+        conn = self._connect()
+        with conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+            for collection in COLLECTIONS:
+                conn.execute(f'''
+                    CREATE TABLE IF NOT EXISTS {collection} (
+                        pk INTEGER PRIMARY KEY AUTOINCREMENT,
+                        id TEXT,
+                        title TEXT,
+                        type TEXT,
+                        genre TEXT,
+                        rating REAL,
+                        data TEXT NOT NULL
+                    )
+                ''')
+                for column in ('id', 'title', 'type', 'genre', 'rating'):
+                    conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{collection}_{column} ON {collection} ({column})')
+
+    def _migrate_from_json(self):
+        """Einmalige Übernahme der bestehenden JSON-Dateien in die Datenbank."""
+        conn = self._connect()
+        for collection in COLLECTIONS:
+            marker = f'migrated_{collection}'
+            if conn.execute('SELECT 1 FROM meta WHERE key = ?', (marker,)).fetchone():
+                continue
+
+            items = []
+            path = self.json_files.get(collection)
+            if path and os.path.exists(path):
+                try:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        items = json.load(f)
+                except (OSError, json.JSONDecodeError) as e:
+                    print(f"Fehler beim Migrieren von {path}: {str(e)}")
+                    continue
+
+            with self._write_lock, conn:
+                self._insert_rows(conn, collection, items)
+                conn.execute('INSERT INTO meta (key, value) VALUES (?, ?)', (marker, str(len(items))))
+            if items:
+                print(f"{len(items)} Einträge aus {os.path.basename(path)} nach SQLite migriert")
+
+    def _row_values(self, collection, item):
+        columns = _indexed_columns(collection, item)
+        return (
+            item_key(collection, item),
+            columns['title'],
+            columns['type'],
+            columns['genre'],
+            columns['rating'],
+            json.dumps(item, ensure_ascii=False)
+        )
+
+    def _insert_rows(self, conn, collection, items):
+        conn.executemany(
+            f'INSERT INTO {collection} (id, title, type, genre, rating, data) VALUES (?, ?, ?, ?, ?, ?)',
+            [self._row_values(collection, item) for item in items]
+        )
+
+    def load(self, collection):
+        rows = self._connect().execute(f'SELECT data FROM {collection} ORDER BY pk').fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def save(self, collection, items):
+        conn = self._connect()
+        with self._write_lock, conn:
+            conn.execute(f'DELETE FROM {collection}')
+            self._insert_rows(conn, collection, items)
+
+    def get(self, collection, key):
+        row = self._connect().execute(
+            f'SELECT data FROM {collection} WHERE id = ? ORDER BY pk LIMIT 1', (str(key),)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def insert(self, collection, item):
+        self.insert_many(collection, [item])
+
+    def insert_many(self, collection, items):
+        conn = self._connect()
+        with self._write_lock, conn:
+            self._insert_rows(conn, collection, items)
+
+    def update(self, collection, key, item):
+        conn = self._connect()
+        values = self._row_values(collection, item)
+        with self._write_lock, conn:
+            cursor = conn.execute(
+                f'''UPDATE {collection} SET id = ?, title = ?, type = ?, genre = ?, rating = ?, data = ?
+                    WHERE pk = (SELECT pk FROM {collection} WHERE id = ? ORDER BY pk LIMIT 1)''',
+                values + (str(key),)
+            )
+            return cursor.rowcount > 0
+
+    def delete(self, collection, key):
+        conn = self._connect()
+        with self._write_lock, conn:
+            row = conn.execute(
+                f'SELECT pk, data FROM {collection} WHERE id = ? ORDER BY pk LIMIT 1', (str(key),)
+            ).fetchone()
+            if not row:
+                return None
+            conn.execute(f'DELETE FROM {collection} WHERE pk = ?', (row[0],))
+            return json.loads(row[1])
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+# Anzahl der Änderungen, die pro Sammlung für die Delta-Synchronisation vorgehalten werden
+CHANGE_LOG_SIZE = 5000
+
+# Sammlungen, deren IDs vom Server vergeben werden
+ID_COLLECTIONS = ('movies', 'games')
+
+_CROCKFORD = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+_ID_PATTERN = re.compile(r'^[0-9A-HJKMNP-TV-Z]{13}$')
+
+
+def _encode_id(ms, seq):
+    """48 Bit Millisekunden + 16 Bit Zähler als 13 Zeichen Crockford-Base32 (lexikografisch sortierbar)."""
+    value = ((ms & 0xFFFFFFFFFFFF) << 16) | (seq & 0xFFFF)
+    chars = []
+    for _ in range(13):
+        chars.append(_CROCKFORD[value & 31])
+        value >>= 5
+    return ''.join(reversed(chars))
+
+
+def is_item_id(value):
+    """Prüft, ob ein Wert eine ID im aktuellen Format ist."""
+    return isinstance(value, str) and bool(_ID_PATTERN.match(value))
+
+
+class IdGenerator:
+    """
+    Erzeugt kompakte, kollisionsfreie und zeitlich sortierbare IDs.
+    Innerhalb derselben Millisekunde wird ein Zähler hochgezählt, statt
+    wie bisher mit datetime.now().timestamp() gleiche IDs zu riskieren.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._last_ms = 0
+        self._seq = 0
+
+    def last_ms(self):
+        """Millisekunde der zuletzt vergebenen ID (mindestens die aktuelle Zeit)."""
+        with self._lock:
+            return max(self._last_ms, int(time.time() * 1000))
+
+    def next(self):
+        with self._lock:
+            ms = int(time.time() * 1000)
+            if ms <= self._last_ms:
+                # Gleiche Millisekunde (oder zurückgestellte Uhr): Zähler erhöhen
+                ms = self._last_ms
+                self._seq += 1
+                if self._seq > 0xFFFF:
+                    ms += 1
+                    self._seq = 0
+            else:
+                self._seq = 0
+            self._last_ms = ms
+            return _encode_id(ms, self._seq)
+
+
+_id_generator = IdGenerator()
+
+
+def new_item_id():
+    """Gibt eine neue, eindeutige ID für Filme und Spiele zurück."""
+    return _id_generator.next()
+
+
+def _legacy_alias(value):
+    """
+    Normalisiert eine alte Float-ID (datetime.now().timestamp()) zu einem Vergleichsschlüssel.
+    Python und JavaScript stringifizieren Floats nicht immer gleich ('3498' vs. '3498.0'),
+    deshalb wird über float() normalisiert.
+    """
+    try:
+        return 'legacy:' + repr(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def _migrate_legacy_ids(items):
+    """
+    Vergibt Einträgen mit alter ID (Float-Zeitstempel, RAWG-ID, ...) eine ID im neuen Format.
+    Die neue ID wird aus dem alten Zeitstempel abgeleitet, die alte ID bleibt als 'legacyId' erhalten.
+    Gibt (items, changed) zurück.
+    """
+    used = set(item.get('id') for item in items if is_item_id(item.get('id')))
+    migrated = []
+    changed = False
+    for item in items:
+        old_id = item.get('id')
+        if is_item_id(old_id):
+            migrated.append(item)
+            continue
+
+        try:
+            timestamp = float(old_id)
+            # Nur plausible Zeitstempel übernehmen (z.B. keine kleinen RAWG-IDs)
+            if timestamp < 946684800:
+                raise ValueError
+        except (TypeError, ValueError):
+            try:
+                timestamp = datetime.fromisoformat(item.get('createdAt', '')).timestamp()
+            except (TypeError, ValueError):
+                timestamp = None
+
+        if timestamp is None or timestamp * 1000 >= _id_generator.last_ms():
+            # Kein (vergangener) Zeitstempel bekannt: normale neue ID vergeben
+            new_id = new_item_id()
+        else:
+            ms = int(timestamp * 1000)
+            seq = 0
+            new_id = _encode_id(ms, seq)
+            while new_id in used:
+                seq += 1
+                new_id = _encode_id(ms, seq)
+        used.add(new_id)
+
+        item = dict(item)
+        item['id'] = new_id
+        if old_id is not None and old_id != '':
+            item['legacyId'] = old_id
+        migrated.append(item)
+        changed = True
+    return migrated, changed
+
+
+def _build_index(collection, items):
+    """Erstellt den Index Schlüssel -> Position (inkl. Aliasse für alte IDs)."""
+    index = {}
+    for pos, item in enumerate(items):
+        _index_item(index, collection, item, pos)
+    return index
+
+
+def _index_item(index, collection, item, pos):
+    key = item_key(collection, item)
+    if key is not None:
+        index.setdefault(key, pos)
+    legacy_id = item.get('legacyId')
+    if legacy_id is not None:
+        index.setdefault(str(legacy_id), pos)
+        alias = _legacy_alias(legacy_id)
+        if alias:
+            index.setdefault(alias, pos)
+
+
+class CachedStorage:
+    """
+    Prozessweiter Cache über einem Speicher-Backend.
+
+    Hält pro Sammlung die geparsten Einträge als Tupel (Snapshot) und lädt sie
+    nur neu, wenn sich mtime oder Größe der zugrunde liegenden Datei geändert
+    haben. Änderungen bauen ein neues Tupel auf und tauschen es danach in einem
+    Schritt aus (Copy-on-Write), sodass parallele Flask-Threads nie einen halb
+    angewendeten Zustand sehen. Einträge in einem Snapshot werden nie direkt
+    verändert; get() gibt deshalb eine Kopie zurück.
+
+    Zu jedem Snapshot gehört ein Index Schlüssel -> Position, sodass Einträge
+    in O(1) gefunden werden. Alte Float-IDs werden beim ersten Laden auf das
+    neue ID-Format umgestellt und bleiben über den Index weiterhin auffindbar.
+
+    Bei Backends mit Group Commit (JsonBackend) wird unter dem Sammlungs-Lock nur
+    die Operation eingereiht und der Snapshot nachgeführt; auf den fsync warten
+    die Schreiber danach ohne Lock, damit gleichzeitige Änderungen an derselben
+    Sammlung gemeinsam geschrieben werden.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.name = backend.name
+        self._snapshots = {}  # Sammlung -> (stamp, tuple, index)
+        self._locks = {collection: threading.RLock() for collection in COLLECTIONS}
+        self._stats = {collection: {'hits': 0, 'misses': 0} for collection in COLLECTIONS}
+        self._view_factories = {}  # Name -> factory(collection, items)
+        self._views = {}  # (Sammlung, Name) -> (tuple, Sicht)
+        self._pending_writes = {collection: 0 for collection in COLLECTIONS}  # eingereiht, noch ohne fsync
+        # Sekundärindizes für query_index(), wie alle Sichten inkrementell nachgeführt
+        self.register_view('query', lambda collection, items: CollectionIndex(
+            collection, items, lambda item: item_key(collection, item)))
+
+        # Delta-Synchronisation: monoton steigende Version pro Sammlung und ein
+        # begrenztes Änderungsprotokoll. Die Startversion ist die aktuelle Zeit in
+        # Millisekunden, damit Versionen auch über Neustarts hinweg weiter steigen.
+        start_version = int(time.time() * 1000)
+        self._versions = {collection: start_version for collection in COLLECTIONS}
+        self._change_floor = dict(self._versions)
+        self._change_log = {collection: deque(maxlen=CHANGE_LOG_SIZE) for collection in COLLECTIONS}
+
+        if hasattr(backend, 'on_compacted'):
+            backend.on_compacted = self._compacted
+
+    def _compacted(self, collection, stamp_before):
+        """
+        Eine Kompaktierung ändert nur die Dateien, nicht den Inhalt. War der Snapshot
+        auf dem Stand von davor, bleibt er (samt Index und Sichten) mit der neuen
+        Kennung gültig, statt beim nächsten Zugriff neu geparst zu werden.
+        """
+        with self._locks[collection]:
+            cached = self._snapshots.get(collection)
+            if cached is not None and cached[0] == stamp_before:
+                self._snapshots[collection] = (self.backend.stamp(collection), cached[1], cached[2])
+
+    def _is_fresh(self, collection, cached, stamp):
+        # Solange eigene Schreibvorgänge auf ihren fsync warten, ist der Snapshot neuer als die Dateien
+        return cached is not None and (cached[0] == stamp or self._pending_writes[collection] > 0)
+
+    def _current(self, collection):
+        """Gibt den aktuellen (stamp, tuple, index)-Eintrag zurück und lädt bei Bedarf neu."""
+        stamp = self.backend.stamp(collection)
+        cached = self._snapshots.get(collection)
+        if self._is_fresh(collection, cached, stamp):
+            self._stats[collection]['hits'] += 1
+            return cached
+
+        with self._locks[collection]:
+            # Ein anderer Thread könnte den Snapshot inzwischen neu geladen haben
+            stamp = self.backend.stamp(collection)
+            cached = self._snapshots.get(collection)
+            if self._is_fresh(collection, cached, stamp):
+                self._stats[collection]['hits'] += 1
+                return cached
+
+            items = self.backend.load(collection)
+            self._stats[collection]['misses'] += 1
+
+            if collection in ID_COLLECTIONS:
+                items, changed = _migrate_legacy_ids(items)
+                if changed:
+                    print(f"IDs von {collection} auf das neue Format umgestellt")
+                    self.backend.save(collection, items)
+                    stamp = self.backend.stamp(collection)
+
+            items = tuple(items)
+            if cached is not None and items == cached[1]:
+                # Gleicher Inhalt (z.B. Kompaktierung während eines Schreibvorgangs): das
+                # bisherige Tupel behalten, damit Index und Sichten gültig bleiben
+                cached = (stamp, cached[1], cached[2])
+                self._snapshots[collection] = cached
+                return cached
+            if cached is not None:
+                # Von außen geändert: die einzelnen Änderungen sind unbekannt.
+                self._reset_changes(collection)
+            cached = (stamp, items, _build_index(collection, items))
+            self._snapshots[collection] = cached
+            return cached
+
+    def snapshot(self, collection):
+        """Gibt den aktuellen, unveränderlichen Snapshot (Tupel) einer Sammlung zurück."""
+        return self._current(collection)[1]
+
+    def _publish(self, collection, items, index):
+        """Veröffentlicht einen neuen Snapshot nach einer eigenen Schreiboperation."""
+        self._snapshots[collection] = (self.backend.stamp(collection), items, index)
+
+    def _begin_write(self, collection, method, *args):
+        """
+        Gibt eine Schreiboperation an das Backend (unter dem Sammlungs-Lock aufrufen, damit die
+        Reihenfolge im Journal der des Snapshots entspricht). Bei Group Commit wird nur
+        eingereiht; das Ergebnis ist dann das Ticket für _finish_write().
+        """
+        if not getattr(self.backend, 'group_commit', False):
+            getattr(self.backend, method)(collection, *args)
+            return None
+        ticket = getattr(self.backend, method)(collection, *args, wait=False)
+        self._pending_writes[collection] += 1
+        return ticket
+
+    def _finish_write(self, collection, ticket):
+        """Wartet ohne Sammlungs-Lock auf den fsync einer mit _begin_write() eingereihten Operation."""
+        if ticket is None:
+            return
+        error = None
+        try:
+            self.backend.wait(ticket)
+        except Exception as e:
+            error = e
+        with self._locks[collection]:
+            self._pending_writes[collection] -= 1
+            if error is not None:
+                # Was tatsächlich im Journal steht, ist unklar: beim nächsten Zugriff neu laden
+                self._snapshots.pop(collection, None)
+                self._reset_changes(collection)
+            elif self._pending_writes[collection] == 0:
+                # Alle Änderungen des Snapshots sind geschrieben: Kennung der Dateien übernehmen
+                cached = self._snapshots.get(collection)
+                if cached is not None:
+                    self._snapshots[collection] = (self.backend.stamp(collection), cached[1], cached[2])
+        if error is not None:
+            raise error
+
+    def _lookup(self, index, key):
+        pos = index.get(str(key))
+        if pos is None:
+            alias = _legacy_alias(key)
+            if alias:
+                pos = index.get(alias)
+        return pos
+
+    def _prepare_new(self, collection, item):
+        item = dict(item)
+        if collection in ID_COLLECTIONS and not is_item_id(item.get('id')):
+            if item.get('id') is not None and item.get('id') != '':
+                item['legacyId'] = item['id']
+            item['id'] = new_item_id()
+        return item
+
+    def _record_change(self, collection, key, item):
+        """Protokolliert eine Änderung (item=None bedeutet gelöscht) und erhöht die Version."""
+        self._versions[collection] += 1
+        log = self._change_log[collection]
+        if len(log) == log.maxlen:
+            # Der älteste Eintrag fällt heraus, ältere Versionen brauchen ab jetzt einen Komplettabgleich
+            self._change_floor[collection] = log[0][0]
+        log.append((self._versions[collection], key, item))
+
+    def _reset_changes(self, collection):
+        self._versions[collection] += 1
+        self._change_floor[collection] = self._versions[collection]
+        self._change_log[collection].clear()
+
+    def version(self, collection):
+        """Aktuelle Version einer Sammlung."""
+        return self._versions[collection]
+
+    def changes_since(self, collection, since):
+        """
+        Gibt die Änderungen seit einer Version zurück.
+
+        Returns:
+            dict: {'version', 'reset': False, 'changed': [...], 'deleted': [Schlüssel]} oder,
+                  wenn die Version zu alt bzw. unbekannt ist, {'version', 'reset': True, 'items': [...]}
+        """
+        self._current(collection)
+        with self._locks[collection]:
+            version = self._versions[collection]
+            if since is None or since < self._change_floor[collection] or since > version:
+                return {'version': version, 'reset': True, 'items': list(self.snapshot(collection))}
+
+            latest = {}
+            for change_version, key, item in self._change_log[collection]:
+                if change_version > since:
+                    # Spätere Änderungen am selben Eintrag überschreiben frühere
+                    latest.pop(key, None)
+                    latest[key] = item
+
+        return {
+            'version': version,
+            'reset': False,
+            'changed': [item for item in latest.values() if item is not None],
+            'deleted': [key for key, item in latest.items() if item is None]
+        }
+
+    def query_index(self, collection):
+        """Gibt die Sekundärindizes (Typ, Genre, Jahr, Sortierungen) zum aktuellen Snapshot zurück."""
+        return self.view(collection, 'query')
+
+    def register_view(self, name, factory):
+        """
+        Registriert eine abgeleitete Sicht (z.B. einen Titel-Index). factory(collection, items)
+        baut sie aus einem Snapshot; das Ergebnis muss add(item) und remove(item) anbieten.
+        """
+        self._view_factories[name] = factory
+
+    def view(self, collection, name):
+        """
+        Gibt die Sicht 'name' zum aktuellen Snapshot zurück. Sie wird nur beim ersten
+        Zugriff bzw. nach einem Neuladen von außen komplett aufgebaut; eigene
+        Schreiboperationen führen sie inkrementell nach.
+        """
+        items = self.snapshot(collection)
+        cached = self._views.get((collection, name))
+        if cached is not None and cached[0] is items:
+            return cached[1]
+        with self._locks[collection]:
+            items = self.snapshot(collection)
+            cached = self._views.get((collection, name))
+            if cached is not None and cached[0] is items:
+                return cached[1]
+            view = self._view_factories[name](collection, items)
+            self._views[(collection, name)] = (items, view)
+            return view
+
+    def _update_views(self, collection, old_items, new_items, removed=(), added=()):
+        """Führt die Sichten des alten Snapshots nach (muss unter dem Sammlungs-Lock aufgerufen werden)."""
+        for name in self._view_factories:
+            cached = self._views.get((collection, name))
+            if cached is None or cached[0] is not old_items:
+                continue
+            view = cached[1]
+            try:
+                for item in removed:
+                    view.remove(item)
+                for item in added:
+                    view.add(item)
+            except Exception as e:
+                # Beim nächsten Zugriff neu aufbauen
+                print(f"Sicht {name} für {collection} konnte nicht aktualisiert werden: {str(e)}")
+                del self._views[(collection, name)]
+                continue
+            self._views[(collection, name)] = (new_items, view)
+
+    def load(self, collection):
+        """Gibt die Einträge als neue Liste zurück (die Einträge selbst sind geteilt)."""
+        return list(self.snapshot(collection))
+
+    def get(self, collection, key):
+        _, items, index = self._current(collection)
+        pos = self._lookup(index, key)
+        return dict(items[pos]) if pos is not None else None
+
+    def save(self, collection, items):
+        items = [self._prepare_new(collection, item) for item in items]
+        with self._locks[collection]:
+            self.backend.save(collection, items)
+            items = tuple(items)
+            self._publish(collection, items, _build_index(collection, items))
+            self._reset_changes(collection)
+
+    def insert(self, collection, item):
+        return self.insert_many(collection, [item])[0]
+
+    def insert_many(self, collection, items):
+        """Fügt Einträge hinzu und gibt sie zurück (Filme/Spiele ohne gültige ID erhalten eine neue)."""
+        items = [self._prepare_new(collection, item) for item in items]
+        if not items:
+            return []
+        with self._locks[collection]:
+            _, current, index = self._current(collection)
+            ticket = self._begin_write(collection, 'insert_many', items)
+            index = dict(index)
+            for offset, item in enumerate(items):
+                _index_item(index, collection, item, len(current) + offset)
+            new_items = current + tuple(items)
+            self._publish(collection, new_items, index)
+            self._update_views(collection, current, new_items, added=items)
+            for offset, item in enumerate(items):
+                self._record_change(collection, item_key(collection, item) or f'#{len(current) + offset}', item)
+        self._finish_write(collection, ticket)
+        return [dict(item) for item in items]
+
+    def update(self, collection, key, item):
+        item = dict(item)
+        with self._locks[collection]:
+            _, current, index = self._current(collection)
+            pos = self._lookup(index, key)
+            if pos is None:
+                return False
+            canonical_key = item_key(collection, current[pos])
+            ticket = self._begin_write(collection, 'update', canonical_key, item)
+            new_items = current[:pos] + (item,) + current[pos + 1:]
+            if item_key(collection, item) != canonical_key or item.get('legacyId') != current[pos].get('legacyId'):
+                index = _build_index(collection, new_items)
+            self._publish(collection, new_items, index)
+            self._update_views(collection, current, new_items, removed=(current[pos],), added=(item,))
+            self._record_change(collection, canonical_key, item)
+        self._finish_write(collection, ticket)
+        return True
+
+    def delete(self, collection, key):
+        with self._locks[collection]:
+            _, current, index = self._current(collection)
+            pos = self._lookup(index, key)
+            if pos is None:
+                return None
+            deleted = current[pos]
+            ticket = self._begin_write(collection, 'delete', item_key(collection, deleted))
+            new_items = current[:pos] + current[pos + 1:]
+            self._publish(collection, new_items, _build_index(collection, new_items))
+            self._update_views(collection, current, new_items, removed=(deleted,))
+            self._record_change(collection, item_key(collection, deleted), None)
+        self._finish_write(collection, ticket)
+        return dict(deleted)
+
+    def stats(self):
+        """Cache-Treffer und -Fehlschläge (= Parse-Vorgänge) pro Sammlung."""
+        result = {}
+        for collection, counts in self._stats.items():
+            total = counts['hits'] + counts['misses']
+            cached = self._snapshots.get(collection)
+            result[collection] = {
+                'hits': counts['hits'],
+                'misses': counts['misses'],
+                'hit_rate': round(counts['hits'] / total, 3) if total else 0,
+                'cached_items': len(cached[1]) if cached else 0
+            }
+        return result
+
+    def close(self):
+        self.backend.close()
+
+
+def create_backend(name, json_files, db_path, compact_ops=500, compact_seconds=30):
+    """
+    Erstellt das in den Einstellungen gewählte Speicher-Backend.
+
+    Args:
+        name (str): 'json' (Standard) oder 'sqlite'
+        json_files (dict): Sammlung -> Pfad der JSON-Datei
+        db_path (str): Pfad der SQLite-Datenbank
+        compact_ops (int): Journal-Operationen bis zur Kompaktierung (nur JSON)
+        compact_seconds (int): Maximales Alter des Journals in Sekunden (nur JSON)
+    """
+    if name == 'sqlite':
+        return SqliteBackend(db_path, json_files)
+    return JsonBackend(json_files, compact_ops, compact_seconds)
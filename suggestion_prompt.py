@@ -0,0 +1,27 @@
+import math
+
+# Grobe Schätzung für englischen Text (ca. 4 Zeichen pro Token); genau genug für ein Budget
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text):
+    """Schätzt die Anzahl der Tokens eines Textes ohne Tokenizer."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN) if text else 0
+
+
+def fit_to_budget(entries, budget_tokens, separator=', '):
+    """
+    Nimmt Einträge der Reihe nach, solange sie ins Token-Budget passen.
+    Gibt (aufgenommene Einträge als Strings, Anzahl der weggelassenen) zurück.
+    Einträge müssen keine Strings sein (Titel aus KI-Antworten sind ungeprüft).
+    """
+    taken = []
+    used = 0
+    for entry in entries:
+        entry = str(entry)
+        cost = estimate_tokens(entry + separator)
+        if used + cost > budget_tokens:
+            break
+        taken.append(entry)
+        used += cost
+    return taken, len(entries) - len(taken)
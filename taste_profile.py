@@ -0,0 +1,236 @@
+import bisect
+import heapq
+import itertools
+import threading
+from operator import itemgetter
+
+from storage import item_key
+
+
+# Anzahl der Genres, deren Titel bei den Ausschlüssen bevorzugt werden
+TOP_GENRES = 5
+
+
+def split_genres(item):
+    return [genre.strip() for genre in (item.get('genre') or '').split(',') if genre.strip()]
+
+
+def item_rating(item):
+    try:
+        return float(item.get('rating') or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def increment_counts(counts, keys, delta):
+    for key in keys:
+        count = counts.get(key, 0) + delta
+        if count > 0:
+            counts[key] = count
+        else:
+            counts.pop(key, None)
+
+
+def genre_ratings_from_counts(genre_counts):
+    """
+    Bewertet Genres nach Anzahl der Einträge: das häufigste Genre erhält 5 Sterne,
+    die übrigen linear darunter (auf eine Nachkommastelle gerundet).
+    """
+    if not genre_counts:
+        return {}
+    max_count = max(genre_counts.values())
+    return {genre: round(count / max_count * 5, 1) if max_count > 0 else 0
+            for genre, count in genre_counts.items()}
+
+
+def top_genres(genre_ratings, limit=TOP_GENRES):
+    return [genre for genre, _ in sorted(genre_ratings.items(), key=lambda x: x[1], reverse=True)[:limit]]
+
+
+class RankedItems:
+    """
+    Die am höchsten bewerteten Einträge einer Sammlung als Heap mit verzögertem Löschen.
+    Bei gleichem Wert gewinnt der früher hinzugefügte Eintrag. Nicht thread-sicher;
+    die Sichten rufen es unter ihrem eigenen Lock auf.
+    """
+
+    def __init__(self):
+        # Heap-Einträge: (-Wert, Reihenfolge, Schlüssel). Gültig ist ein Eintrag nur,
+        # solange _entries[Schlüssel] dieselbe Reihenfolge hat.
+        self._heap = []
+        self._entries = {}  # Schlüssel -> (Reihenfolge, Daten)
+        self._order = itertools.count()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, key, score, data):
+        order = next(self._order)
+        self._entries[key] = (order, data)
+        heapq.heappush(self._heap, (-score, order, key))
+        # Veraltete Einträge sammeln sich an; gelegentlich neu aufbauen
+        if len(self._heap) > 2 * len(self._entries) + 100:
+            self._heap = [entry for entry in self._heap if self._valid(entry)]
+            heapq.heapify(self._heap)
+
+    def remove(self, key):
+        self._entries.pop(key, None)
+
+    def _valid(self, entry):
+        current = self._entries.get(entry[2])
+        return current is not None and current[0] == entry[1]
+
+    def top(self, limit=10):
+        """Die Daten der 'limit' höchsten Einträge (als Kopien)."""
+        taken = []
+        result = []
+        while self._heap and len(result) < limit:
+            entry = heapq.heappop(self._heap)
+            if not self._valid(entry):
+                continue
+            taken.append(entry)
+            result.append(dict(self._entries[entry[2]][1]))
+        for entry in taken:
+            heapq.heappush(self._heap, entry)
+        return result
+
+
+class TasteProfile:
+    """
+    Geschmacksprofil einer Sammlung für die Vorschlags-Endpunkte.
+
+    Filme/Spiele: Genre-Zähler (alle bzw. nur bewertete Einträge), die
+    Favoriten nach Bewertung in einem Heap und die nach Relevanz sortierte
+    Ausschlussliste. Musik: Häufigkeit von Künstlern und Genres. Wird von CachedStorage als Sicht gehalten und bei eigenen
+    Änderungen über add()/remove() nachgeführt, sodass Anfragen das Profil
+    nicht mehr aus der ganzen Sammlung neu berechnen müssen.
+    """
+
+    def __init__(self, collection, items=()):
+        self.collection = collection
+        self.genre_counts = {}
+        self.rated_genre_counts = {}
+        self.artist_counts = {}
+
+        self._favorites = RankedItems()
+        # Ausschlussliste: Schlüssel -> (Titel, Genres, Bewertung, createdAt, Reihenfolge) und je
+        # Auswahlmodus (Lieblingsgenres, aufsteigend sortierte Relevanz-Schlüssel)
+        self._exclusion_entries = {}
+        self._exclusion_ranks = {}
+        self._exclusion_titles = {}  # Titel -> Anzahl (doppelte Titel erscheinen nur einmal)
+        self._order = itertools.count()
+        self._derived = {}  # Zwischengespeicherte Auswertungen, bei jeder Änderung verworfen
+        self._lock = threading.Lock()
+
+        for item in items:
+            self.add(item)
+
+    def _key(self, item):
+        return item_key(self.collection, item) or item.get('title')
+
+    def add(self, item):
+        self._apply(item, 1)
+
+    def remove(self, item):
+        self._apply(item, -1)
+
+    def _apply(self, item, delta):
+        with self._lock:
+            self._derived.clear()
+            if self.collection == 'music_tracks':
+                for artist in item.get('artists') or []:
+                    if artist.get('artist_name'):
+                        increment_counts(self.artist_counts, [artist['artist_name']], delta)
+                    increment_counts(self.genre_counts, artist.get('genres') or [], delta)
+                return
+
+            genres = split_genres(item)
+            increment_counts(self.genre_counts, genres, delta)
+            rating = item_rating(item)
+            key = self._key(item)
+            self._update_exclusions(key, item, genres, rating, delta)
+            if rating <= 0:
+                return
+            increment_counts(self.rated_genre_counts, genres, delta)
+
+            if delta < 0:
+                self._favorites.remove(key)
+                return
+            self._favorites.add(key, rating, {
+                'title': item.get('title', ''),
+                'rating': item.get('rating', 0),
+                'id': item.get('id', ''),
+                'type': item.get('type', 'movie')
+            })
+
+    def _update_exclusions(self, key, item, genres, rating, delta):
+        entry = self._exclusion_entries.pop(key, None)
+        if entry is not None:
+            increment_counts(self._exclusion_titles, [entry[0]], -1)
+            for favorites, ranked in self._exclusion_ranks.values():
+                ranked.pop(bisect.bisect_left(ranked, self._exclusion_rank(entry, favorites)))
+        if delta < 0 or key is None or not item.get('title'):
+            return
+        entry = (item['title'], genres, rating, item.get('createdAt') or '', next(self._order))
+        self._exclusion_entries[key] = entry
+        increment_counts(self._exclusion_titles, [entry[0]], 1)
+        for favorites, ranked in self._exclusion_ranks.values():
+            bisect.insort(ranked, self._exclusion_rank(entry, favorites))
+
+    @staticmethod
+    def _exclusion_rank(entry, favorites):
+        """Relevanz aufsteigend; bei Gleichstand steht der früher hinzugefügte Eintrag weiter hinten."""
+        title, genres, rating, created, order = entry
+        hits = sum(1 for genre in genres if genre in favorites)
+        return (hits, rating, created, -order, title)
+
+    def _genre_ratings(self, rated_only):
+        key = ('genre_ratings', rated_only)
+        if key not in self._derived:
+            self._derived[key] = genre_ratings_from_counts(
+                self.rated_genre_counts if rated_only else self.genre_counts)
+        return self._derived[key]
+
+    def favorites(self, limit=10):
+        """Die 'limit' am besten bewerteten Einträge (bei gleicher Bewertung in Sammlungsreihenfolge)."""
+        with self._lock:
+            return self._favorites.top(limit)
+
+    def genre_ratings(self, rated_only=False):
+        """Genre-Bewertungen wie analyze_genre_ratings() für alle bzw. nur bewertete Einträge."""
+        with self._lock:
+            return dict(self._genre_ratings(rated_only))
+
+    def exclusions(self, rated_only=False):
+        """
+        Die Titel der Sammlung nach ihrer Bedeutung für die Ausschlussliste der Vorschläge:
+        Titel in den Lieblingsgenres zuerst (die KI schlägt am ehesten Ähnliches vor),
+        dann gut bewertete und zuletzt hinzugefügte, ohne doppelte Titel.
+
+        Die Sortierung wird bei Änderungen per Einfügen nachgeführt und nur neu
+        aufgebaut, wenn sich die Lieblingsgenres des Auswahlmodus ändern.
+        """
+        with self._lock:
+            key = ('exclusions', rated_only)
+            if key not in self._derived:
+                favorites = frozenset(top_genres(self._genre_ratings(rated_only)))
+                cached = self._exclusion_ranks.get(rated_only)
+                if cached is None or cached[0] != favorites:
+                    ranked = sorted(self._exclusion_rank(entry, favorites)
+                                    for entry in self._exclusion_entries.values())
+                    self._exclusion_ranks[rated_only] = (favorites, ranked)
+                else:
+                    ranked = cached[1]
+                titles = map(itemgetter(-1), reversed(ranked))
+                if len(self._exclusion_titles) < len(ranked):
+                    titles = dict.fromkeys(titles)
+                self._derived[key] = list(titles)
+            return list(self._derived[key])
+
+    def top_artists(self, limit=10):
+        with self._lock:
+            return heapq.nlargest(limit, self.artist_counts.items(), key=lambda x: x[1])
+
+    def top_genres(self, limit=10):
+        with self._lock:
+            return heapq.nlargest(limit, self.genre_counts.items(), key=lambda x: x[1])
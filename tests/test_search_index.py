@@ -0,0 +1,50 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from search_index import SearchIndex  # noqa: E402
+
+
+def movie(movie_id, title):
+    return {'id': movie_id, 'title': title, 'genre': 'Drama'}
+
+
+def titles(results):
+    return [item['title'] for _, item in results]
+
+
+class SearchOrderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.movies = [movie(str(i), f'Night {name}') for i, name in enumerate(['A', 'B', 'C', 'D'])]
+        self.index = SearchIndex('movies', self.movies)
+
+    def test_equal_scores_in_collection_order(self):
+        self.assertEqual(titles(self.index.search('night')), ['Night A', 'Night B', 'Night C', 'Night D'])
+
+    def test_reused_slot_after_delete_keeps_collection_order(self):
+        # 'Night E' bekommt die frei gewordene Nummer von 'Night A', steht in der Sammlung aber am Ende
+        self.index.remove(self.movies[0])
+        self.index.add(movie('4', 'Night E'))
+        self.assertEqual(titles(self.index.search('night')), ['Night B', 'Night C', 'Night D', 'Night E'])
+
+        self.index.remove(self.movies[2])
+        self.index.add(movie('5', 'Night F'))
+        self.assertEqual(titles(self.index.search('night')), ['Night B', 'Night D', 'Night E', 'Night F'])
+
+    def test_update_keeps_its_place(self):
+        # CachedStorage.update(): alter Eintrag raus, neuer mit gleichem Schlüssel rein
+        self.index.remove(self.movies[1])
+        self.index.add(movie('1', 'Night B2'))
+        self.assertEqual(titles(self.index.search('night')), ['Night A', 'Night B2', 'Night C', 'Night D'])
+
+    def test_limit_cuts_ties_in_collection_order(self):
+        self.index.remove(self.movies[0])
+        self.index.add(movie('4', 'Night E'))
+        self.assertEqual(titles(self.index.search('night', limit=2)), ['Night B', 'Night C'])
+
+
+if __name__ == '__main__':
+    unittest.main()
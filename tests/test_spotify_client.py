@@ -0,0 +1,120 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api_cache import ApiCache  # noqa: E402
+from spotify_client import SpotifyClient, track_document  # noqa: E402
+
+TRACK = {
+    'id': 'track1',
+    'name': 'Blinding Lights',
+    'popularity': 91,
+    'external_urls': {'spotify': 'https://open.spotify.com/track/track1'},
+    'album': {
+        'name': 'After Hours',
+        'release_date': '2020-03-20',
+        'external_urls': {'spotify': 'https://open.spotify.com/album/album1'},
+        'images': [{'url': 'small.jpg', 'width': 64}, {'url': 'large.jpg', 'width': 640}]
+    },
+    'artists': [
+        {'id': 'artist1', 'name': 'The Weeknd', 'external_urls': {'spotify': 'https://open.spotify.com/artist/artist1'}},
+        {'id': 'artist2', 'name': 'Unknown', 'external_urls': {}}
+    ]
+}
+
+ARTISTS = {
+    'artist1': {'genres': ['canadian pop', 'pop'], 'images': [{'url': 'artist.jpg', 'width': 320}]}
+}
+
+# Dokument, wie es der frühere Abruf pro Track (Suche + /v1/artists/<id> je Künstler) gespeichert hat
+PER_ITEM_DOCUMENT = {
+    'query': 'blinding lights the weeknd',
+    'track_id': 'track1',
+    'track_name': 'Blinding Lights',
+    'track_spotify_link': 'https://open.spotify.com/track/track1',
+    'popularity': 91,
+    'album': {
+        'album_name': 'After Hours',
+        'album_spotify_link': 'https://open.spotify.com/album/album1',
+        'album_image': 'large.jpg'
+    },
+    'artists': [{
+        'artist_id': 'artist1',
+        'artist_name': 'The Weeknd',
+        'artist_spotify_link': 'https://open.spotify.com/artist/artist1',
+        'genres': ['canadian pop', 'pop'],
+        'artist_image': 'artist.jpg'
+    }]
+}
+
+
+class TrackDocumentTest(unittest.TestCase):
+
+    def test_matches_per_item_document_plus_release_date(self):
+        document = track_document('blinding lights the weeknd', TRACK, ARTISTS)
+        # Einzige (bewusste) Schemaänderung: album.album_release_date
+        self.assertEqual(document['album'].pop('album_release_date'), '2020-03-20')
+        self.assertEqual(document, PER_ITEM_DOCUMENT)
+
+
+class FakeResponse:
+
+    def __init__(self, payload):
+        self.status_code = 200
+        self._payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self._payload
+
+
+class FakeHttp:
+
+    def __init__(self):
+        self.searches = []
+
+    def post(self, url, **kwargs):
+        return FakeResponse({'access_token': 'token', 'expires_in': 3600})
+
+    def get(self, url, params=None, **kwargs):
+        self.searches.append(params['q'])
+        return FakeResponse({'tracks': {'items': [TRACK]}})
+
+
+class SearchTrackTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.http = FakeHttp()
+        self.client = SpotifyClient(
+            lambda: ('id', 'secret'),
+            self.http,
+            ApiCache(os.path.join(self.directory, 'search.json'), flush_interval=3600),
+            ApiCache(os.path.join(self.directory, 'artists.json'), flush_interval=3600)
+        )
+
+    def tearDown(self):
+        self.client.search_cache.flush()
+        self.client.artist_cache.flush()
+        shutil.rmtree(self.directory)
+
+    def test_queries_differing_in_case_and_spacing_share_one_entry(self):
+        for query in ('Blinding Lights The Weeknd', 'blinding  lights the weeknd', ' BLINDING LIGHTS The Weeknd '):
+            result = self.client.search_track(query)
+            self.assertEqual(result['tracks']['items'][0]['id'], 'track1')
+        self.assertEqual(self.http.searches, ['Blinding Lights The Weeknd'])
+
+    def test_entry_under_raw_query_is_reused(self):
+        self.client.search_cache.set('Blinding Lights The Weeknd', {'tracks': {'items': [TRACK]}})
+        self.client.search_track('Blinding Lights The Weeknd')
+        self.assertEqual(self.http.searches, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
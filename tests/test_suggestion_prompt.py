@@ -0,0 +1,28 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from suggestion_prompt import estimate_tokens, fit_to_budget  # noqa: E402
+
+
+class FitToBudgetTest(unittest.TestCase):
+
+    def test_takes_entries_in_order_until_budget(self):
+        entries = ['Alien', 'Heat', 'Ronin', 'Se7en']
+        taken, omitted = fit_to_budget(entries, estimate_tokens('Alien, ') + estimate_tokens('Heat, '))
+        self.assertEqual(taken, ['Alien', 'Heat'])
+        self.assertEqual(omitted, 2)
+
+    def test_non_string_titles_from_ai_output(self):
+        # Titel aus der KI-Antwort sind ungeprüft: Zahlen, None oder Objekte dürfen nicht abstürzen
+        entries = ['Alien', 1984, None, {'title': 'Heat'}, 2.5]
+        taken, omitted = fit_to_budget(entries, 1000)
+        self.assertEqual(taken, ['Alien', '1984', 'None', "{'title': 'Heat'}", '2.5'])
+        self.assertEqual(omitted, 0)
+        self.assertTrue(all(isinstance(entry, str) for entry in taken))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import re
+import unicodedata
+
+# Führende Artikel, die beim Vergleich ignoriert werden ("The Office" == "Office")
+ARTICLES = ('the', 'a', 'an', 'der', 'die', 'das', 'ein', 'eine')
+
+# Staffel-Zusatz aus dem Netflix-Import, z.B. "Serienname (Staffel 1, 2)"
+SEASON_SUFFIX_RE = re.compile(r'\s*\((?:staffel|season)[^)]*\)\s*$')
+NON_WORD_RE = re.compile(r'[\W_]+')
+
+
+def normalize_title(title):
+    """
+    Normalisiert einen Titel für den Duplikatvergleich: Unicode-Normalisierung,
+    Case-Folding, Staffel-Zusatz entfernen, Satzzeichen durch Leerzeichen
+    ersetzen und einen führenden Artikel entfernen.
+    """
+    if not title:
+        return ''
+    text = unicodedata.normalize('NFKC', str(title)).casefold()
+    text = SEASON_SUFFIX_RE.sub('', text)
+    words = NON_WORD_RE.sub(' ', text).split()
+    if len(words) > 1 and words[0] in ARTICLES:
+        words = words[1:]
+    return ' '.join(words)
+
+
+def title_key(title):
+    """Indexschlüssel für einen Titel (None, wenn der Titel leer ist)."""
+    normalized = normalize_title(title)
+    return f'title:{normalized}' if normalized else None
+
+
+def item_keys(collection, item):
+    """
+    Alle Schlüssel, unter denen ein Eintrag im Index steht: der normalisierte
+    Titel und, falls vorhanden, externe IDs (imdbId/tmdbId bei Filmen, RAWG-slug
+    bei Spielen, Spotify track_id bei Musik).
+    """
+    keys = []
+    if collection == 'music_tracks':
+        if item.get('track_id'):
+            keys.append(f"track:{item['track_id']}")
+        # Der Import sucht mit "<Track> <Künstler>"; gespeicherte Tracks werden unter
+        # ihrer ursprünglichen Suchanfrage und unter Trackname + Künstlern geführt
+        if item.get('query'):
+            keys.append(title_key(item['query']))
+        if item.get('track_name'):
+            artists = ' '.join(a.get('artist_name') or '' for a in item.get('artists') or [])
+            keys.append(title_key(f"{item['track_name']} {artists}"))
+    else:
+        keys.append(title_key(item.get('title')))
+        if collection == 'movies':
+            if item.get('imdbId'):
+                keys.append(f"imdb:{item['imdbId']}")
+            if item.get('tmdbId'):
+                keys.append(f"tmdb:{item['tmdbId']}")
+        elif collection == 'games' and item.get('slug'):
+            keys.append(f"slug:{item['slug']}")
+    return [key for key in keys if key]
+
+
+class TitleIndex:
+    """
+    Index normalisierter Titel und externer IDs einer Sammlung für die
+    Duplikaterkennung in O(1).
+
+    Wird von CachedStorage als Sicht pro Snapshot gehalten und bei eigenen
+    Änderungen über add()/remove() nachgeführt (siehe CachedStorage.view()).
+    Die Schlüssel werden gezählt, damit das Löschen eines von zwei gleich
+    benannten Einträgen den anderen nicht aus dem Index entfernt.
+    """
+
+    def __init__(self, collection, items=()):
+        self.collection = collection
+        self._counts = {}
+        for item in items:
+            self.add(item)
+
+    def add(self, item):
+        for key in item_keys(self.collection, item):
+            self._counts[key] = self._counts.get(key, 0) + 1
+
+    def remove(self, item):
+        for key in item_keys(self.collection, item):
+            count = self._counts.get(key, 0)
+            if count <= 1:
+                self._counts.pop(key, None)
+            else:
+                self._counts[key] = count - 1
+
+    def __contains__(self, key):
+        return key in self._counts
+
+    def __len__(self):
+        return len(self._counts)
+
+    def contains_title(self, title):
+        key = title_key(title)
+        return key is not None and key in self._counts
+
+    def contains_item(self, item):
+        """True, wenn einer der Schlüssel des Eintrags (Titel oder externe ID) bereits vorhanden ist."""
+        return any(key in self._counts for key in item_keys(self.collection, item))
@@ -1,11 +1,11 @@
 import os
-import requests
 import shutil
 import hashlib
 import logging
 import sys
 import json
 from datetime import datetime
+from http_client import HttpClient
 
 # Konfiguration
 GITHUB_REPO = "Junko666/OmniBase"
@@ -16,6 +16,9 @@ LOCAL_DIR = os.path.dirname(os.path.abspath(__file__))
 BACKUP_DIR = os.path.join(LOCAL_DIR, "backup_" + datetime.now().strftime("%Y%m%d_%H%M%S"))
 LOG_FILE = os.path.join(LOCAL_DIR, "update.log")
 
+# Eine Verbindung pro Host für alle Downloads, mit Timeouts und Wiederholungen
+http_client = HttpClient(timeout=(10, 60))
+
 # Logging einrichten
 logging.basicConfig(
     filename=LOG_FILE,
@@ -56,7 +59,7 @@ def get_repo_tree():
     """Holt den Dateibaum vom Repository"""
     logging.info(f"Hole Dateibaum von {API_URL}")
     try:
-        response = requests.get(API_URL)
+        response = http_client.get(API_URL, provider='github_api')
         response.raise_for_status()
         data = response.json()
         return data["tree"]
@@ -69,7 +72,7 @@ def download_file(remote_path):
     url = RAW_URL + remote_path
     logging.info(f"Lade Datei herunter: {url}")
     try:
-        response = requests.get(url)
+        response = http_client.get(url, provider='github_raw')
         response.raise_for_status()
         return response.content
     except Exception as e:
@@ -138,6 +141,8 @@ def sync_files():
             logging.error(f"Fehler beim Verarbeiten von {remote_path}: {str(e)}")
             failed_files.append(remote_path)
 
+    logging.info(f"HTTP-Statistik: {json.dumps(http_client.stats())}")
+
     # Update-Zusammenfassung
     if failed_files:
         logging.warning(f"Update teilweise erfolgreich. {len(updated_files)} Dateien aktualisiert, {len(failed_files)} fehlgeschlagen.")